@@ -2,12 +2,19 @@
 Chasm CLI - Command Line Interface for Chart Assembler
 """
 
+import os
+import json
 import click
-from chasm.library.chart import make_chart
-from chasm.library.data import parse_data_input
-from typing import List
+from contextlib import contextmanager
+from chasm.library.config import BENCH_STAGES, CHART_TYPES, DEFAULT_CACHE_DIR, FACET_MODES, OUTPUT_FORMATS, RENDERERS
+from chasm.library.profile import PROFILE_FORMATS
+from typing import List, Optional, TextIO
 from . import __version__
 
+# Library modules are imported inside each command rather than here: plotly,
+# pydantic, numpy and yaml are slow to import and most commands need only
+# some of them (`chasm info` needs none).
+
 
 @click.group()
 @click.version_option(version=__version__)
@@ -16,6 +23,54 @@ def main(ctx):
     ctx.ensure_object(dict)
 
 
+def echo_plan(mod_paths: List[str]):
+    from chasm.library.mod import get_mods
+    from chasm.library.optimize import explain as explain_plan, optimize
+
+    instructions = [instruction for mod in get_mods(mod_paths) for instruction in mod.instructions]
+    click.echo(explain_plan(instructions, optimize(instructions)), err=True)
+
+
+def report_decimation(decimations):
+    from chasm.library.decimate import describe_decimations
+
+    for line in describe_decimations(decimations):
+        click.echo(f"Decimated {line}", err=True)
+
+
+def expand_outputs(output_paths: List[str], formats: List[str]) -> List[str]:
+    # Each output path is exported in every format asked for, in place of its own
+    if not formats:
+        return list(output_paths)
+
+    return [f"{os.path.splitext(path)[0]}.{output_format}" for path in output_paths for output_format in formats]
+
+
+def parse_sizes(ctx, param, value: str) -> List[int]:
+    # Each size is checked as its own IntRange, so errors name the bad value
+    size_type = click.IntRange(min=1, max=10_000_000)
+
+    return [size_type.convert(size.strip(), param, ctx) for size in value.split(",")]
+
+
+@contextmanager
+def profile_run(profile: Optional[TextIO], profile_format: str, cprofile: Optional[str]):
+    if profile is None and cprofile is None:
+        yield
+        return
+
+    from chasm.library.profile import profiling
+
+    # Memory is only traced when stage timings were asked for; it skews a cProfile
+    with profiling(memory=profile is not None, cprofile_path=cprofile) as profiler:
+        try:
+            yield
+        finally:
+            # Written even when the run fails, which is often when it's wanted
+            if profile is not None:
+                profiler.dump(profile, profile_format)
+
+
 @main.command()
 def info():
     click.echo(f"Chasm v{__version__}")
@@ -23,25 +78,235 @@ def info():
 
 
 @main.command()
-@click.argument('chart_type', type=click.Choice(['bar', 'stackedbar', 'scatter', 'line', 'scatter+line']))
-@click.option('--data', '-d', help='raw data, as a list of dicts')
+@click.argument('chart_type', type=click.Choice(CHART_TYPES))
+@click.option('--data', '-d', help='raw data, as a list of dicts (JSON string, or path to a .json, .ndjson, .csv or .arrow file or a directory of .npy columns)')
+@click.option('--layer', '-l', multiple=True, help='list of paths to layer files, processed in order')
+@click.option('--mod', '-m', multiple=True, help='list of paths to manipulator files, processed in order')
+@click.option('--output-path', '-o', multiple=True, default=['build/chart.svg'], help='path to output graphic; repeat to export the chart to several paths')
+@click.option('--format', '-f', 'formats', multiple=True, type=click.Choice(OUTPUT_FORMATS), help='export each output path in this format instead of its own (repeatable)')
+@click.option('--no-cache', is_flag=True, help='always render, bypassing the render cache')
+@click.option('--explain', is_flag=True, help='print the optimized mod plan')
+@click.option('--renderer', type=click.Choice(RENDERERS), default="plotly", help='plotly, or native to write SVG without plotly or a browser')
+@click.option('--validate', is_flag=True, help='debug: check the figure against plotly\'s schema before exporting')
+@click.option('--profile', type=click.File('w'), help='write per-stage timings, rows and peak memory to this file (- for stdout)')
+@click.option('--profile-format', type=click.Choice(PROFILE_FORMATS), default="json", help='json, or chrome for a trace loadable in chrome://tracing or Perfetto')
+@click.option('--cprofile', type=click.Path(dir_okay=False), help='also write a cProfile of the run to this file')
+@click.option('--facet', help='draw one chart per distinct value of this key (sets facet_key)')
+@click.option('--facet-mode', type=click.Choice(FACET_MODES), help='subplots in one output, or one file per value ({facet} in the output path is replaced by it)')
+@click.option('--facet-columns', type=click.IntRange(min=1), help='subplots per row')
+def make(chart_type: str, data: str, layer: List[str], mod: List[str], output_path: List[str], formats: List[str], no_cache: bool, explain: bool, renderer: str, validate: bool, profile: TextIO, profile_format: str, cprofile: str, facet: str, facet_mode: str, facet_columns: int):
+    from chasm.library.cache import RenderCache
+    from chasm.library.chart import make_chart
+    from chasm.library.layout import LayoutCache
+
+    if explain:
+        echo_plan(mod)
+
+    cache, layouts = (None, None) if no_cache else (RenderCache(), LayoutCache(DEFAULT_CACHE_DIR))
+
+    # The figure is built once and exported to every path
+    output_path = expand_outputs(output_path, formats)
+
+    # Facet options are applied as inline layers on top of the given ones
+    layer = list(layer)
+    facet_options = {"facet_key": facet, "facet_mode": facet_mode, "facet_columns": facet_columns}
+
+    for name, value in facet_options.items():
+        if value is not None:
+            layer.append(f"{name}: {json.dumps(value)}")
+
+    with profile_run(profile, profile_format, cprofile):
+        make_chart(chart_type, raw_data=data, layer_paths=layer, mod_paths=mod, output_path=output_path, cache=cache, renderer=renderer, validate=validate, layouts=layouts, on_decimate=report_decimation)
+
+
+@main.command()
+@click.argument('chart_type', type=click.Choice(CHART_TYPES))
+@click.option('--data', '-d', help='raw data, as a list of dicts (JSON string, or path to a .json, .ndjson, .csv or .arrow file or a directory of .npy columns)')
 @click.option('--layer', '-l', multiple=True, help='list of paths to layer files, processed in order')
 @click.option('--mod', '-m', multiple=True, help='list of paths to manipulator files, processed in order')
-@click.option('--output-path', '-o', default='build/chart.svg', help='path to output graphic')
-def make(chart_type: str, data: str, layer: List[str], mod: List[str], output_path: str):
-    make_chart(chart_type, raw_data=data, layer_paths=layer, mod_paths=mod, output_path=output_path)
+@click.option('--output-path', '-o', multiple=True, default=['build/chart.svg'], help='path to output graphic; repeat to export the chart to several paths')
+@click.option('--format', '-f', 'formats', multiple=True, type=click.Choice(OUTPUT_FORMATS), help='export each output path in this format instead of its own (repeatable)')
+@click.option('--renderer', type=click.Choice(RENDERERS), default="plotly", help='plotly, or native to write SVG without plotly or a browser')
+@click.option('--validate', is_flag=True, help='debug: check the figure against plotly\'s schema before exporting')
+@click.option('--interval', type=click.FloatRange(min=0.05), default=0.5, help='seconds between checks for changed inputs')
+def watch(chart_type: str, data: str, layer: List[str], mod: List[str], output_path: List[str], formats: List[str], renderer: str, validate: bool, interval: float):
+    """Re-render a chart whenever its data, layer or mod files change, recomputing only what the change affects"""
+    from chasm.library.layout import LayoutCache
+    from chasm.library.watch import ChartWatch
+
+    output_path = expand_outputs(output_path, formats)
+    chart = ChartWatch(chart_type, data, layer, mod, output_path, renderer=renderer, validate=validate, layouts=LayoutCache(DEFAULT_CACHE_DIR), on_decimate=report_decimation)
+
+    def report(stages: List[str], seconds: float):
+        click.echo(f"Rendered {', '.join(output_path)} in {seconds * 1000:.1f} ms (ran: {', '.join(stages)})")
+
+    def report_error(error: Exception):
+        click.echo(f"Failed: {type(error).__name__}: {error}", err=True)
+
+    click.echo(f"Watching {len(layer)} layer(s), {len(mod)} mod(s) and the data; Ctrl+C to stop", err=True)
+
+    try:
+        chart.run(interval, on_render=report, on_error=report_error)
+    except KeyboardInterrupt:
+        pass
 
 
 @main.command()
-@click.option('--data', '-d', help='raw data, as a list of dicts')
+@click.option('--data', '-d', help='raw data, as a list of dicts (JSON string, or path to a .json, .ndjson, .csv or .arrow file or a directory of .npy columns)')
 @click.option('--mod', '-m', multiple=True, help='list of paths to manipulator files, processed in order')
-@click.option('--output', '-o', help='output file to path')
-def data(data: str, mod: List[str]):
+@click.option('--output', '-o', help='write the result as binary columns: an .arrow file, or otherwise a directory of .npy files')
+@click.option('--explain', is_flag=True, help='print the optimized mod plan')
+def data(data: str, mod: List[str], output: str, explain: bool):
+    from chasm.library.data import parse_data_input
+    from chasm.library.storage import write_binary
+
     click.echo(f"Data: {data}")
     click.echo(f"Mods: {mod}")
+
+    if explain:
+        echo_plan(mod)
+
     data = parse_data_input(data, mod)
-    print(data)
 
+    if output:
+        write_binary(data, output)
+        click.echo(f"Wrote {len(data)} rows to {output}")
+    else:
+        print(data.to_records())
+
+
+@main.command()
+@click.argument('output', type=click.Path())
+@click.option('--rows', '-n', type=click.IntRange(min=1), required=True, help='number of rows to generate')
+@click.option('--series', type=click.IntRange(min=1), default=1, help='number of random y columns (y0, y1, ...)')
+@click.option('--low', type=int, default=0, help='smallest value generated')
+@click.option('--high', type=int, default=1000, help='largest value generated')
+@click.option('--seed', type=int, default=None, help='seed for reproducible output')
+@click.option('--mod', '-m', multiple=True, help='rowwise manipulator files to apply to every chunk')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=65536, help='rows generated and written at a time')
+def generate(output: str, rows: int, series: int, low: int, high: int, seed: int, mod: List[str], chunk_size: int):
+    """Write a synthetic dataset (.ndjson, .csv, .arrow, or a directory of .npy columns for a path without an extension) without holding it in memory"""
+    from chasm.library.generate import generate_chunks, output_format, write_chunks
+
+    try:
+        output_format(output)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="OUTPUT")
+
+    written = write_chunks(generate_chunks(rows, series, low, high, seed, mod, chunk_size), output, rows)
+    click.echo(f"Wrote {written} rows to {output}")
+
+
+@main.command()
+@click.argument('manifest', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', '-w', type=int, default=None, help='number of parallel render worker processes')
+@click.option('--max-pending', type=int, default=None, help='maximum exports queued before building blocks (default: 2x workers)')
+@click.option('--no-cache', is_flag=True, help='always render, bypassing the render cache')
+@click.option('--renderer', type=click.Choice(RENDERERS), default="plotly", help='renderer for manifest entries that don\'t name one')
+@click.option('--profile', type=click.File('w'), help='write per-stage timings, rows and peak memory to this file (- for stdout)')
+@click.option('--profile-format', type=click.Choice(PROFILE_FORMATS), default="json", help='json, or chrome for a trace loadable in chrome://tracing or Perfetto')
+@click.option('--cprofile', type=click.Path(dir_okay=False), help='also write a cProfile of the run to this file')
+@click.pass_context
+def batch(ctx, manifest: str, workers: int, max_pending: int, no_cache: bool, renderer: str, profile: TextIO, profile_format: str, cprofile: str):
+    """Render every chart listed in a YAML/JSON manifest in one process"""
+    from chasm.library.batch import load_manifest, run_batch, BatchResult
+    from chasm.library.cache import RenderCache
+    from chasm.library.layout import LayoutCache
+
+    def report(result: BatchResult):
+        output = result.job.output if isinstance(result.job.output, str) else ", ".join(result.job.output)
+
+        if result.ok:
+            click.echo(f"[ok]     {output}")
+        else:
+            click.echo(f"[failed] {output}: {result.error}", err=True)
+
+    cache, layouts = (None, None) if no_cache else (RenderCache(), LayoutCache(DEFAULT_CACHE_DIR))
+
+    # Exports run in worker processes, so their stages only show the hand-off
+    with profile_run(profile, profile_format, cprofile):
+        results = run_batch(load_manifest(manifest, renderer), on_result=report, workers=workers, max_pending=max_pending, cache=cache, layouts=layouts)
+
+    failures = sum(1 for result in results if not result.ok)
+
+    click.echo(f"{len(results) - failures}/{len(results)} charts rendered")
+
+    if failures:
+        ctx.exit(1)
+
+
+@main.command()
+@click.option('--host', default="127.0.0.1", help='address to listen on')
+@click.option('--port', '-p', type=int, default=8765, help='TCP port to listen on')
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False), help='listen on this Unix socket instead of TCP')
+@click.option('--workers', '-w', type=int, default=None, help='number of render worker processes (default: one per CPU)')
+@click.option('--max-queue', type=int, default=64, help='maximum renders waiting for a worker before requests are refused')
+@click.option('--preload', type=click.Path(exists=True, file_okay=False), help='directory of layer files to parse when each worker starts')
+@click.option('--root', type=click.Path(exists=True, file_okay=False), default='.', help='directory every data, layer, mod and output path in a request must be under (default: the current one)')
+def serve(host: str, port: int, socket_path: str, workers: int, max_queue: int, preload: str, root: str):
+    """Run a local render daemon (POST /render, GET /stats)"""
+    from chasm.library.server import serve as run_server
+
+    click.echo(f"Serving on {socket_path or f'http://{host}:{port}'} (files under {os.path.abspath(root)})", err=True)
+    run_server(host=host, port=port, socket_path=socket_path, workers=workers, max_queue=max_queue, layers_dir=preload, root=root)
+
+
+@main.command()
+@click.option('--sizes', default="10,1000,100000", callback=parse_sizes, help='comma separated row counts to benchmark (up to 10000000)')
+@click.option('--stage', '-s', 'stages', multiple=True, type=click.Choice(BENCH_STAGES), help='stages to benchmark (default: all)')
+@click.option('--format', '-f', 'formats', multiple=True, type=click.Choice(OUTPUT_FORMATS), help='formats for the export stage (default: svg and png)')
+@click.option('--repeat', '-r', type=int, default=5, help='runs per measurement; the median is reported')
+@click.option('--seed', type=int, default=0, help='seed for the synthetic data')
+@click.option('--output', '-o', help='write the results as a baseline JSON file (- for stdout)')
+@click.option('--baseline', '-b', type=click.Path(exists=True, dir_okay=False), help='compare against this baseline and fail on regressions')
+@click.option('--threshold', type=float, default=0.2, help='slowdown, as a fraction of the baseline, counted as a regression')
+@click.pass_context
+def bench(ctx, sizes: List[int], stages: List[str], formats: List[str], repeat: int, seed: int, output: str, baseline: str, threshold: float):
+    """Benchmark every pipeline stage on synthetic data"""
+    from chasm.library.bench import DEFAULT_EXPORT_FORMATS, compare, load_baseline, run_bench, to_baseline, write_baseline
+
+    # Progress goes to stderr so the baseline can be written to stdout
+    def report(result):
+        click.echo(f"{result.median_ms:>12.3f} ms  {result.key}", err=True)
+
+    results = run_bench(sizes, stages or BENCH_STAGES, formats or DEFAULT_EXPORT_FORMATS, repeat, seed, on_result=report)
+    current = to_baseline(results, repeat, seed)
+
+    if output:
+        write_baseline(current, output)
+
+    if not baseline:
+        return
+
+    comparisons = compare(load_baseline(baseline), current, threshold)
+    regressions = [comparison for comparison in comparisons if comparison.status == "regression"]
+
+    for comparison in comparisons:
+        if comparison.status in ("regression", "improvement"):
+            click.echo(f"[{comparison.status}] {comparison.key}: {comparison.baseline_ms:.3f} ms -> {comparison.current_ms:.3f} ms ({comparison.ratio:.2f}x)", err=True)
+
+    click.echo(f"{len(regressions)} regressions beyond {threshold:.0%} in {len(comparisons)} measurements", err=True)
+
+    if regressions:
+        ctx.exit(1)
+
+
+@main.command('compile')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+def compile_mods(paths: List[str]):
+    """Validate .chasm mod files and store their compiled programs in the cache"""
+    from chasm.library.mod import load_program
+
+    for path in paths:
+        # Directories compile every .chasm file beneath them
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names if name.endswith(".chasm"))
+        else:
+            files = [path]
+
+        for file in files:
+            program = load_program(file)
+            click.echo(f"Compiled {file} ({len(program.steps)} instructions)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,337 @@
+import heapq
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+from chasm.library.dataset import Dataset, to_column, to_float_column
+
+
+AGGREGATIONS = ("sum", "count", "mean", "min", "max")
+
+# Fixed-width units are multiples of a numpy time unit; calendar units vary in length
+FIXED_TIME_UNITS = {"second": "s", "minute": "m", "hour": "h", "day": "D"}
+CALENDAR_TIME_UNITS = ("week", "month", "quarter", "year")
+TIME_UNITS = tuple(FIXED_TIME_UNITS) + CALENDAR_TIME_UNITS
+
+
+def _is_number(value: Any) -> bool:
+    return type(value) in (int, float)
+
+
+def is_numeric(column: np.ndarray) -> bool:
+    if column.dtype.kind in "iuf":
+        return True
+
+    return column.dtype == object and all(value is None or _is_number(value) for value in column)
+
+
+def numeric_columns(data: Dataset, exclude: Tuple[str, ...] = ()) -> Dict[str, np.ndarray]:
+    """
+    The columns of data holding numbers (gaps allowed), in column order.
+    Integer columns are returned as they are and anything else as float64
+    with NaN for the gaps. Text, bools and mixed columns are left out.
+    """
+    columns = {}
+
+    for key in data.keys():
+        column = data[key]
+
+        if key in exclude or not is_numeric(column):
+            continue
+
+        columns[key] = column if column.dtype.kind in "iuf" else to_float_column(column)
+
+    return columns
+
+
+def group_codes(column: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Number each distinct value of column by order of first appearance.
+    Returns the code of every row and the distinct values in code order.
+    """
+    if column.dtype != object:
+        uniques, first, codes = np.unique(column, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        remap = np.empty_like(order)
+        remap[order] = np.arange(len(order))
+
+        return remap[codes.reshape(-1)], uniques[order]
+
+    # Object columns can mix types (e.g. None among strings), which can't be
+    # sorted, so they are numbered through a dict in a single pass
+    index: Dict[Any, int] = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in column), dtype=np.int64, count=len(column))
+
+    uniques = np.empty(len(index), dtype=object)
+    uniques[:] = list(index)
+
+    return codes, uniques
+
+
+def _reduce(column: np.ndarray, codes: np.ndarray, groups: int, agg: str) -> np.ndarray:
+    present = ~np.isnan(column) if column.dtype.kind == "f" else np.ones(len(column), dtype=bool)
+    counts = np.bincount(codes[present], minlength=groups)
+
+    if agg == "count":
+        return counts
+
+    if column.dtype.kind in "iu":
+        # Integer sums, minima and maxima stay exact integers
+        if agg == "sum":
+            out = np.zeros(groups, dtype=column.dtype)
+            np.add.at(out, codes, column)
+        elif agg == "min":
+            out = np.full(groups, np.iinfo(column.dtype).max, dtype=column.dtype)
+            np.minimum.at(out, codes, column)
+        elif agg == "max":
+            out = np.full(groups, np.iinfo(column.dtype).min, dtype=column.dtype)
+            np.maximum.at(out, codes, column)
+        else:
+            out = np.bincount(codes, weights=column, minlength=groups) / counts
+
+        return out
+
+    # Missing values are skipped; a group with none left has a NaN result (or a zero sum)
+    if agg in ("sum", "mean"):
+        sums = np.bincount(codes[present], weights=column[present], minlength=groups)
+
+        if agg == "sum":
+            return sums
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts
+
+    out = np.full(groups, np.nan)
+    (np.fmin if agg == "min" else np.fmax).at(out, codes, column)
+
+    return out
+
+
+def aggregate_columns(data: Dataset, key: str, codes: np.ndarray, uniques: np.ndarray, agg: str, ckey: Optional[str] = None) -> Dataset:
+    """
+    Collapse data to one row per group: key holds the group values, every
+    numeric column is reduced with agg and other columns are dropped. With
+    ckey, the number of rows in each group is written there too.
+    """
+    columns = numeric_columns(data, exclude=(key,))
+    result = Dataset()
+
+    for name in data.keys():
+        if name == key:
+            result[name] = uniques
+        elif name in columns:
+            result[name] = _reduce(columns[name], codes, len(uniques), agg)
+
+    if ckey:
+        result[ckey] = np.bincount(codes, minlength=len(uniques))
+
+    return result
+
+
+def aggregate_rows(data: List[Dict], key: str, labels: List[Any], agg: str, ckey: Optional[str] = None) -> List[Dict]:
+    """
+    The row counterpart of aggregate_columns: a single pass over the rows
+    accumulating every group in a dict, keyed by each row's label.
+    """
+    # [total, count, min, max] per group and column, plus the group sizes
+    groups: Dict[Any, Dict[str, List]] = {}
+    sizes: Dict[Any, int] = {}
+    non_numeric = {key}
+    names: Dict[str, None] = {}
+
+    for datum, label in zip(data, labels):
+        group = groups.get(label)
+
+        if group is None:
+            group = groups[label] = {}
+            sizes[label] = 0
+
+        sizes[label] += 1
+
+        for name, value in datum.items():
+            names.setdefault(name)
+
+            if name in non_numeric or value is None:
+                continue
+
+            if not _is_number(value):
+                non_numeric.add(name)
+                continue
+
+            # NaN is a gap, as on columns
+            if value != value:
+                continue
+
+            state = group.get(name)
+
+            if state is None:
+                group[name] = [value, 1, value, value]
+            else:
+                state[0] += value
+                state[1] += 1
+                state[2] = min(state[2], value)
+                state[3] = max(state[3], value)
+
+    result = []
+
+    for label, group in groups.items():
+        record = {}
+
+        for name in names:
+            if name == key:
+                record[name] = label
+            elif name not in non_numeric:
+                total, count, low, high = group.get(name, (0, 0, None, None))
+                record[name] = {"sum": total, "count": count, "mean": total / count if count else None, "min": low, "max": high}[agg]
+
+        if ckey:
+            record[ckey] = sizes[label]
+
+        result.append(record)
+
+    return result
+
+
+def _to_times(column: np.ndarray) -> np.ndarray:
+    # Numbers are epoch seconds; strings are ISO 8601 dates or times
+    if is_numeric(column):
+        seconds = to_float_column(column)
+        times = np.full(len(column), np.datetime64("NaT"), dtype="datetime64[ms]")
+        present = ~np.isnan(seconds)
+        times[present] = np.floor(seconds[present] * 1000).astype(np.int64).astype("datetime64[ms]")
+
+        return times
+
+    if column.dtype.kind == "M":
+        return column.astype("datetime64[ms]")
+
+    try:
+        return np.array([None if value is None else str(value) for value in column], dtype="datetime64[ms]")
+    except ValueError as e:
+        raise ValueError(f"Can't read time values for bucketing: {e}")
+
+
+def bucket_starts(column: np.ndarray, every: int, unit: str) -> np.ndarray:
+    """
+    The start of the bucket each time in column falls in, as datetime64
+    (NaT where the time is missing). Fixed-width buckets are every units
+    long, counted from the epoch; calendar buckets are every weeks
+    (starting Monday), months, quarters or years.
+    """
+    times = _to_times(column)
+    missing = np.isnat(times)
+
+    if unit in FIXED_TIME_UNITS:
+        numpy_unit = FIXED_TIME_UNITS[unit]
+        ticks = times.astype(f"datetime64[{numpy_unit}]").astype(np.int64)
+        starts = ((ticks // every) * every).astype(f"datetime64[{numpy_unit}]")
+    elif unit == "week":
+        # Day 0 of the epoch is a Thursday; shift by three days to start weeks on Monday
+        days = times.astype("datetime64[D]").astype(np.int64)
+        starts = (((days + 3) // (7 * every)) * (7 * every) - 3).astype("datetime64[D]")
+    else:
+        numpy_unit, width = ("Y", every) if unit == "year" else ("M", every * 3 if unit == "quarter" else every)
+        ticks = times.astype(f"datetime64[{numpy_unit}]").astype(np.int64)
+        starts = ((ticks // width) * width).astype(f"datetime64[{numpy_unit}]")
+
+    starts = starts.astype("datetime64[ms]")
+    starts[missing] = np.datetime64("NaT")
+
+    return starts
+
+
+def bucket_labels(starts: np.ndarray, unit: str, numeric: bool) -> np.ndarray:
+    """Label bucket starts in epoch seconds for numeric times, otherwise as ISO strings"""
+    if numeric:
+        return starts.astype("datetime64[s]").astype(np.int64)
+
+    precision = {"second": "s", "minute": "m", "hour": "m"}.get(unit, "D")
+
+    return to_column(np.datetime_as_string(starts, unit=precision).tolist())
+
+
+def top_indices(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    Row indices of the n largest values, largest first and earlier rows
+    first among ties (the same rows heapq.nlargest picks). Missing values
+    rank below every number. Selection is O(len) before sorting the n rows.
+    """
+    scores = to_float_column(values)
+    scores[np.isnan(scores)] = -np.inf
+
+    if n < len(scores):
+        kth = np.partition(scores, len(scores) - n)[len(scores) - n]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+
+    return candidates[np.argsort(-scores[candidates], kind="stable")[:n]]
+
+
+def top_rows(data: List[Dict], vkey: str, n: int) -> List[int]:
+    def score(index: int) -> float:
+        value = data[index].get(vkey)
+        return value if _is_number(value) and value == value else -np.inf
+
+    return heapq.nlargest(n, range(len(data)), key=score)
+
+
+def rollup_columns(data: Dataset, key: str, index: np.ndarray, other: Optional[str]) -> Dataset:
+    """
+    Keep the rows at index, in that order, and with other set, sum every
+    numeric column of the remaining rows into one extra row keyed other.
+    """
+    top = Dataset({name: data[name][index] for name in data.keys()})
+
+    rest = np.ones(len(data), dtype=bool)
+    rest[index] = False
+
+    if other is None or not rest.any():
+        return top
+
+    label = np.empty(1, dtype=object)
+    label[0] = other
+
+    totals = Dataset({key: label})
+
+    for name, column in numeric_columns(data, exclude=(key,)).items():
+        values = column[rest]
+
+        if values.dtype.kind in "iu":
+            totals[name] = np.array([values.sum()])
+        else:
+            # Added in row order like rollup_rows, not pairwise as np.nansum would
+            present = values[~np.isnan(values)]
+            totals[name] = np.array([present.cumsum()[-1] if len(present) else 0.0])
+
+    return Dataset.concat([top, totals])
+
+
+def rollup_rows(data: List[Dict], key: str, index: List[int], other: Optional[str]) -> List[Dict]:
+    result = [data[i] for i in index]
+    kept = set(index)
+    rest = [datum for i, datum in enumerate(data) if i not in kept]
+
+    if other is None or not rest:
+        return result
+
+    totals: Dict[str, Any] = {}
+    non_numeric = {key}
+
+    for datum in rest:
+        for name, value in datum.items():
+            totals.setdefault(name, 0)
+
+            if name in non_numeric or value is None:
+                continue
+
+            if not _is_number(value):
+                non_numeric.add(name)
+                continue
+
+            # NaN is a gap, as on columns
+            if value == value:
+                totals[name] += value
+
+    result.append({name: other if name == key else (None if name in non_numeric else total) for name, total in totals.items()})
+
+    return result
@@ -0,0 +1,159 @@
+import json
+import yaml
+from typing import Any, Callable, List, Optional, Union
+from dataclasses import dataclass, field
+
+from chasm.library.cache import RenderCache
+from chasm.library.chart import make_chart
+from chasm.library.config import CHART_TYPES, RENDERERS
+from chasm.library.layout import LayoutCache
+from chasm.library.render import warm_renderer
+from chasm.library.scheduler import RenderScheduler
+
+
+@dataclass
+class BatchJob:
+    chart_type: str
+    data: Any
+    output: Union[str, List[str]] # One path, or several to export the chart to each
+    layers: List[str] = field(default_factory=list)
+    mods: List[str] = field(default_factory=list)
+    renderer: str = "plotly"
+
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def load_manifest(path: str, renderer: str = "plotly") -> List[BatchJob]:
+    """
+    Load a YAML or JSON manifest describing a list of charts to render.
+
+    Args:
+        path: Path to the manifest file
+        renderer: Renderer for entries that don't name their own
+
+    Returns:
+        List of BatchJob objects, in manifest order
+
+    Raises:
+        ValueError: If the manifest is not a list of well formed chart entries
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        entries = yaml.safe_load(file)
+
+    if not isinstance(entries, list):
+        raise ValueError(f"Manifest {path} must be a list of chart entries")
+
+    jobs = []
+
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Manifest entry at index {i} is not a dictionary")
+
+        for key in ("chart_type", "data", "output"):
+            if key not in entry:
+                raise ValueError(f"Manifest entry at index {i} is missing '{key}'")
+
+        if entry["chart_type"] not in CHART_TYPES:
+            raise ValueError(f"Manifest entry at index {i} has unknown chart_type '{entry['chart_type']}'")
+
+        job_renderer = entry.get("renderer", renderer)
+
+        if job_renderer not in RENDERERS:
+            raise ValueError(f"Manifest entry at index {i} has unknown renderer '{job_renderer}'")
+
+        output = entry["output"]
+
+        if not (isinstance(output, str) or (isinstance(output, list) and output and all(isinstance(path, str) for path in output))):
+            raise ValueError(f"Manifest entry at index {i} has an output that is neither a path nor a list of paths")
+
+        data = entry["data"]
+
+        # Data may be given inline in the manifest rather than as a path or JSON string
+        if not isinstance(data, str):
+            data = json.dumps(data)
+
+        jobs.append(
+            BatchJob(
+                chart_type=entry["chart_type"],
+                data=data,
+                output=output,
+                layers=list(entry.get("layers") or []),
+                mods=list(entry.get("mods") or []),
+                renderer=job_renderer,
+            )
+        )
+
+    return jobs
+
+
+def run_batch(jobs: List[BatchJob], on_result: Callable[[BatchResult], None] = None, workers: int = None, max_pending: int = None, cache: RenderCache = None, layouts: LayoutCache = None) -> List[BatchResult]:
+    """
+    Render every job in a single process, sharing one warm kaleido session.
+    A failing chart is recorded in its result and does not stop the run.
+
+    When workers is given, figures are still built here but their exports are
+    fanned out to a RenderScheduler with that many worker processes. Results
+    are reported in manifest order either way. Charts sharing a layer stack
+    share one pre-built layout from layouts (or the process default).
+    """
+    if workers:
+        return _run_batch_scheduled(jobs, on_result, RenderScheduler(workers=workers, max_pending=max_pending), cache, layouts)
+
+    results = []
+
+    with warm_renderer():
+        for job in jobs:
+            try:
+                make_chart(job.chart_type, raw_data=job.data, layer_paths=job.layers, mod_paths=job.mods, output_path=job.output, cache=cache, renderer=job.renderer, layouts=layouts)
+                result = BatchResult(job=job)
+            except Exception as e:
+                result = BatchResult(job=job, error=e)
+
+            results.append(result)
+
+            if on_result:
+                on_result(result)
+
+    return results
+
+
+def _run_batch_scheduled(jobs: List[BatchJob], on_result: Callable[[BatchResult], None], scheduler: RenderScheduler, cache: RenderCache, layouts: LayoutCache) -> List[BatchResult]:
+    # Jobs served from the cache submit nothing, faceted jobs one export per
+    # file; every job waits on the export results it submitted, in order
+    outcomes = []
+
+    with scheduler:
+        for job in jobs:
+            before = scheduler.submitted
+
+            try:
+                make_chart(job.chart_type, raw_data=job.data, layer_paths=job.layers, mod_paths=job.mods, output_path=job.output, scheduler=scheduler, cache=cache, renderer=job.renderer, layouts=layouts)
+                error = None
+            except Exception as e:
+                error = e
+
+            outcomes.append((scheduler.submitted - before, error))
+
+        exports = scheduler.results()
+        results = []
+
+        for job, (submitted, error) in zip(jobs, outcomes):
+            for _ in range(submitted):
+                export_error = next(exports).error
+                error = error or export_error
+
+            result = BatchResult(job=job, error=error)
+            results.append(result)
+
+            if on_result:
+                on_result(result)
+
+    return results
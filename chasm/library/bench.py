@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import statistics
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from chasm import __version__
+from chasm.library.config import BENCH_STAGES, CHART_TYPES
+from chasm.library.dataset import Dataset
+
+
+DEFAULT_SIZES = (10, 1_000, 100_000)
+DEFAULT_EXPORT_FORMATS = ("svg", "png")
+
+# JSON input and the row path materialise a dict per row; past this they
+# measure the allocator rather than chasm
+ROW_PATH_MAX_ROWS = 1_000_000
+
+DEFAULT_THRESHOLD = 0.2
+
+# Differences below this are timer noise, however large they are relatively
+NOISE_FLOOR_MS = 0.05
+
+BASELINE_VERSION = 1
+
+# Arguments each ISA instruction is benchmarked with, on the generated x / y0 / y1 columns
+INSTRUCTION_ARGS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "appendrandint":        lambda rows: {"num": rows, "low": 0, "high": 1000, "xkey": "x", "ykey": "y0"},
+    "injectrandint":        lambda rows: {"low": 0, "high": 1000, "ykey": "y2"},
+    "injectmovingaverage":  lambda rows: {"wsize": min(20, rows), "skey": "y0", "tkey": "t"},
+    "injectrollingsum":     lambda rows: {"wsize": min(20, rows), "skey": "y0", "tkey": "t"},
+    "injectrollingmin":     lambda rows: {"wsize": min(20, rows), "skey": "y0", "tkey": "t"},
+    "injectrollingmax":     lambda rows: {"wsize": min(20, rows), "skey": "y0", "tkey": "t"},
+    "injectrollingstd":     lambda rows: {"wsize": min(20, rows), "skey": "y0", "tkey": "t"},
+    "injectema":            lambda rows: {"wsize": min(20, rows), "skey": "y0", "tkey": "t"},
+    "addint":               lambda rows: {"adder": 1, "key": "y0"},
+    # y0 and y1 hold at most 1001 distinct values, so both make low cardinality keys
+    "groupby":              lambda rows: {"key": "y0", "agg": "mean", "ckey": "n"},
+    "timebucket":           lambda rows: {"unit": "second", "every": 10, "key": "y1", "agg": "sum"},
+    "topn":                 lambda rows: {"n": min(10, rows), "vkey": "y0", "key": "x"},
+}
+
+# Decimation is opt-in; the figure stage benchmarks it at the usual budget
+BENCH_LAYERS = ["chart_layout_showlegend: true", "decimate_max_points: 5000"]
+
+
+@dataclass
+class BenchResult:
+    stage: str
+    rows: int
+    samples_ms: List[float] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return f"{self.stage}@{self.rows}"
+
+    @property
+    def median_ms(self) -> float:
+        return statistics.median(self.samples_ms)
+
+    @property
+    def min_ms(self) -> float:
+        return min(self.samples_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"stage": self.stage, "rows": self.rows, "median_ms": self.median_ms, "min_ms": self.min_ms, "samples": len(self.samples_ms)}
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline_ms: Optional[float]
+    current_ms: Optional[float]
+    status: str # "regression", "improvement", "ok", "new" or "missing"
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.baseline_ms or self.current_ms is None:
+            return None
+
+        return self.current_ms / self.baseline_ms
+
+
+def synthetic_data(rows: int, seed: int = 0) -> Dataset:
+    """
+    Generate rows of x / y0 / y1 data with the random instructions, from a
+    fixed seed so every run (and every baseline) benchmarks the same values.
+    """
+    from chasm.library.mod import AppendRandInt, InjectRandInt
+
+    data = AppendRandInt(dict(INSTRUCTION_ARGS["appendrandint"](rows), seed=seed)).process_columns(Dataset())
+    data = InjectRandInt({"low": 0, "high": 1000, "ykey": "y1", "seed": seed + 1}).process_columns(data)
+
+    return data
+
+
+def measure(stage: str, rows: int, run: Callable[[Any], Any], setup: Callable[[], Any] = lambda: None, repeat: int = 5) -> BenchResult:
+    """Time run(setup()) repeat times; only run is timed"""
+    result = BenchResult(stage=stage, rows=rows)
+
+    for _ in range(repeat):
+        arg = setup()
+
+        start = time.perf_counter()
+        run(arg)
+        result.samples_ms.append((time.perf_counter() - start) * 1000)
+
+    return result
+
+
+def _bench_parse(data: Dataset, repeat: int) -> List[BenchResult]:
+    from chasm.library.data import parse_data_input_string
+
+    text = json.dumps(data.to_records())
+
+    return [measure("parse_data_input_string", len(data), lambda _: parse_data_input_string(text), repeat=repeat)]
+
+
+def _bench_instructions(data: Dataset, repeat: int) -> List[BenchResult]:
+    from chasm.library.mod import ISA
+
+    rows = len(data)
+    results = []
+
+    for name, make_args in INSTRUCTION_ARGS.items():
+        instruction = ISA[name](make_args(rows))
+
+        # Instructions replace columns rather than writing into them, so a shallow copy is a fresh input
+        results.append(measure(f"instruction:{name}:columns", rows, instruction.process_columns, lambda: Dataset(dict(data.columns)), repeat))
+
+        if rows <= ROW_PATH_MAX_ROWS:
+            results.append(measure(f"instruction:{name}:rows", rows, instruction.process, data.to_records, repeat))
+
+    return results
+
+
+def _bench_config(data: Dataset, repeat: int) -> List[BenchResult]:
+    from chasm.library.layer import clear_layer_cache, get_chart_config
+
+    rows = len(data)
+
+    # Cold runs parse and resolve the layers again; warm runs hit the layer caches, as a watch or daemon does
+    cold = measure("get_chart_config:cold", rows, lambda _: get_chart_config(data, BENCH_LAYERS), clear_layer_cache, repeat)
+    warm = measure("get_chart_config:warm", rows, lambda _: get_chart_config(data, BENCH_LAYERS), repeat=repeat)
+
+    return [cold, warm]
+
+
+def _bench_figures(data: Dataset, repeat: int) -> List[BenchResult]:
+    from chasm.library.chart import build_figure, configure_chart_type
+    from chasm.library.decimate import decimate_series
+    from chasm.library.layer import get_chart_config
+    from chasm.library.svg import render_svg
+
+    rows = len(data)
+    results = []
+
+    for chart_type in CHART_TYPES:
+        config = get_chart_config(data, BENCH_LAYERS)
+        configure_chart_type(chart_type, config)
+
+        results.append(measure(f"decimate:{chart_type}", rows, lambda _: decimate_series(chart_type, data, config), repeat=repeat))
+
+        decimations = decimate_series(chart_type, data, config)
+        results.append(measure(f"build_figure:{chart_type}", rows, lambda _: build_figure(chart_type, data, config, decimations=decimations), repeat=repeat))
+        results.append(measure(f"render_svg:{chart_type}", rows, lambda _: render_svg(chart_type, data, config, decimations), repeat=repeat))
+
+    return results
+
+
+def _bench_exports(data: Dataset, repeat: int, formats: List[str]) -> List[BenchResult]:
+    from chasm.library.chart import build_figure, is_raster
+    from chasm.library.layer import get_chart_config
+    from chasm.library.render import warm_renderer, write_figure
+
+    rows = len(data)
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory, warm_renderer():
+        for output_format in formats:
+            path = os.path.join(directory, f"chart.{output_format}")
+            fig = build_figure("line", data, get_chart_config(data, BENCH_LAYERS), raster=is_raster(path))
+
+            # The first export of a format loads its part of plotly.js; keep that out of the timings
+            write_figure(fig, path)
+            results.append(measure(f"export:{output_format}", rows, lambda _: write_figure(fig, path), repeat=repeat))
+
+    return results
+
+
+def run_bench(sizes: List[int] = DEFAULT_SIZES, stages: List[str] = BENCH_STAGES, formats: List[str] = DEFAULT_EXPORT_FORMATS, repeat: int = 5, seed: int = 0, on_result: Callable[[BenchResult], None] = None) -> List[BenchResult]:
+    """
+    Benchmark each pipeline stage separately on synthetic data of every size
+    in sizes. Each measurement is the median of repeat runs.
+    """
+    results = []
+
+    def collect(stage_results: List[BenchResult]) -> None:
+        for result in stage_results:
+            results.append(result)
+
+            if on_result:
+                on_result(result)
+
+    for rows in sizes:
+        data = synthetic_data(rows, seed)
+
+        if "parse" in stages and rows <= ROW_PATH_MAX_ROWS:
+            collect(_bench_parse(data, repeat))
+
+        if "instructions" in stages:
+            collect(_bench_instructions(data, repeat))
+
+        if "config" in stages:
+            collect(_bench_config(data, repeat))
+
+        if "figure" in stages:
+            collect(_bench_figures(data, repeat))
+
+        if "export" in stages:
+            collect(_bench_exports(data, repeat, formats))
+
+    return results
+
+
+def to_baseline(results: List[BenchResult], repeat: int, seed: int) -> Dict[str, Any]:
+    # The environment is recorded so a comparison across machines is easy to spot
+    return {
+        "version": BASELINE_VERSION,
+        "chasm": __version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "results": {result.key: result.to_dict() for result in results},
+    }
+
+
+def write_baseline(baseline: Dict[str, Any], path: str) -> None:
+    if path == "-":
+        json.dump(baseline, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Baseline {path} has version {baseline.get('version')}, expected {BASELINE_VERSION}")
+
+    return baseline
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Comparison]:
+    """
+    Compare the median timings of two baselines. A stage regressed when it is
+    more than threshold (a fraction, 0.2 = 20%) slower than in baseline, and
+    improved when it is that much faster.
+    """
+    before, after = baseline["results"], current["results"]
+    comparisons = []
+
+    for key in list(before) + [key for key in after if key not in before]:
+        baseline_ms = before[key]["median_ms"] if key in before else None
+        current_ms = after[key]["median_ms"] if key in after else None
+
+        if baseline_ms is None:
+            status = "new"
+        elif current_ms is None:
+            status = "missing"
+        elif abs(current_ms - baseline_ms) < NOISE_FLOOR_MS:
+            status = "ok"
+        elif current_ms > baseline_ms * (1 + threshold):
+            status = "regression"
+        elif current_ms < baseline_ms * (1 - threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+
+        comparisons.append(Comparison(key=key, baseline_ms=baseline_ms, current_ms=current_ms, status=status))
+
+    return comparisons
@@ -0,0 +1,157 @@
+import os, json, shutil, hashlib, tempfile
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, List, Optional
+
+from chasm import __version__
+from chasm.library.config import ChartConfig, DEFAULT_CACHE_DIR
+from chasm.library.storage import NPY_SCHEMA_FILE
+
+if TYPE_CHECKING:
+    from chasm.library.mod import Mod
+
+
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+# Eviction frees the cache down to this fraction of max_bytes, so the next
+# few stores don't each trigger another scan
+EVICT_TO = 0.9
+
+_READ_BLOCK = 1024 * 1024
+
+
+def _hash_file(digest: Any, path: str) -> None:
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(_READ_BLOCK), b""):
+            digest.update(block)
+
+
+def _hash_data(digest: Any, raw_data: Any) -> None:
+    if isinstance(raw_data, str) and os.path.isdir(raw_data):
+        # Only what read_npy_dir loads: the .npy columns and their order
+        for name in sorted(os.listdir(raw_data)):
+            path = os.path.join(raw_data, name)
+
+            if (name.endswith(".npy") or name == NPY_SCHEMA_FILE) and os.path.isfile(path):
+                digest.update(name.encode())
+                _hash_file(digest, path)
+
+    elif isinstance(raw_data, str) and os.path.isfile(raw_data):
+        _hash_file(digest, raw_data)
+
+    else:
+        digest.update(str(raw_data).encode())
+
+
+class RenderCache:
+    """
+    Content-addressed store of rendered charts.
+
+    Entries are keyed by a hash of the chart type, the data content, the
+    resolved layer stack, the mod programs, the output format and the trace
+    backend (SVG or WebGL, which depends on every format rendered), so a hit
+    means the chart would render byte-identically. Hits are copied to the
+    output path (never linked, since a later render writing to that path
+    would otherwise overwrite the cached entry in place). The cache is bounded
+    to max_bytes and evicts the least recently used entries first. The size
+    is scanned from disk once and then tracked per store, so the directory is
+    only rescanned when an eviction is due.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.directory = os.path.join(directory or DEFAULT_CACHE_DIR, "renders")
+        self.max_bytes = max_bytes
+
+        # Bytes on disk as of the last scan plus everything stored since; None until scanned
+        self._bytes = None
+
+    def key(self, chart_type: str, raw_data: Any, config: ChartConfig, mods: List["Mod"], output_path: str, renderer: str = "plotly", raster: bool = False) -> Optional[str]:
+        """
+        Hash everything that determines the rendered output, where config is
+        the layer stack resolved before any data dependent keys are computed,
+        and raster is whether the render was raster only (see is_raster), which
+        decides between SVG and WebGL traces. Returns None when a mod is
+        non-deterministic, as such charts can't be cached.
+        """
+        instructions = [instruction for mod in mods for instruction in mod.instructions]
+
+        if not all(instruction.deterministic for instruction in instructions):
+            return None
+
+        digest = hashlib.sha256()
+
+        digest.update(json.dumps([__version__, chart_type, renderer, raster, os.path.splitext(output_path)[1].lower()]).encode())
+        digest.update(json.dumps(asdict(config), sort_keys=True, default=str).encode())
+        digest.update(json.dumps([[type(instruction).__name__, instruction.args] for instruction in instructions], sort_keys=True, default=str).encode())
+
+        _hash_data(digest, raw_data)
+
+        return digest.hexdigest()
+
+    def _entry(self, key: str, output_path: str) -> str:
+        return os.path.join(self.directory, f"{key}{os.path.splitext(output_path)[1].lower()}")
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        entry = self._entry(key, output_path)
+
+        # The entry's mtime doubles as its last-used time for eviction. Another
+        # process may evict the entry at any point, which is just a miss
+        try:
+            os.utime(entry)
+            shutil.copyfile(entry, output_path)
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def store(self, key: str, output_path: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Copy then rename so concurrent readers never see a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(handle)
+
+        try:
+            shutil.copyfile(output_path, temp_path)
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, self._entry(key, output_path))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        if self._bytes is None:
+            self.evict()
+            return
+
+        self._bytes += size
+
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Scan the cache and, if it is over max_bytes, remove the least recently used entries"""
+        entries = []
+
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+                total -= size
+
+        self._bytes = total
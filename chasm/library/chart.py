@@ -1,25 +1,185 @@
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import os
+import shutil
 
-from typing import Any, List
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
+from chasm.library.cache import RenderCache
 from chasm.library.data import parse_data_input
-from chasm.library.layer import get_chart_config
-from chasm.library.config import ChartConfig
+from chasm.library.decimate import Decimation, decimate_series, decimated
+from chasm.library.facet import facet_paths, partition
+from chasm.library.layer import get_chart_config, resolve_layers
+from chasm.library.layout import DEFAULT_LAYOUTS, LayoutCache, facet_axes, grid_layout
+from chasm.library.mod import get_mods
+from chasm.library.profile import stage
+from chasm.library.config import FACET_MODES, ChartConfig
+from chasm.library.dataset import Dataset
+from chasm.library.render import warm_renderer, write_figures
+from chasm.library.scheduler import RenderScheduler
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+
+# Formats kaleido rasterises; vector formats always keep SVG traces
+RASTER_FORMATS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def make_chart(chart_type: str, raw_data: Any, layer_paths: List[str], mod_paths: List[str], output_path: Union[str, List[str]], *, scheduler: RenderScheduler = None, cache: RenderCache = None, renderer: str = "plotly", validate: bool = False, layouts: LayoutCache = None, on_decimate: Callable[[Dict[str, Decimation]], None] = None) -> Optional[Union[dict, "go.Figure", List[Union[dict, "go.Figure"]]]]:
+    """
+    Render a chart to output_path and return its figure (None for the native
+    renderer or a cache hit). output_path may be a list of paths, e.g. one
+    per format: the figure is built once and exported to all of them. With
+    facet_key set in the layers, the data is split after the mods run: with
+    facet_mode subplots into a grid in the one output, with facet_mode files
+    into one output per partition (see facet_paths), in which case the list
+    of figures exported is returned.
+    """
+    output_paths = [output_path] if isinstance(output_path, str) else list(output_path)
+
+    with stage("make_chart", chart_type=chart_type, output=", ".join(output_paths), renderer=renderer):
+        return _make_chart(chart_type, raw_data, layer_paths, mod_paths, output_paths, scheduler, cache, renderer, validate, layouts, on_decimate)
+
+
+def _make_chart(chart_type: str, raw_data: Any, layer_paths: List[str], mod_paths: List[str], output_paths: List[str], scheduler: Optional[RenderScheduler], cache: Optional[RenderCache], renderer: str, validate: bool, layouts: Optional[LayoutCache], on_decimate: Optional[Callable[[Dict[str, Decimation]], None]]) -> Optional[Union[dict, "go.Figure", List[Union[dict, "go.Figure"]]]]:
+    with stage("load_mods"):
+        mods = get_mods(mod_paths)
+
+    keys = []
+    layered = resolve_layers(layer_paths)
+
+    # A cache hit copies the stored chart into place; no figure is built.
+    # Facets written to many files have no single output to cache.
+    if cache is not None and not (layered.facet_key is not None and layered.facet_mode == "files"):
+        with stage("cache_lookup"):
+            raster = all(is_raster(path) for path in output_paths)
+            keys = [cache.key(chart_type, raw_data, layered, mods, path, renderer, raster) for path in output_paths]
+            hit = all(key is not None and cache.fetch(key, path) for key, path in zip(keys, output_paths))
+
+        if hit:
+            return None
+
+    with stage("parse_data") as record:
+        data = parse_data_input(raw_data, mods)
+        record.rows = len(data)
 
-
-def make_chart(chart_type: str, raw_data: Any, layer_paths: List[str], mod_paths: List[str], output_path: str) -> go.Figure:
-    data = parse_data_input(raw_data, mod_paths)
     config = get_chart_config(data=data, layers=layer_paths)
+    configure_chart_type(chart_type, config)
+
+    fig, futures = render_chart(chart_type, data, config, output_paths, scheduler=scheduler, renderer=renderer, validate=validate, layouts=layouts, on_decimate=on_decimate)
+
+    for index, (key, path) in enumerate(zip(keys, output_paths)):
+        if key is None:
+            continue
+
+        if not futures:
+            with stage("cache_store"):
+                cache.store(key, path)
+        else:
+            def store_when_written(done, key=key, path=path):
+                if done.exception() is None:
+                    cache.store(key, path)
+
+            futures[index].add_done_callback(store_when_written)
+
+    return fig
+
+
+def render_chart(chart_type: str, data: Dataset, config: ChartConfig, output_paths: List[str], *, scheduler: RenderScheduler = None, renderer: str = "plotly", validate: bool = False, layouts: LayoutCache = None, on_decimate: Callable[[Dict[str, Decimation]], None] = None) -> Tuple[Optional[Union[dict, "go.Figure", List[Union[dict, "go.Figure"]]]], List[Future]]:
+    """
+    Render data, already put through its mods, with a resolved config: the
+    stages of make_chart after the config, faceting included. Returns the
+    figure (or figures) and, with a scheduler, the futures of its exports.
+    """
+    if config.facet_key is None:
+        return _render_chart(chart_type, data, config, output_paths, scheduler, renderer, validate, layouts, on_decimate)
+
+    if config.facet_mode not in FACET_MODES:
+        raise ValueError(f"Unknown facet_mode '{config.facet_mode}', expected one of {', '.join(FACET_MODES)}")
+
+    if renderer == "native" and config.facet_mode == "subplots":
+        raise ValueError("The native renderer can't lay facets out as subplots; use facet_mode: files")
+
+    # Partitioned once; every partition shares the config resolved above
+    with stage("partition", rows=len(data)):
+        partitions = partition(data, config.facet_key)
+
+    if config.facet_mode == "files":
+        return _render_facet_files(chart_type, partitions, config, output_paths, scheduler, renderer, validate, layouts, on_decimate), []
+
+    return _render_chart(chart_type, data, config, output_paths, scheduler, renderer, validate, layouts, on_decimate, partitions)
+
+
+def _render_chart(chart_type: str, data: Dataset, config: ChartConfig, output_paths: List[str], scheduler: Optional[RenderScheduler], renderer: str, validate: bool, layouts: Optional[LayoutCache], on_decimate: Optional[Callable[[Dict[str, Decimation]], None]], partitions: List[Tuple[Any, Dataset]] = None) -> Tuple[Optional[Union[dict, "go.Figure"]], List[Future]]:
+    with stage("decimate", rows=len(data)):
+        if partitions is None:
+            decimations = decimate_series(chart_type, data, config)
+        else:
+            facet_decimations = [decimate_series(chart_type, part, config) for _, part in partitions]
+
+    if on_decimate:
+        for found in ([decimations] if partitions is None else facet_decimations):
+            on_decimate(found)
+
+    # The native renderer writes SVG directly, so there is no figure to export
+    if renderer == "native":
+        from chasm.library.svg import write_svg
+
+        for path in output_paths:
+            if not path.lower().endswith(".svg"):
+                raise ValueError(f"The native renderer only writes SVG, not {path}")
+
+        # Rendered once; further outputs are copies
+        with stage("render_svg"):
+            write_svg(chart_type, data, config, output_paths[0], decimations)
+
+            for path in output_paths[1:]:
+                shutil.copyfile(output_paths[0], path)
+
+        return None, []
+
+    # WebGL traces only export well to raster formats, so they're kept for charts written to nothing else
+    raster = all(is_raster(path) for path in output_paths)
+
+    with stage("build_figure"):
+        if partitions is None:
+            fig = build_figure(chart_type, data, config, validate, layouts, decimations, raster)
+        else:
+            fig = build_facet_figure(chart_type, partitions, config, validate, layouts, facet_decimations, raster)
+
+    # With a scheduler this only times the hand-off; the exports run in workers
+    with stage("write_image" if scheduler is None else "submit_export", outputs=len(output_paths)):
+        futures = write_figures(fig, output_paths, scheduler)
+
+    return fig, futures
+
+
+def _render_facet_files(chart_type: str, partitions: List[Tuple[Any, Dataset]], config: ChartConfig, output_paths: List[str], scheduler: Optional[RenderScheduler], renderer: str, validate: bool, layouts: Optional[LayoutCache], on_decimate: Optional[Callable[[Dict[str, Decimation]], None]]) -> List[Union[dict, "go.Figure"]]:
+    figs = []
+    labels = [label for label, _ in partitions]
+
+    # Every output path fans out into one file per partition
+    paths = list(zip(*(facet_paths(path, labels) for path in output_paths)))
+
+    # Exports made here share one renderer session across every partition
+    session = warm_renderer() if renderer != "native" and scheduler is None else nullcontext()
+
+    with session:
+        for (label, part), facet_outputs in zip(partitions, paths):
+            with stage("facet", facet=str(label), output=", ".join(facet_outputs), rows=len(part)):
+                fig, _ = _render_chart(chart_type, part, config, list(facet_outputs), scheduler, renderer, validate, layouts, on_decimate)
+
+            if fig is not None:
+                figs.append(fig)
+
+    return figs
+
+
+def configure_chart_type(chart_type: str, config: ChartConfig) -> None:
+    if chart_type == "stackedbar":
+        config.chart_layout_barmode = "stack"
 
-    # Bar Type Chart
-    if chart_type in ("bar", "stackedbar"):
-        if chart_type == "stackedbar":
-            config.chart_layout_barmode = "stack"
-            
-        return make_bar(data, config, output_path)
-    
-    # Scatter Type Charts
     if chart_type in ("scatter", "scatter+line", "line"):
         config.scatter_mode = "markers"
 
@@ -29,140 +189,159 @@ def make_chart(chart_type: str, raw_data: Any, layer_paths: List[str], mod_paths
         elif chart_type == "scatter+line":
             config.scatter_mode = "lines+markers"
 
-        return make_scatter(data, config, output_path)
-
-
-def make_figure(config: ChartConfig) -> go.Figure:
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-
-    fig.update_layout(
-        title_text=config.chart_title_text,
-        title_font_weight=config.chart_title_font_weight,
-        title_font_size=config.chart_title_font_size,
-        title_pad=dict(
-            l=config.chart_title_pad_l,
-            r=config.chart_title_pad_r,
-            t=config.chart_title_pad_t,
-            b=config.chart_title_pad_b
-        ),
-        title_automargin=config.chart_title_automargin,
-        paper_bgcolor=config.chart_paper_bgcolor,
-        plot_bgcolor=config.chart_plot_bgcolor,
-        colorway=config.chart_colorway,
-        barmode=config.chart_layout_barmode,
-        showlegend=config.chart_layout_showlegend,
-        margin=dict(
-            l=config.chart_margin_l,
-            r=config.chart_margin_r,
-            t=config.chart_margin_t,
-            b=config.chart_margin_b
-        )
-    )
-
-    fig.update_xaxes(
-        title=config.chart_xaxis_title,
-        visible=config.chart_xaxis_visible,
-        showticklabels=config.chart_xaxis_showticklabels,
-        showgrid=config.chart_xaxis_showgrid,
-        zeroline=config.chart_xaxis_zeroline,
-        automargin=config.chart_xaxis_automargin,
-        gridcolor=config.chart_xaxis_gridcolor,
-        ticklabelstandoff=config.chart_yaxis_ticklabelstandoff
-    )
-
-    fig.update_yaxes(
-        title=config.chart_yaxis_title,
-        visible=config.chart_yaxis_visible,
-        showticklabels=config.chart_yaxis_showticklabels,
-        showgrid=config.chart_yaxis_showgrid,
-        zeroline=config.chart_yaxis_zeroline,
-        automargin=config.chart_yaxis_automargin,
-        gridcolor=config.chart_yaxis_gridcolor,
-        ticklabelstandoff=config.chart_yaxis_ticklabelstandoff
-    )
+
+def build_figure(chart_type: str, data: Dataset, config: ChartConfig, validate: bool = False, layouts: LayoutCache = None, decimations: Dict[str, Decimation] = None, raster: bool = False) -> Union[dict, "go.Figure"]:
+    """
+    Build a chart as a plain plotly figure spec. Specs skip plotly's property
+    validators and array copies, which otherwise cost as much as the export
+    on charts with many series. With validate, the spec is checked by building
+    a go.Figure from it, which raises on any invalid property. The layout is
+    cloned from layouts (by default, this process's shared LayoutCache).
+    Series are drawn from decimations, which are computed if not given.
+    For raster outputs, large scatter series switch to WebGL (see webgl_threshold).
+    """
+    configure_chart_type(chart_type, config)
+
+    if decimations is None:
+        decimations = decimate_series(chart_type, data, config)
+
+    # Bar Type Chart
+    if chart_type in ("bar", "stackedbar"):
+        fig = make_bar(data, config, layouts, decimations, raster)
+    
+    # Scatter Type Charts
+    elif chart_type in ("scatter", "scatter+line", "line"):
+        fig = make_scatter(data, config, layouts, decimations, raster)
+
+    if validate:
+        import plotly.graph_objects as go
+        return go.Figure(fig)
 
     return fig
 
 
-def make_scatter(data: List[dict], config: ChartConfig, output_path: str) -> go.Figure:
-    fig = make_figure(config)
+def build_facet_figure(chart_type: str, partitions: List[Tuple[Any, Dataset]], config: ChartConfig, validate: bool = False, layouts: LayoutCache = None, decimations: List[Dict[str, Decimation]] = None, raster: bool = False) -> Union[dict, "go.Figure"]:
+    """
+    Build one figure laying partitions out as small multiples, a subplot per
+    partition titled with its facet value. Each series keeps one colour and
+    one legend entry across all the subplots.
+    """
+    fig = make_figure(config, layouts, facets=[str(label) for label, _ in partitions])
+    colorway = config.chart_colorway
 
-    for idx, y_key in enumerate(config.data_ykeys):
-        x_key = config.data_xkey
+    for index, (_, data) in enumerate(partitions):
+        x_axis, y_axis, y2_axis = facet_axes(index)
+        cell = build_figure(chart_type, data, config, layouts=layouts, decimations=decimations[index] if decimations else None, raster=raster)
 
-        if config.orientation == 'v':
-            x_data = [d[x_key] for d in data]
-            y_data = [d[y_key] for d in data]
-        elif config.orientation == 'h':
-            y_data = [d[x_key] for d in data]
-            x_data = [d[y_key] for d in data]
+        for number, trace in enumerate(cell["data"]):
+            color = colorway[number % len(colorway)]
 
-        if y_key in config.data_ykeys:
-            trace = go.Scatter(
-                x=x_data, 
-                y=y_data, 
-                marker_line_width=config.marker_line_width, 
-                mode=config.get_config(y_key, "scatter_mode"), 
-                orientation=config.orientation,
-                name=config.data_ykey_name_lookup.get(y_key, f"Series {y_key}") 
-            )
+            trace["xaxis"] = x_axis
+            trace["yaxis"] = y2_axis if trace["yaxis"] == "y2" else y_axis
+            trace["legendgroup"] = trace["name"]
+            trace["showlegend"] = index == 0
+            trace["marker"]["color"] = color
+
+            if trace["type"] != "bar":
+                trace["line"] = {"color": color}
 
-            fig.add_trace(trace, secondary_y=False)
+            fig["data"].append(trace)
 
-    # TODO: Move out of this function
-    fig.write_image(f"{output_path}")
+    if validate:
+        import plotly.graph_objects as go
+        return go.Figure(fig)
 
     return fig
 
 
-def make_bar(data: List[dict], config: ChartConfig, output_path: str) -> go.Figure:
-    fig = make_figure(config)
+def is_raster(output_path: str) -> bool:
+    return os.path.splitext(output_path)[1].lower() in RASTER_FORMATS
 
-    for idx, y_key in enumerate(config.data_ykeys + config.data_skeys + config.data_yskeys):
-        x_key = config.data_xkey
 
-        # TODO: This has become very not DRY -- needs a good refactor
-        if config.orientation == 'v':
-            x_data = [d[x_key] for d in data]
-            y_data = [d[y_key] for d in data]
-        elif config.orientation == 'h':
-            y_data = [d[x_key] for d in data]
-            x_data = [d[y_key] for d in data]
+def scatter_type(config: ChartConfig, key: str, points: int, raster: bool) -> str:
+    # Past a few thousand points WebGL draws far faster than SVG, but its output is a bitmap
+    threshold = config.get_config(key, "webgl_threshold")
 
-        if y_key in config.data_ykeys:
-            trace = go.Bar(
-                x=x_data, 
-                y=y_data,
-                marker_line_width=config.marker_line_width,
-                orientation=config.orientation,
-                name=config.data_ykey_name_lookup.get(y_key, f"Series {y_key}")
-            )
+    if raster and threshold and points > threshold:
+        return "scattergl"
 
-            fig.add_trace(trace, secondary_y=False)
+    return "scatter"
 
-        elif y_key in config.data_yskeys:
-            trace = go.Scatter(
-                x=x_data, 
-                y=y_data,
-                marker_line_width=config.marker_line_width,
-                orientation=config.orientation,
-                name=config.data_ykey_name_lookup.get(y_key, f"Series {y_key}")
-            )
 
-            fig.add_trace(trace, secondary_y=False)
+def make_figure(config: ChartConfig, layouts: LayoutCache = None, facets: List[str] = None) -> dict:
+    layout = (layouts or DEFAULT_LAYOUTS).get(config)
 
-        elif y_key in config.data_skeys:
-            trace = go.Scatter(
-                x=x_data, 
-                y=y_data,
-                marker_line_width=config.marker_line_width,
-                orientation=config.orientation,
-                name=config.data_ykey_name_lookup.get(y_key, f"Series {y_key}")
-            )
+    if facets:
+        layout = grid_layout(layout, facets, config.facet_columns)
+
+    return {"data": [], "layout": layout}
+
+
+def _trace(trace_type: str, x_column: Any, y_column: Any, name: str, config: ChartConfig, decimation: Decimation = None, secondary_y: bool = False, mode: str = None) -> dict:
+    x_column, y_column = decimated(x_column, decimation), decimated(y_column, decimation)
+
+    if config.orientation == 'h':
+        x_column, y_column = y_column, x_column
+
+    trace = {
+        "type": trace_type,
+        "x": x_column,
+        "y": y_column,
+        "marker": {"line": {"width": config.marker_line_width}},
+        "orientation": config.orientation,
+        "name": name,
+        "xaxis": "x",
+        "yaxis": "y2" if secondary_y else "y",
+    }
+
+    # WebGL traces have no orientation; x and y are already swapped above
+    if trace_type == "scattergl":
+        del trace["orientation"]
+
+    if mode is not None:
+        trace["mode"] = mode
 
-            fig.add_trace(trace, secondary_y=True)
+    return trace
 
-    # TODO: Move out of this function
-    fig.write_image(f"{output_path}")
 
-    return fig
\ No newline at end of file
+def _points(data: Dataset, decimation: Optional[Decimation]) -> int:
+    return len(data) if decimation is None else decimation.kept
+
+
+def make_scatter(data: Dataset, config: ChartConfig, layouts: LayoutCache = None, decimations: Dict[str, Decimation] = None, raster: bool = False) -> dict:
+    fig = make_figure(config, layouts)
+
+    # Columns are shared across every series rather than re-extracted per key
+    x_column = data[config.data_xkey]
+
+    decimations = decimations or {}
+
+    for y_key in config.data_ykeys:
+        name = config.data_ykey_name_lookup.get(y_key, f"Series {y_key}")
+        trace_type = scatter_type(config, y_key, _points(data, decimations.get(y_key)), raster)
+        fig["data"].append(_trace(trace_type, x_column, data[y_key], name, config, decimations.get(y_key), mode=config.get_config(y_key, "scatter_mode")))
+
+    return fig
+
+
+def make_bar(data: Dataset, config: ChartConfig, layouts: LayoutCache = None, decimations: Dict[str, Decimation] = None, raster: bool = False) -> dict:
+    fig = make_figure(config, layouts)
+
+    x_column = data[config.data_xkey]
+    decimations = decimations or {}
+
+    for y_key in config.data_ykeys + config.data_skeys + config.data_yskeys:
+        name = config.data_ykey_name_lookup.get(y_key, f"Series {y_key}")
+
+        if y_key in config.data_ykeys:
+            fig["data"].append(_trace("bar", x_column, data[y_key], name, config, decimations.get(y_key)))
+
+        elif y_key in config.data_yskeys:
+            trace_type = scatter_type(config, y_key, _points(data, decimations.get(y_key)), raster)
+            fig["data"].append(_trace(trace_type, x_column, data[y_key], name, config, decimations.get(y_key)))
+
+        elif y_key in config.data_skeys:
+            trace_type = scatter_type(config, y_key, _points(data, decimations.get(y_key)), raster)
+            fig["data"].append(_trace(trace_type, x_column, data[y_key], name, config, decimations.get(y_key), secondary_y=True))
+
+    return fig
@@ -1,8 +1,27 @@
+import os
 import re
 from typing import List, Dict
 from dataclasses import dataclass, field
 
 
+CHART_TYPES = ("bar", "stackedbar", "scatter", "line", "scatter+line")
+
+# plotly exports through kaleido; native writes SVG directly (see svg.py)
+RENDERERS = ("plotly", "native")
+
+# Formats a chart can be exported to, named by the output path's extension
+OUTPUT_FORMATS = ("svg", "png", "jpeg", "webp", "pdf")
+
+# Facets are laid out as subplots of one chart, or written as one chart file each
+FACET_MODES = ("subplots", "files")
+
+# Pipeline stages `chasm bench` can time (see bench.py)
+BENCH_STAGES = ("parse", "instructions", "config", "figure", "export")
+
+# Root for everything ChAsm persists between runs (renders, compiled mods, ...)
+DEFAULT_CACHE_DIR = os.environ.get("CHASM_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "chasm")
+
+
 # TODO: Explore pydantic for this class (for many reasons)
 @dataclass
 class ChartConfig:
@@ -76,6 +95,18 @@ class ChartConfig:
 
     orientation: str =                  "v"
 
+    # Series longer than this are decimated before drawing; off unless set (0 or null draws every point)
+    decimate_max_points: int =          None
+    decimate_method: str =              "auto" # auto, lttb, minmax or none
+
+    # Scatter series drawing more points than this use WebGL in raster outputs (0 or null never do)
+    webgl_threshold: int =              10000
+
+    # Small multiples: one chart per distinct value of facet_key, once mods have run
+    facet_key: str =                    None
+    facet_mode: str =                   "subplots" # subplots or files
+    facet_columns: int =                3 # Subplots per row
+
     #
     # Index Specific Configs
     #   Anything inside of this dictionary will override specific settings for specific keys.
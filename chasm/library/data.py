@@ -1,7 +1,25 @@
-import os, json
-from typing import Any, List, Dict
+import os, json, csv
+import numpy as np
+from itertools import takewhile
+from typing import TYPE_CHECKING, Any, Iterator, List, Dict, Optional, Union
 from dataclasses import dataclass
-from chasm.library.mod import Mod, get_mods
+from chasm.library.dataset import Dataset, to_column
+from chasm.library.engine import run_instructions
+from chasm.library.profile import stage
+from chasm.library.storage import get_binary_format, read_binary
+
+if TYPE_CHECKING:
+    from chasm.library.mod import Instruction, Mod
+
+
+# File extensions that are read incrementally rather than loaded whole
+STREAM_FORMATS = {
+    ".ndjson":  "ndjson",
+    ".jsonl":   "ndjson",
+    ".csv":     "csv",
+}
+
+DEFAULT_CHUNK_SIZE = 65536
 
 
 def parse_data_input_string(input_string: str) -> List[Dict[str, Any]]:
@@ -24,7 +42,7 @@ def parse_data_input_string(input_string: str) -> List[Dict[str, Any]]:
     # Check if the input string provided points at a valid path
     if os.path.isfile(input_string):
         try:
-            with open(input_string, 'r', encoding='utf-8') as file:
+            with open(input_string, 'r', encoding='utf-8') as file, stage("json_parse"):
                 data = json.load(file)
 
         except FileNotFoundError:
@@ -35,7 +53,8 @@ def parse_data_input_string(input_string: str) -> List[Dict[str, Any]]:
     else:
         # If it's not a path then we assume it's a JSON string
         try:
-            data = json.loads(input_string)
+            with stage("json_parse"):
+                data = json.loads(input_string)
 
         except json.JSONDecodeError as e:
             raise json.JSONDecodeError(f"Invalid JSON string: {e.msg}", e.doc, e.pos)
@@ -48,35 +67,211 @@ def parse_data_input_string(input_string: str) -> List[Dict[str, Any]]:
     if len(data) == 0:
         return []
     
-    # Further, the list must contain only dictionary elements
-    for i, item in enumerate(data):
-        if not isinstance(item, dict):
-            raise ValueError(f"Item at index {i} is not a dictionary")
-    
-    # We expect the data to be uniform, where ever element contains the same
-    # keys. This may be something we change in the future, but for now we
-    # assume uniform data structures.
-    if len(data) > 0:
-        first_keys = set(data[0].keys())
-
-        for i, item in enumerate(data[1:], 1):
-            current_keys = set(item.keys())
-            
-            if current_keys != first_keys:
-                raise ValueError(f"Dictionary at index {i} has different keys. "
-                               f"Expected: {sorted(first_keys)}, "
-                               f"Got: {sorted(current_keys)}")
+    # Further, the list must contain only dictionary elements. We also expect
+    # the data to be uniform, where ever element contains the same keys. This
+    # may be something we change in the future, but for now we assume uniform
+    # data structures. Both are checked in a single pass.
+    first_keys = None
+
+    with stage("validate_keys", rows=len(data)):
+        for i, item in enumerate(data):
+            first_keys = _check_item(i, item, first_keys)
     
     return data
 
 
-def parse_data_input(data: Any, mod_paths: List[Mod]) -> List[dict]:
-    data_list = parse_data_input_string(data)
+def _check_item(index: int, item: Any, first_keys: Optional[set]) -> set:
+    """Validate one item against the keys of the first item, returning those keys"""
+    if not isinstance(item, dict):
+        raise ValueError(f"Item at index {index} is not a dictionary")
+
+    if first_keys is None:
+        return set(item.keys())
+
+    # dict key views compare as sets, so no per-item set needs to be built
+    if item.keys() != first_keys:
+        raise ValueError(f"Dictionary at index {index} has different keys. "
+                       f"Expected: {sorted(first_keys)}, "
+                       f"Got: {sorted(item.keys())}")
+
+    return first_keys
+
+
+def get_stream_format(input_string: Any) -> Optional[str]:
+    if not isinstance(input_string, str) or not os.path.isfile(input_string):
+        return None
+
+    return STREAM_FORMATS.get(os.path.splitext(input_string)[1].lower())
+
+
+def read_ndjson_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dataset]:
+    """
+    Read a newline delimited JSON file as a sequence of columnar chunks.
+
+    Each line is parsed and validated against the first line's keys as it is
+    read, so neither the raw text nor the full list of rows is ever held in
+    memory, only one chunk of rows at a time.
+
+    Raises:
+        json.JSONDecodeError: If a line is not valid JSON
+        ValueError: If a line is not an object or its keys don't match
+    """
+    first_keys = None
+    chunk = []
+    index = 0
+
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(f"Invalid JSON on line {line_number} of {path}: {e.msg}", e.doc, e.pos)
+
+            first_keys = _check_item(index, item, first_keys)
+            chunk.append(item)
+            index += 1
+
+            if len(chunk) >= chunk_size:
+                yield Dataset.from_records(chunk)
+                chunk = []
+
+    if chunk:
+        yield Dataset.from_records(chunk)
+
+
+def _parse_csv_value(value: str) -> Any:
+    if value == "":
+        return None
+
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+
+    return value
+
+
+def _parse_csv_column(values: List[str]) -> np.ndarray:
+    # Whole-column conversion covers the common all-numeric case in C; only
+    # columns that mix types or hold text fall back to per-value guessing
+    raw = np.array(values)
+
+    for dtype in (np.int64, np.float64):
+        try:
+            return raw.astype(dtype)
+        except (ValueError, OverflowError):
+            pass
+
+    return to_column([_parse_csv_value(value) for value in values])
+
+
+def read_csv_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dataset]:
+    """
+    Read a CSV file with a header row as a sequence of columnar chunks. Every
+    row is checked against the header as it is read. Numbers are converted
+    to int or float and empty cells become None.
+
+    Raises:
+        ValueError: If the header repeats a column or a row has the wrong number of fields
+    """
+    with open(path, 'r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+
+        if header is None:
+            return
+
+        if len(set(header)) != len(header):
+            raise ValueError(f"CSV header of {path} contains duplicate columns: {header}")
+
+        rows = []
+
+        for index, row in enumerate(reader):
+            if not row:
+                continue
+
+            if len(row) != len(header):
+                raise ValueError(f"Row at index {index} has {len(row)} fields. "
+                               f"Expected: {len(header)} ({header})")
+
+            rows.append(row)
+
+            if len(rows) >= chunk_size:
+                yield _csv_chunk(header, rows)
+                rows = []
+
+        if rows:
+            yield _csv_chunk(header, rows)
+
+
+def _csv_chunk(header: List[str], rows: List[List[str]]) -> Dataset:
+    return Dataset({key: _parse_csv_column(list(values)) for key, values in zip(header, zip(*rows))})
+
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dataset]:
+    if get_stream_format(path) == "csv":
+        return read_csv_chunks(path, chunk_size)
+
+    return read_ndjson_chunks(path, chunk_size)
+
+
+def load_instructions(mod_paths: List[Union[str, "Mod"]]) -> List["Instruction"]:
+    if not mod_paths:
+        return []
+
+    # The ISA is built on pydantic, so it is only imported when there are mods
+    from chasm.library.mod import get_mods
+    from chasm.library.optimize import optimize
 
-    # Put through modulators
     mods = get_mods(mod_paths)
 
-    for mod in mods:
-        mod.process(data_list)
+    # Optimize across every mod file at once, so folding can span files
+    return optimize([instruction for mod in mods for instruction in mod.instructions])
+
+
+def read_data_input(data: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dataset:
+    """Read data input (see parse_data_input) into columns, without running any mods"""
+    if get_binary_format(data):
+        # Binary columnar inputs are already columns; open them memory-mapped
+        with stage("read_binary") as record:
+            dataset = read_binary(data)
+            record.rows = len(dataset)
+    elif get_stream_format(data):
+        with stage("read_stream") as record:
+            dataset = Dataset.concat(list(read_chunks(data, chunk_size)))
+            record.rows = len(dataset)
+    else:
+        records = parse_data_input_string(data)
+
+        # Convert to columns once at ingest; everything downstream reads columns
+        with stage("to_columns", rows=len(records)):
+            dataset = Dataset.from_records(records)
+
+    return dataset
+
+
+def parse_data_input(data: Any, mod_paths: List[Union[str, "Mod"]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dataset:
+    # Put through modulators
+    with stage("optimize_mods"):
+        instructions = load_instructions(mod_paths)
+
+    if get_stream_format(data):
+        # Row-local instructions at the head of the pipeline are applied to each
+        # chunk as it streams in, before the chunks are stacked into one dataset
+        head = list(takewhile(lambda instruction: instruction.rowwise, instructions))
+
+        with stage("read_stream") as record:
+            chunks = [run_instructions(head, chunk) for chunk in read_chunks(data, chunk_size)]
+            dataset = Dataset.concat(chunks)
+            record.rows = len(dataset)
+
+        instructions = instructions[len(head):]
+    else:
+        dataset = read_data_input(data, chunk_size)
 
-    return data_list
+    with stage("run_mods", rows=len(dataset)):
+        return run_instructions(instructions, dataset)
@@ -0,0 +1,104 @@
+import numpy as np
+from typing import Any, Dict, List
+from dataclasses import dataclass, field
+
+
+def to_column(values: List[Any]) -> np.ndarray:
+    """
+    Convert a list of values into a numpy column, picking the tightest dtype
+    that keeps every value unchanged. Integer and float data get native
+    numeric arrays, anything else (strings, bools, mixed) is stored as objects.
+    """
+    if all(type(value) is int for value in values):
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+
+    elif all(type(value) in (int, float) for value in values):
+        return np.array(values, dtype=np.float64)
+
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+
+    return column
+
+
+def to_float_column(column: np.ndarray) -> np.ndarray:
+    """
+    Read a column as float64 for plotting, with NaN wherever a value is
+    missing or not a number.
+    """
+    if column.dtype.kind in "iufb":
+        return column.astype(float)
+
+    return np.array([float(v) if type(v) in (int, float) else np.nan for v in column], dtype=float)
+
+
+@dataclass
+class Dataset:
+    """
+    Columnar representation of a uniform list of dictionaries, keyed by column
+    name. Column order follows the key order of the source data so key
+    matching in ChartConfig.compute_keys behaves exactly as it does on dicts.
+    """
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "Dataset":
+        if not records:
+            return cls()
+
+        # Mods may leave rows with differing keys (e.g. appending to existing
+        # data), so take the union of keys in first-seen order and fill gaps
+        # with None, which plotly draws as a gap in the series
+        keys = dict.fromkeys(key for record in records for key in record)
+
+        return cls({key: to_column([record.get(key) for record in records]) for key in keys})
+
+    @classmethod
+    def concat(cls, datasets: List["Dataset"]) -> "Dataset":
+        """
+        Stack datasets row-wise. Columns missing from some of the inputs are
+        filled with None, matching how from_records treats non-uniform rows.
+        """
+        datasets = [dataset for dataset in datasets if len(dataset)]
+
+        if not datasets:
+            return cls()
+
+        keys = dict.fromkeys(key for dataset in datasets for key in dataset.keys())
+        columns = {}
+
+        for key in keys:
+            parts = [dataset[key] if key in dataset else np.full(len(dataset), None, dtype=object) for dataset in datasets]
+            columns[key] = np.concatenate(parts)
+
+        return cls(columns)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        keys = self.keys()
+        values = [self.columns[key].tolist() for key in keys]
+
+        return [dict(zip(keys, row)) for row in zip(*values)]
+
+    def keys(self) -> List[str]:
+        return list(self.columns.keys())
+
+    def __len__(self) -> int:
+        for column in self.columns.values():
+            return len(column)
+
+        return 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.columns
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.columns[key]
+
+    def __setitem__(self, key: str, column: np.ndarray) -> None:
+        if self.columns and len(column) != len(self):
+            raise ValueError(f"Column {key} has {len(column)} rows, expected {len(self)}")
+
+        self.columns[key] = column
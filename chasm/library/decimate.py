@@ -0,0 +1,184 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from chasm.library.config import ChartConfig
+from chasm.library.dataset import Dataset, to_float_column
+
+
+DECIMATE_METHODS = ("auto", "lttb", "minmax", "none")
+
+BAR_CHART_TYPES = ("bar", "stackedbar")
+
+
+@dataclass
+class Decimation:
+    """
+    The points kept for one series. index selects the kept rows, in order,
+    or is None when the series fit its budget and was left whole.
+    """
+    key: str
+    method: str
+    total: int
+    index: Optional[np.ndarray] = None
+
+    @property
+    def kept(self) -> int:
+        return self.total if self.index is None else len(self.index)
+
+    @property
+    def dropped(self) -> int:
+        return self.total - self.kept
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keep the first and last points, and from
+    each of threshold - 2 equal buckets in between the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average. Each point is visited a constant number of times, so this is
+    O(n); the per bucket work is vectorised. Missing y values are only kept
+    when a whole bucket is missing, which preserves gaps in lines.
+    """
+    n = len(y)
+
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    filled = np.nan_to_num(y)
+    missing = np.isnan(y)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    index = np.empty(threshold, dtype=np.int64)
+    index[0], index[-1] = 0, n - 1
+
+    a = 0
+
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # The next bucket's average, or the last point for the final bucket
+        next_start, next_end = end, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = filled[next_start:next_end].mean()
+
+        areas = np.abs((x[a] - avg_x) * (filled[start:end] - filled[a]) - (x[a] - x[start:end]) * (avg_y - filled[a]))
+        areas[missing[start:end] | np.isnan(areas)] = -1.0
+
+        a = start + int(np.argmax(areas))
+        index[i + 1] = a
+
+    return index
+
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Split the series into threshold // 2 equal buckets and keep each bucket's
+    minimum and maximum, so no peak or trough disappears. Fully vectorised
+    and O(n).
+    """
+    n = len(y)
+    buckets = max(threshold // 2, 1)
+
+    if threshold >= n:
+        return np.arange(n)
+
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    # Missing values never win a bucket unless it has nothing else
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+
+    index = np.unique(np.concatenate([lows, highs]))
+
+    return index[index < n]
+
+
+def require_x_column(data: Dataset, config: ChartConfig) -> np.ndarray:
+    """Return the x column, raising a ValueError when the data is empty or lacks it"""
+    if not len(data):
+        raise ValueError("There is no data to chart")
+
+    if config.data_xkey not in data:
+        raise ValueError(f"The data has no x column '{config.data_xkey}'")
+
+    return data[config.data_xkey]
+
+
+def decimate_series(chart_type: str, data: Dataset, config: ChartConfig) -> Dict[str, Decimation]:
+    """
+    Pick the points to draw for every series of a chart, under the point
+    budget in decimate_max_points (overridable per series through isc; 0 or
+    None, the default, draws everything). The "auto" method uses LTTB for
+    scatter and line traces and min/max bucketing for bars. Stacked bars keep
+    the union of their series' points, so every stack stays complete. Bars
+    over a categorical x axis are never decimated: every bar is a category.
+    """
+    x_column = require_x_column(data, config)
+    numeric_x = x_column.dtype.kind in "iuf"
+
+    if numeric_x:
+        x = x_column.astype(float)
+    else:
+        x = np.arange(len(x_column), dtype=float)
+
+    bar_chart = chart_type in BAR_CHART_TYPES
+    keys = config.data_ykeys + config.data_skeys + config.data_yskeys if bar_chart else config.data_ykeys
+
+    decimations = {}
+
+    for key in keys:
+        budget = config.get_config(key, "decimate_max_points")
+        method = config.get_config(key, "decimate_method")
+        bar = bar_chart and key in config.data_ykeys
+
+        if method not in DECIMATE_METHODS:
+            raise ValueError(f"Unknown decimate_method '{method}' for series {key}")
+
+        if method == "auto":
+            method = "minmax" if bar else "lttb"
+
+        # Dropping a bar drops its category from the axis, which loses data rather than detail
+        if bar and not numeric_x:
+            method = "none"
+
+        decimation = Decimation(key=key, method=method, total=len(data))
+
+        if method != "none" and budget and len(data) > budget:
+            y = to_float_column(data[key])
+
+            if method == "lttb":
+                decimation.index = lttb_indices(x, y, budget)
+            else:
+                decimation.index = minmax_indices(y, budget)
+
+        decimations[key] = decimation
+
+    if bar_chart and config.chart_layout_barmode in ("stack", "relative"):
+        bars = [decimations[key] for key in config.data_ykeys if key in decimations]
+
+        if any(d.index is not None for d in bars):
+            union = np.unique(np.concatenate([d.index if d.index is not None else np.arange(d.total) for d in bars]))
+
+            for d in bars:
+                d.index = union
+
+    return decimations
+
+
+def decimated(column: np.ndarray, decimation: Optional[Decimation]) -> np.ndarray:
+    if decimation is None or decimation.index is None:
+        return column
+
+    return column[decimation.index]
+
+
+def describe_decimations(decimations: Dict[str, Decimation]) -> List[str]:
+    return [
+        f"{d.key}: kept {d.kept} of {d.total} points ({d.method}, dropped {d.dropped})"
+        for d in decimations.values() if d.dropped
+    ]
@@ -0,0 +1,29 @@
+from typing import TYPE_CHECKING, List
+from chasm.library.dataset import Dataset
+from chasm.library.profile import stage
+
+if TYPE_CHECKING:
+    from chasm.library.mod import Instruction
+
+
+def run_instructions(instructions: List["Instruction"], data: Dataset) -> Dataset:
+    # Vectorized instructions run on whole columns. Runs of instructions
+    # without a columnar implementation share a single conversion to rows.
+    records = None
+
+    for instruction in instructions:
+        if instruction.vectorized:
+            if records is not None:
+                data = Dataset.from_records(records)
+                records = None
+
+            with stage(f"instruction:{type(instruction).__name__}", rows=len(data), path="columns", args=instruction.args):
+                data = instruction.process_columns(data)
+        else:
+            if records is None:
+                records = data.to_records()
+
+            with stage(f"instruction:{type(instruction).__name__}", rows=len(records), path="rows", args=instruction.args):
+                records = instruction.process(records)
+
+    return data if records is None else Dataset.from_records(records)
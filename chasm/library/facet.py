@@ -0,0 +1,66 @@
+import os, re
+import numpy as np
+from typing import Any, List, Tuple
+
+from chasm.library.aggregate import group_codes
+from chasm.library.dataset import Dataset
+
+
+def partition(data: Dataset, key: str) -> List[Tuple[Any, Dataset]]:
+    """
+    Split data into one dataset per distinct value of key, in order of first
+    appearance, each keeping its rows in their original order. Rows are
+    numbered by group in one pass and gathered with a single stable sort,
+    rather than filtering the whole dataset once per group.
+
+    Raises:
+        ValueError: If data has no key column
+    """
+    if key not in data:
+        raise ValueError(f"Can't facet on '{key}': the data has no such key (keys: {', '.join(data.keys())})")
+
+    if len(data) == 0:
+        return []
+
+    codes, uniques = group_codes(data[key])
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+
+    partitions = []
+
+    for label, index in zip(uniques.tolist(), np.split(order, bounds)):
+        partitions.append((label, Dataset({name: data[name][index] for name in data.keys()})))
+
+    return partitions
+
+
+def _file_label(label: Any) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(label)).strip("_.") or "_"
+
+
+def facet_paths(output_path: str, labels: List[Any]) -> List[str]:
+    """
+    The output path of each facet: output_path with {facet} replaced by the
+    facet's value, or with the value appended to the file name if it has no
+    {facet}. Values are made safe for file names, and numbered if two end
+    up the same.
+    """
+    root, extension = os.path.splitext(output_path)
+    paths, seen = [], set()
+
+    for label in labels:
+        name = _file_label(label)
+        candidate, number = name, 1
+
+        while candidate in seen:
+            number += 1
+            candidate = f"{name}_{number}"
+
+        seen.add(candidate)
+
+        if "{facet}" in output_path:
+            paths.append(output_path.replace("{facet}", candidate))
+        else:
+            paths.append(f"{root}_{candidate}{extension}")
+
+    return paths
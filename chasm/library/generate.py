@@ -0,0 +1,111 @@
+import os, csv, json
+import numpy as np
+from typing import Iterable, Iterator, List, Optional
+
+from chasm.library.data import DEFAULT_CHUNK_SIZE, STREAM_FORMATS, load_instructions
+from chasm.library.dataset import Dataset
+from chasm.library.engine import run_instructions
+from chasm.library.storage import ARROW_EXTENSIONS, write_arrow_chunks, write_npy_dir_chunks
+
+
+def generate_chunks(rows: int, series: int = 1, low: int = 0, high: int = 1000, seed: Optional[int] = None, mod_paths: List[str] = (), chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dataset]:
+    """
+    Generate rows of synthetic data, chunk_size rows at a time: an integer x
+    counting from 1 and series columns y0, y1, ... of random integers in
+    [low, high], filled by InjectRandInt. Mods are applied to each chunk as
+    it is generated, so they must be rowwise. The instructions live for the
+    whole run, so with a seed the output is the same whatever the chunk size.
+
+    Raises:
+        ValueError: If a mod has an instruction that isn't rowwise
+    """
+    from chasm.library.mod import InjectRandInt
+
+    generators = [
+        InjectRandInt({"low": low, "high": high, "ykey": f"y{i}", "seed": None if seed is None else seed + i})
+        for i in range(series)
+    ]
+
+    instructions = load_instructions(mod_paths)
+
+    for instruction in instructions:
+        if not instruction.rowwise:
+            raise ValueError(f"{type(instruction).__name__} is not rowwise, so it can't be applied to generated chunks")
+
+    for start in range(0, rows, chunk_size):
+        chunk = Dataset({"x": np.arange(start + 1, min(start + chunk_size, rows) + 1)})
+
+        yield run_instructions(generators + instructions, chunk)
+
+
+def write_ndjson_chunks(chunks: Iterable[Dataset], path: str) -> int:
+    written = 0
+
+    with open(path, 'w', encoding='utf-8') as file:
+        for chunk in chunks:
+            file.writelines(json.dumps(record) + "\n" for record in chunk.to_records())
+            written += len(chunk)
+
+    return written
+
+
+def write_csv_chunks(chunks: Iterable[Dataset], path: str) -> int:
+    written = 0
+
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+
+        for chunk in chunks:
+            if written == 0:
+                writer.writerow(chunk.keys())
+
+            # None is written as an empty cell, which read_csv_chunks reads back as None
+            writer.writerows(zip(*(chunk[key].tolist() for key in chunk.keys())))
+            written += len(chunk)
+
+    return written
+
+
+def output_format(path: str) -> str:
+    """
+    The format write_chunks writes path in: "ndjson", "csv", "arrow", or
+    "npy" for a path without an extension.
+
+    Raises:
+        ValueError: If path has an extension none of the formats use
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in STREAM_FORMATS:
+        return STREAM_FORMATS[extension]
+
+    if extension in ARROW_EXTENSIONS:
+        return "arrow"
+
+    if not extension:
+        return "npy"
+
+    supported = ", ".join(sorted(set(STREAM_FORMATS) | set(ARROW_EXTENSIONS)))
+
+    raise ValueError(f"Can't write '{extension}' files; use one of {supported}, or a path without an extension for a directory of .npy columns")
+
+
+def write_chunks(chunks: Iterable[Dataset], path: str, rows: int) -> int:
+    """
+    Write chunks to path as they arrive, in the format its extension names
+    (see output_format): .ndjson/.jsonl or .csv text, an Arrow IPC file, or
+    with no extension a directory of .npy columns (which must be told the
+    total rows up front). Returns the rows written.
+    """
+    output = output_format(path)
+
+    if output == "ndjson":
+        return write_ndjson_chunks(chunks, path)
+
+    if output == "csv":
+        return write_csv_chunks(chunks, path)
+
+    if output == "arrow":
+        return write_arrow_chunks(chunks, path)
+
+    return write_npy_dir_chunks(chunks, path, rows)
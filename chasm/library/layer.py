@@ -1,38 +1,120 @@
 import yaml
 import os
+import copy
+from functools import lru_cache
+from typing import Iterable, Tuple
 from chasm.library.config import ChartConfig
+from chasm.library.dataset import Dataset
+from chasm.library.profile import stage
 
-def get_layer_obj(path) -> dict:
+LAYER_EXTENSIONS = (".yaml", ".yml")
+
+# Bounds for the memoized layer files and resolved layer stacks
+LAYER_CACHE_SIZE = 1024
+CONFIG_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def _parse_layer_file(path: str, mtime_ns: int, size: int) -> dict:
+    # mtime_ns and size are only part of the cache key, so an edited file is re-read
+    try:
+        with open(path, 'r') as file:
+            data = yaml.safe_load(file)
+            return data
+
+    except FileNotFoundError:
+        print(f"Error: The file '{path}' was not found.")
+    except yaml.YAMLError as exc:
+        print(f"Error parsing YAML: {exc}")
+
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def _parse_layer_string(text: str) -> dict:
+    try:
+        data = yaml.safe_load(text)
+        return data
+
+    except yaml.YAMLError as exc:
+        print(f"Error parsing YAML: {exc}")
+
+
+def layer_identity(path) -> Tuple:
+    """
+    Identify a layer by its file and that file's current version, or for a
+    layer given inline as YAML, by its text.
+    """
     # Check if the input string provided points at a valid path
     if os.path.isfile(path):
-        try:
-            with open(path, 'r') as file:
-                data = yaml.safe_load(file)
-                return data
-
-        except FileNotFoundError:
-            print(f"Error: The file '{path}' was not found.")
-        except yaml.YAMLError as exc:
-            print(f"Error parsing YAML: {exc}")
-
-    else:
-        try:
-            data = yaml.safe_load(path)
-            return data
+        stat = os.stat(path)
+        return ("file", os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    return ("inline", path)
+
+
+def _parse_layer(identity: Tuple) -> dict:
+    if identity[0] == "file":
+        return _parse_layer_file(*identity[1:])
 
-        except yaml.YAMLError as exc:
-            print(f"Error parsing YAML: {exc}")
+    return _parse_layer_string(identity[1])
 
 
-def get_chart_config(data, layers) -> ChartConfig:
+def get_layer_obj(path) -> dict:
+    # Parsed layers are shared between calls and must not be modified
+    return _parse_layer(layer_identity(path))
+
+
+@lru_cache(maxsize=CONFIG_CACHE_SIZE)
+def _resolve_identities(identities: Tuple[Tuple, ...]) -> ChartConfig:
     config = ChartConfig()
 
-    for layer in layers:
-        obj = get_layer_obj(layer)
+    for identity in identities:
+        obj = _parse_layer(identity)
         config.apply_layer(obj)
 
+    return config
+
+
+def resolve_layers(layers) -> ChartConfig:
+    """
+    Resolve a layer stack into a ChartConfig. Resolved stacks are memoized
+    by the identities of their layers, and each caller gets a shallow copy:
+    per-chart changes (computed keys, barmode, scatter_mode) replace
+    attributes rather than mutating them, so they never reach the memoized
+    config. Nested lists and dicts are shared and must be treated as read-only.
+    """
+    return copy.copy(_resolve_identities(tuple(layer_identity(layer) for layer in layers)))
+
+
+def preload_layers(directory: str) -> int:
+    """
+    Parse every layer file under directory ahead of time, so a long-running
+    process doesn't pay for YAML parsing on its first charts. Returns the
+    number of layer files loaded.
+    """
+    count = 0
+
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            if name.endswith(LAYER_EXTENSIONS):
+                get_layer_obj(os.path.join(root, name))
+                count += 1
+
+    return count
+
+
+def clear_layer_cache() -> None:
+    _parse_layer_file.cache_clear()
+    _parse_layer_string.cache_clear()
+    _resolve_identities.cache_clear()
+
+
+def get_chart_config(data: Dataset, layers: Iterable) -> ChartConfig:
+    with stage("load_layers"):
+        config = resolve_layers(layers)
+
     # TODO: Should this go into the apply_layer function? It will reduce performance
     # but all reduce the chance that this gets missed in other future logic.
-    config.compute_keys(data[0])
+    with stage("compute_keys"):
+        config.compute_keys(data)
 
-    return config
\ No newline at end of file
+    return config
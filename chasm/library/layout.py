@@ -0,0 +1,208 @@
+import os, copy, json, hashlib, tempfile
+from collections import OrderedDict
+from dataclasses import fields
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from chasm import __version__
+from chasm.library.config import ChartConfig
+
+
+DEFAULT_LAYOUT_ENTRIES = 256
+
+
+@lru_cache(maxsize=None)
+def _default_template() -> dict:
+    import plotly.io as pio
+
+    # A plain spec is exported as is, so the default template plotly would
+    # have applied while building a go.Figure has to be included explicitly
+    return pio.templates[pio.templates.default].to_plotly_json()
+
+
+def _prune(obj: dict) -> dict:
+    # plotly ignores None when setting properties; mirror that so unset options stay unset
+    return {key: _prune(value) if isinstance(value, dict) else value for key, value in obj.items() if value is not None}
+
+
+def _axis(config: ChartConfig, axis: str) -> dict:
+    return {
+        "title": {"text": getattr(config, f"chart_{axis}_title")},
+        "visible": getattr(config, f"chart_{axis}_visible"),
+        "showticklabels": getattr(config, f"chart_{axis}_showticklabels"),
+        "showgrid": getattr(config, f"chart_{axis}_showgrid"),
+        "zeroline": getattr(config, f"chart_{axis}_zeroline"),
+        "automargin": getattr(config, f"chart_{axis}_automargin"),
+        "gridcolor": getattr(config, f"chart_{axis}_gridcolor"),
+        "ticklabelstandoff": getattr(config, f"chart_{axis}_ticklabelstandoff"),
+    }
+
+
+def build_layout(config: ChartConfig) -> dict:
+    """
+    Build the layout of a chart, without its template. Only the chart_*
+    settings are read, so every chart rendered with the same layer stack
+    (and chart type) shares one layout.
+    """
+    # Same axes as make_subplots(specs=[[{"secondary_y": True}]])
+    layout = {
+        "title": {
+            "text": config.chart_title_text,
+            "font": {"weight": config.chart_title_font_weight, "size": config.chart_title_font_size},
+            "pad": {"l": config.chart_title_pad_l, "r": config.chart_title_pad_r, "t": config.chart_title_pad_t, "b": config.chart_title_pad_b},
+            "automargin": config.chart_title_automargin,
+        },
+        "paper_bgcolor": config.chart_paper_bgcolor,
+        "plot_bgcolor": config.chart_plot_bgcolor,
+        "colorway": config.chart_colorway,
+        "barmode": config.chart_layout_barmode,
+        "showlegend": config.chart_layout_showlegend,
+        "margin": {"l": config.chart_margin_l, "r": config.chart_margin_r, "t": config.chart_margin_t, "b": config.chart_margin_b},
+        "xaxis": {"anchor": "y", "domain": [0.0, 0.94], **_axis(config, "xaxis")},
+        "yaxis": {"anchor": "x", "domain": [0.0, 1.0], **_axis(config, "yaxis")},
+        "yaxis2": {"anchor": "x", "overlaying": "y", "side": "right", **_axis(config, "yaxis")},
+    }
+
+    return _prune(layout)
+
+
+def facet_axes(index: int) -> Tuple[str, str, str]:
+    """The x, y and secondary y axis ids of the subplot at index, numbered as make_subplots does"""
+    def axis_id(axis: str, number: int) -> str:
+        return axis if number == 1 else f"{axis}{number}"
+
+    return axis_id("x", index + 1), axis_id("y", 2 * index + 1), axis_id("y", 2 * index + 2)
+
+
+def _axis_name(axis_id: str) -> str:
+    return f"{axis_id[0]}axis{axis_id[1:]}"
+
+
+def grid_layout(layout: dict, titles: List[str], columns: int) -> dict:
+    """
+    Turn a single chart layout into a grid of one subplot per title, each with
+    copies of the chart's x, y and secondary y axes, as make_subplots(rows,
+    cols, specs=[[{"secondary_y": True}] * cols] * rows, subplot_titles=titles)
+    would lay them out.
+    """
+    columns = max(1, min(columns, len(titles)))
+    rows = -(-len(titles) // columns)
+
+    # make_subplots' default spacing
+    h_spacing, v_spacing = 0.2 / columns, 0.3 / rows
+
+    xaxis, yaxis, yaxis2 = layout.pop("xaxis"), layout.pop("yaxis"), layout.pop("yaxis2")
+
+    width = (xaxis["domain"][1] - (columns - 1) * h_spacing) / columns
+    height = (1.0 - (rows - 1) * v_spacing) / rows
+
+    annotations = list(layout.get("annotations", []))
+
+    for index, title in enumerate(titles):
+        row, column = divmod(index, columns)
+        left, top = column * (width + h_spacing), 1.0 - row * (height + v_spacing)
+        x_id, y_id, y2_id = facet_axes(index)
+
+        layout[_axis_name(x_id)] = {**xaxis, "anchor": y_id, "domain": [left, left + width]}
+        layout[_axis_name(y_id)] = {**yaxis, "anchor": x_id, "domain": [top - height, top]}
+        layout[_axis_name(y2_id)] = {**yaxis2, "anchor": x_id, "overlaying": y_id}
+
+        annotations.append({
+            "text": title,
+            "x": left + width / 2,
+            "y": top,
+            "xref": "paper",
+            "yref": "paper",
+            "xanchor": "center",
+            "yanchor": "bottom",
+            "showarrow": False,
+            "font": {"size": 16},
+        })
+
+    layout["annotations"] = annotations
+
+    return layout
+
+
+def layout_key(config: ChartConfig) -> str:
+    settings = {f.name: getattr(config, f.name) for f in fields(config) if f.name.startswith("chart_")}
+
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LayoutCache:
+    """
+    Pre-built chart layouts keyed by the layout settings of a resolved layer
+    stack. Charts get a deep copy of the cached layout to attach traces to, so
+    nothing a chart does leaks into the next one; the (large, read-only)
+    plotly template is shared rather than copied.
+
+    Layouts are held in memory for the life of the process, up to max_entries.
+    Given a directory, they are also persisted there and reloaded by later runs.
+    """
+
+    def __init__(self, directory: str = None, max_entries: int = DEFAULT_LAYOUT_ENTRIES):
+        self.directory = os.path.join(directory, "layouts") if directory else None
+        self.max_entries = max_entries
+        self._layouts: Dict[str, dict] = OrderedDict()
+
+    def get(self, config: ChartConfig) -> dict:
+        key = layout_key(config)
+        layout = self._layouts.get(key)
+
+        if layout is None:
+            layout = self._read(key)
+
+            if layout is None:
+                layout = build_layout(config)
+                self._write(key, layout)
+
+            self._layouts[key] = layout
+
+            if len(self._layouts) > self.max_entries:
+                self._layouts.popitem(last=False)
+        else:
+            self._layouts.move_to_end(key)
+
+        return {**copy.deepcopy(layout), "template": _default_template()}
+
+    def clear(self) -> None:
+        self._layouts.clear()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[dict]:
+        if self.directory is None:
+            return None
+
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("version") != __version__:
+            return None
+
+        return entry.get("layout")
+
+    def _write(self, key: str, layout: dict) -> None:
+        if self.directory is None:
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+            with os.fdopen(handle, 'w', encoding='utf-8') as file:
+                json.dump({"version": __version__, "layout": layout}, file)
+
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            # The cache is an optimisation; an unwritable cache dir just means rebuilding
+            pass
+
+
+# Shared by every chart built in this process unless a cache is passed explicitly
+DEFAULT_LAYOUTS = LayoutCache()
@@ -1,73 +1,206 @@
-import random
-from typing import List, Dict
+import os, json, hashlib, tempfile
+import numpy as np
+from typing import Any, ClassVar, Iterable, List, Literal, Dict, Optional, Set, Tuple
 from pydantic import BaseModel, Field
 from dataclasses import dataclass, field
+from chasm import __version__
+from chasm.library.config import DEFAULT_CACHE_DIR
+from chasm.library.dataset import Dataset, to_column
+from chasm.library.engine import run_instructions
+from chasm.library import aggregate
+from chasm.library.window import RollingWindow, window_sums
+
+
+# Shared generator for random instructions that weren't given a seed
+_rng = np.random.default_rng()
 
 
 @dataclass
 class Instruction:
     args: Dict
 
+    # Set by instructions that override process_columns with a whole-column
+    # implementation. Mod.process only converts data to rows for the others.
+    vectorized: ClassVar[bool] = False
+
+    # Set by instructions whose output for an item depends only on that item,
+    # so they can be applied to each chunk of a streamed input independently
+    rowwise: ClassVar[bool] = False
+
+    # Cleared by instructions whose output can differ between runs on the same
+    # input, which makes any chart using them uncacheable
+    deterministic: ClassVar[bool] = True
+
     class InstructionArguments(BaseModel):
         pass
 
     def __post_init__(self):
         self.parsed_args = self.InstructionArguments(**self.args)
 
+    @classmethod
+    def from_compiled(cls, args: Dict) -> "Instruction":
+        """Rebuild an instruction from arguments a Program already validated"""
+        instruction = cls.__new__(cls)
+        instruction.args = args
+        instruction.parsed_args = cls.InstructionArguments.model_construct(**args)
+
+        return instruction
+
+    def keys(self) -> Optional[Set[str]]:
+        """Keys this instruction reads or writes, or None if it may touch any of them"""
+        return None
+
     def process(self, data: List[Dict]) -> List[Dict]:
         return data
 
+    def process_columns(self, data: Dataset) -> Dataset:
+        # Row path fallback for columns a vectorized implementation can't handle
+        return Dataset.from_records(self.process(data.to_records()))
+
 
 @dataclass
-class InjectMovingAverage(Instruction):
+class RollingInstruction(Instruction):
     """
-    For every item in the list of data, add a specified integer value
+    Base for instructions that inject a rolling statistic of one key into
+    another. All of them share the single-pass RollingWindow core, so each is
+    O(n) regardless of the window size.
     """
+    vectorized: ClassVar[bool] = True
+
+    # RollingWindow statistic injected into {tkey}
+    stat: ClassVar[str] = "mean"
+
     class InstructionArguments(BaseModel):
         wsize: int = Field(
             ...,
-            description="The window size of the moving average to compute.",
+            description="The window size of the rolling statistic to compute.",
             examples="3, 5, 10, 15, 20, ...",
             gt=0
         )
 
         skey: str = Field(
             ...,
-            description="The source key of each data element to compute moving average from",
+            description="The source key of each data element to compute the rolling statistic from",
             examples="y, y1, y2, x1, s1, s2, ..."
         )
 
         tkey: str = Field(
             ...,
-            description="The target key of each data element to inject moving average into",
+            description="The target key of each data element to inject the rolling statistic into",
             examples="y, y1, y2, x1, s1, s2, ..."
         )
 
     def __post_init__(self):
         super().__post_init__()
 
+    def keys(self):
+        return {self.parsed_args.skey, self.parsed_args.tkey}
+
+    def _check_window(self, length: int) -> None:
+        if self.parsed_args.wsize > length:
+            raise ValueError(f"Window Size {self.parsed_args.wsize} of {type(self).__name__} cannot be larger than the length of the data ({length}).")
+
+    def _roll(self, values: Iterable) -> List:
+        window = RollingWindow(self.parsed_args.wsize, stats=(self.stat,))
+        reduce = getattr(window, self.stat)
+        results = []
+
+        for value in values:
+            window.push(value)
+            results.append(reduce())
+
+        return results
+
     def process(self, data: List[Dict]):
-        if self.parsed_args.wsize > len(data):
-            raise ValueError(f"Window Size {self.parsed_args.wsize} of InjectMovingAverage cannot be larger than the length of the data ({len(data)}).")
+        self._check_window(len(data))
 
-        values = []
+        results = self._roll(datum[self.parsed_args.skey] for datum in data)
 
-        for datum in data:
-            values.append(datum[self.parsed_args.skey])
+        for datum, result in zip(data, results):
+            datum[self.parsed_args.tkey] = result
+
+        return data
+
+    def process_columns(self, data: Dataset):
+        self._check_window(len(data))
+
+        wsize = self.parsed_args.wsize
+        source = data[self.parsed_args.skey]
 
-            if len(values) > self.parsed_args.wsize:
-                values.pop(0)
+        if source.dtype == object:
+            return super().process_columns(data)
 
-            datum[self.parsed_args.tkey] = sum(values) / len(values)
+        if self.stat not in ("sum", "mean"):
+            data[self.parsed_args.tkey] = to_column(self._roll(source.tolist()))
+            return data
+
+        sums = window_sums(source, wsize)
+
+        if self.stat == "sum":
+            data[self.parsed_args.tkey] = sums
+        else:
+            data[self.parsed_args.tkey] = sums / np.minimum(np.arange(1, len(source) + 1), wsize)
 
         return data
 
 
+@dataclass
+class InjectMovingAverage(RollingInstruction):
+    """
+    Inject the moving average of {skey} over the last {wsize} items into {tkey}
+    """
+    stat: ClassVar[str] = "mean"
+
+
+@dataclass
+class InjectRollingSum(RollingInstruction):
+    """
+    Inject the sum of {skey} over the last {wsize} items into {tkey}
+    """
+    stat: ClassVar[str] = "sum"
+
+
+@dataclass
+class InjectRollingMin(RollingInstruction):
+    """
+    Inject the minimum of {skey} over the last {wsize} items into {tkey}
+    """
+    stat: ClassVar[str] = "min"
+
+
+@dataclass
+class InjectRollingMax(RollingInstruction):
+    """
+    Inject the maximum of {skey} over the last {wsize} items into {tkey}
+    """
+    stat: ClassVar[str] = "max"
+
+
+@dataclass
+class InjectRollingStd(RollingInstruction):
+    """
+    Inject the population standard deviation of {skey} over the last {wsize} items into {tkey}
+    """
+    stat: ClassVar[str] = "std"
+
+
+@dataclass
+class InjectEMA(RollingInstruction):
+    """
+    Inject the exponential moving average of {skey} into {tkey}, using {wsize}
+    as the span (smoothing factor 2 / (wsize + 1))
+    """
+    stat: ClassVar[str] = "ema"
+
+
 @dataclass
 class AddInt(Instruction):
     """
     For every item in the list of data, add a specified integer value
     """
+    vectorized: ClassVar[bool] = True
+    rowwise: ClassVar[bool] = True
+
     class InstructionArguments(BaseModel):
         adder: int = Field(
             ...,
@@ -84,18 +217,60 @@ class AddInt(Instruction):
     def __post_init__(self):
         super().__post_init__()
 
+    def keys(self):
+        return {self.parsed_args.key}
+
     def process(self, data: List[Dict]):
         for datum in data:
             datum[self.parsed_args.key] = datum[self.parsed_args.key] + self.parsed_args.adder
 
         return data
 
+    def process_columns(self, data: Dataset):
+        if len(data) == 0:
+            return data
+
+        data[self.parsed_args.key] = data[self.parsed_args.key] + self.parsed_args.adder
+
+        return data
+
 
 @dataclass
-class AppendRandInt(Instruction):
+class RandomInstruction(Instruction):
+    """
+    Base for instructions that generate random values. Values are drawn in
+    bulk from a numpy Generator: the shared one, or with a seed, one owned by
+    the instruction for the life of its pipeline. Seeded instructions give
+    the same values on every run, on rows and columns alike and however a
+    stream is chunked, so charts using them can be cached.
+    """
+    vectorized: ClassVar[bool] = True
+
+    @property
+    def deterministic(self) -> bool:
+        return self.parsed_args.seed is not None
+
+    @property
+    def rng(self) -> np.random.Generator:
+        if self.parsed_args.seed is None:
+            return _rng
+
+        # Created on first use, as compiled instructions skip __post_init__
+        if getattr(self, "_seeded_rng", None) is None:
+            self._seeded_rng = np.random.default_rng(self.parsed_args.seed)
+
+        return self._seeded_rng
+
+    def integers(self, size: int = None):
+        return self.rng.integers(self.parsed_args.low, self.parsed_args.high, size=size, endpoint=True)
+
+
+@dataclass
+class AppendRandInt(RandomInstruction):
     """
     Append a series of random integers to the end of the data set
     """
+
     class InstructionArguments(BaseModel):
         num: int = Field(
             ...,
@@ -133,26 +308,47 @@ class AppendRandInt(Instruction):
             examples="Value, Category, Entry, ..."
         )
 
+        seed: Optional[int] = Field(
+            default = None,
+            description="Seed for the generated values. Seeded runs are reproducible; unseeded runs differ every time.",
+            examples="0, 42, 1234, ..."
+        )
+
     def __post_init__(self):
         super().__post_init__()
 
     def process(self, data: List[Dict]):
-        for i in range(0, self.parsed_args.num):
+        values = self.integers(self.parsed_args.num).tolist()
+
+        for i, value in enumerate(values):
             data.append(
                 {
                     self.parsed_args.xkey: f"{self.parsed_args.xprefix} {i + 1}", 
-                    self.parsed_args.ykey: random.randint(self.parsed_args.low, self.parsed_args.high)
+                    self.parsed_args.ykey: value
                 }
             )
             
         return data
 
+    def process_columns(self, data: Dataset):
+        xvalues = np.empty(self.parsed_args.num, dtype=object)
+        xvalues[:] = [f"{self.parsed_args.xprefix} {i + 1}" for i in range(0, self.parsed_args.num)]
+
+        appended = Dataset({
+            self.parsed_args.xkey: xvalues,
+            self.parsed_args.ykey: self.integers(self.parsed_args.num),
+        })
+
+        return Dataset.concat([data, appended])
+
 
 @dataclass
-class InjectRandInt(Instruction):
+class InjectRandInt(RandomInstruction):
     """
     Inject a random integer into each item in the data set
     """
+    rowwise: ClassVar[bool] = True
+
     class InstructionArguments(BaseModel):
         low: int = Field(
             ...,
@@ -172,86 +368,396 @@ class InjectRandInt(Instruction):
             examples="y, y1, num, count, ..."
         )
 
+        seed: Optional[int] = Field(
+            default = None,
+            description="Seed for the generated values. Seeded runs are reproducible; unseeded runs differ every time.",
+            examples="0, 42, 1234, ..."
+        )
+
     def __post_init__(self):
         super().__post_init__()
 
+    def keys(self):
+        return {self.parsed_args.ykey}
+
     def process(self, data: List[Dict]):
-        for datum in data:
-            datum[self.parsed_args.ykey] = random.randint(self.parsed_args.low, self.parsed_args.high)
+        for datum, value in zip(data, self.integers(len(data)).tolist()):
+            datum[self.parsed_args.ykey] = value
         
         return data
 
+    def process_columns(self, data: Dataset):
+        if len(data) == 0:
+            return data
+
+        data[self.parsed_args.ykey] = self.integers(len(data))
+
+        return data
+
+
+@dataclass
+class GroupBy(Instruction):
+    """
+    Collapse the data set to one item per distinct {key}, reducing every
+    numeric key with {agg}. Groups keep the order they first appear in, and
+    keys that aren't numeric are dropped.
+    """
+    vectorized: ClassVar[bool] = True
+
+    class InstructionArguments(BaseModel):
+        key: str = Field(
+            default = "x",
+            description="The key to group items by",
+            examples="x, x0, cat, date, ..."
+        )
+
+        agg: Literal["sum", "count", "mean", "min", "max"] = Field(
+            default = "sum",
+            description="How the values of each numeric key are combined within a group. Missing values are skipped.",
+            examples="sum, count, mean, min, max"
+        )
+
+        ckey: Optional[str] = Field(
+            default = None,
+            description="If set, the number of items in each group is also written to this key",
+            examples="count, n, y, ..."
+        )
+
+    def __post_init__(self):
+        super().__post_init__()
+
+    def process(self, data: List[Dict]):
+        labels = [datum.get(self.parsed_args.key) for datum in data]
+
+        return aggregate.aggregate_rows(data, self.parsed_args.key, labels, self.parsed_args.agg, self.parsed_args.ckey)
+
+    def process_columns(self, data: Dataset):
+        if len(data) == 0:
+            return data
+
+        codes, uniques = aggregate.group_codes(data[self.parsed_args.key])
+
+        return aggregate.aggregate_columns(data, self.parsed_args.key, codes, uniques, self.parsed_args.agg, self.parsed_args.ckey)
+
+
+@dataclass
+class TimeBucket(Instruction):
+    """
+    Group items into time buckets on {key} and reduce every numeric key with
+    {agg}, one item per bucket in time order. Times are ISO 8601 strings or
+    epoch seconds, and buckets are labelled the same way. Items without a
+    time are dropped.
+    """
+    vectorized: ClassVar[bool] = True
+
+    class InstructionArguments(BaseModel):
+        unit: Literal["second", "minute", "hour", "day", "week", "month", "quarter", "year"] = Field(
+            ...,
+            description="The bucket unit. Seconds to days are fixed widths counted from the epoch; weeks (from Monday), months, quarters and years follow the calendar.",
+            examples="minute, hour, day, week, month, ..."
+        )
+
+        every: int = Field(
+            default = 1,
+            description="The number of units in each bucket",
+            examples="1, 5, 15, 30, ...",
+            gt=0
+        )
+
+        key: str = Field(
+            default = "x",
+            description="The key holding each item's time",
+            examples="x, date, time, ts, ..."
+        )
+
+        agg: Literal["sum", "count", "mean", "min", "max"] = Field(
+            default = "sum",
+            description="How the values of each numeric key are combined within a bucket. Missing values are skipped.",
+            examples="sum, count, mean, min, max"
+        )
+
+        ckey: Optional[str] = Field(
+            default = None,
+            description="If set, the number of items in each bucket is also written to this key",
+            examples="count, n, y, ..."
+        )
+
+    def __post_init__(self):
+        super().__post_init__()
+
+    def process(self, data: List[Dict]):
+        column = to_column([datum.get(self.parsed_args.key) for datum in data])
+        starts = aggregate.bucket_starts(column, self.parsed_args.every, self.parsed_args.unit)
+
+        # Visiting items in time order makes the groups come out in time order
+        present = np.flatnonzero(~np.isnat(starts))
+        order = present[np.argsort(starts[present], kind="stable")]
+        labels = aggregate.bucket_labels(starts[order], self.parsed_args.unit, aggregate.is_numeric(column)).tolist()
+
+        return aggregate.aggregate_rows([data[i] for i in order], self.parsed_args.key, labels, self.parsed_args.agg, self.parsed_args.ckey)
+
+    def process_columns(self, data: Dataset):
+        if len(data) == 0:
+            return data
+
+        column = data[self.parsed_args.key]
+        starts = aggregate.bucket_starts(column, self.parsed_args.every, self.parsed_args.unit)
+        present = ~np.isnat(starts)
+
+        if not present.all():
+            data = Dataset({key: data[key][present] for key in data.keys()})
+            starts = starts[present]
+
+        uniques, codes = np.unique(starts, return_inverse=True)
+        labels = aggregate.bucket_labels(uniques, self.parsed_args.unit, aggregate.is_numeric(column))
+
+        return aggregate.aggregate_columns(data, self.parsed_args.key, codes.reshape(-1), labels, self.parsed_args.agg, self.parsed_args.ckey)
+
+
+@dataclass
+class TopN(Instruction):
+    """
+    Keep the {n} items with the largest {vkey}, largest first, and sum the
+    numeric keys of all the others into a single {other} item
+    """
+    vectorized: ClassVar[bool] = True
+
+    class InstructionArguments(BaseModel):
+        n: int = Field(
+            ...,
+            description="The number of items to keep",
+            examples="5, 10, 20, ...",
+            gt=0
+        )
+
+        vkey: str = Field(
+            ...,
+            description="The key items are ranked by. Items missing it rank last.",
+            examples="y, y1, count, ..."
+        )
+
+        key: str = Field(
+            default = "x",
+            description="The category key, set to {other} on the rolled up item",
+            examples="x, x0, cat, ..."
+        )
+
+        other: Optional[str] = Field(
+            default = "Other",
+            description="The category of the item the remaining items are summed into. Set to none to drop them instead.",
+            examples="Other, Rest, none, ..."
+        )
+
+    def __post_init__(self):
+        super().__post_init__()
+
+    def process(self, data: List[Dict]):
+        index = aggregate.top_rows(data, self.parsed_args.vkey, self.parsed_args.n)
+
+        return aggregate.rollup_rows(data, self.parsed_args.key, index, self.parsed_args.other)
+
+    def process_columns(self, data: Dataset):
+        if len(data) == 0:
+            return data
+
+        index = aggregate.top_indices(data[self.parsed_args.vkey], self.parsed_args.n)
+
+        return aggregate.rollup_columns(data, self.parsed_args.key, index, self.parsed_args.other)
+
 
 ISA = {
     "appendrandint":        AppendRandInt,
     "injectrandint":        InjectRandInt,
     "injectmovingaverage":  InjectMovingAverage,
+    "injectrollingsum":     InjectRollingSum,
+    "injectrollingmin":     InjectRollingMin,
+    "injectrollingmax":     InjectRollingMax,
+    "injectrollingstd":     InjectRollingStd,
+    "injectema":            InjectEMA,
     "addint":               AddInt,
+    "groupby":              GroupBy,
+    "timebucket":           TimeBucket,
+    "topn":                 TopN,
 }
 
 
-@dataclass
-class Mod:
-    path: str
-    instructions: List[Instruction] = field(default_factory=list)
+ISA_NAMES = {instruction: name for name, instruction in ISA.items()}
+
+PROGRAM_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "programs")
+
 
-    def _parse_args(self, arg_string) -> Dict:
-        """Parse a line with best type guesses"""
+def _parse_args(arg_string) -> Dict:
+    """Parse a line with best type guesses"""
 
-        result = {}
+    result = {}
 
-        # Split by comma and strip whitespace
-        pairs = [pair.strip() for pair in arg_string.split(',')]
+    # Split by comma and strip whitespace
+    pairs = [pair.strip() for pair in arg_string.split(',')]
+    
+    for pair in pairs:
+        if '=' not in pair:
+            raise ValueError(f"ChAsm instruction pair {pair} is malformed in some way.")
         
-        for pair in pairs:
-            if '=' not in pair:
-                raise ValueError(f"ChAsm instruction pair {pair} is malformed in some way.")
-            
-            key, value = pair.split('=', 1)  # Split only on first '='
-            key = key.strip()
-            value = value.strip()
-            
-            # Smart type conversion
-            if value.lower() in ('true', 'false'):
-                result[key] = value.lower() == 'true'
-            elif value.lower() in ('null', 'none'):
-                result[key] = None
-            else:
-                try:
-                    # Try int first, then float
-                    if '.' in value:
-                        result[key] = float(value)
-                    else:
-                        result[key] = int(value)
-                except ValueError:
-                    result[key] = value  # Keep as string
+        key, value = pair.split('=', 1)  # Split only on first '='
+        key = key.strip()
+        value = value.strip()
         
-        return result
+        # Smart type conversion
+        if value.lower() in ('true', 'false'):
+            result[key] = value.lower() == 'true'
+        elif value.lower() in ('null', 'none'):
+            result[key] = None
+        else:
+            try:
+                # Try int first, then float
+                if '.' in value:
+                    result[key] = float(value)
+                else:
+                    result[key] = int(value)
+            except ValueError:
+                result[key] = value  # Keep as string
+    
+    return result
 
-    def __post_init__(self):
-        with open(self.path, 'r') as file:
-            for line in file:
-                stripped_line = line.strip()
-
-                if stripped_line.startswith("#"):
-                    continue
-                elif not stripped_line:
-                    continue
-                
-                inst_name, inst_arg_str = stripped_line.split(None, 1)
-                inst_args = self._parse_args(inst_arg_str)
 
-                instruction = ISA.get(inst_name, Instruction({}))(inst_args)
-                self.instructions.append(instruction)
+@dataclass
+class Program:
+    """
+    A compiled .chasm file: every line parsed and its arguments validated,
+    stored as plain (instruction name, arguments) pairs so it can be written
+    to disk and turned back into instructions without re-validating.
+    """
+    path: str
+    source_hash: str
+    steps: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+
+    def instructions(self) -> List[Instruction]:
+        return [ISA[name].from_compiled(dict(args)) for name, args in self.steps]
 
-    def process(self, data: List[Dict]) -> List[Dict]:
-        for instruction in self.instructions:
-            data = instruction.process(data)
+    def to_dict(self) -> Dict:
+        return {"path": self.path, "source_hash": self.source_hash, "steps": [[name, args] for name, args in self.steps]}
 
-        return data
+    @classmethod
+    def from_dict(cls, obj: Dict) -> "Program":
+        return cls(path=obj["path"], source_hash=obj["source_hash"], steps=[(name, args) for name, args in obj["steps"]])
+
+
+def _hash_source(source: bytes) -> str:
+    return hashlib.sha256(source).hexdigest()
+
+
+def compile_source(path: str, source: bytes) -> Program:
+    """
+    Parse and validate the text of a .chasm file.
+
+    Raises:
+        ValueError: If a line names an unknown instruction or is malformed
+        pydantic.ValidationError: If an instruction's arguments are invalid
+    """
+    steps = []
+
+    for line_number, line in enumerate(source.decode('utf-8').splitlines(), 1):
+        stripped_line = line.strip()
+
+        if stripped_line.startswith("#"):
+            continue
+        elif not stripped_line:
+            continue
+
+        parts = stripped_line.split(None, 1)
+        inst_name = parts[0]
+
+        if inst_name not in ISA:
+            raise ValueError(f"Unknown ChAsm instruction '{inst_name}' on line {line_number} of {path}")
+
+        inst_args = _parse_args(parts[1]) if len(parts) > 1 else {}
+
+        # Validating here means loading the compiled program can skip it
+        instruction = ISA[inst_name](inst_args)
+        steps.append((inst_name, instruction.parsed_args.model_dump()))
+
+    return Program(path=path, source_hash=_hash_source(source), steps=steps)
+
+
+def compile_program(path: str) -> Program:
+    with open(path, 'rb') as file:
+        return compile_source(path, file.read())
+
+
+def _program_cache_path(path: str) -> str:
+    return os.path.join(PROGRAM_CACHE_DIR, hashlib.sha256(os.path.abspath(path).encode()).hexdigest() + ".json")
+
+
+def _write_cached_program(path: str, program: Program, stat: os.stat_result) -> None:
+    entry = {"version": __version__, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "program": program.to_dict()}
+
+    try:
+        os.makedirs(PROGRAM_CACHE_DIR, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=PROGRAM_CACHE_DIR, suffix=".tmp")
+
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            json.dump(entry, file)
+
+        os.replace(temp_path, _program_cache_path(path))
+    except OSError:
+        # The cache is an optimisation; an unwritable cache dir just means recompiling
+        pass
+
+
+def _read_cached_program(path: str) -> Optional[Dict]:
+    try:
+        with open(_program_cache_path(path), 'r', encoding='utf-8') as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if entry.get("version") != __version__:
+        return None
+
+    return entry
+
+
+def load_program(path: str) -> Program:
+    """
+    Return the compiled program for a .chasm file, reusing the on-disk cache
+    when it is fresh. A matching mtime and size is trusted without reading
+    the file; otherwise the file's content hash decides whether the cached
+    program still applies (e.g. after a checkout touched but didn't change it).
+    """
+    stat = os.stat(path)
+    entry = _read_cached_program(path)
+
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return Program.from_dict(entry["program"])
+
+    with open(path, 'rb') as file:
+        source = file.read()
+
+    if entry and entry["program"]["source_hash"] == _hash_source(source):
+        program = Program.from_dict(entry["program"])
+    else:
+        program = compile_source(path, source)
+
+    _write_cached_program(path, program, stat)
+
+    return program
+
+
+@dataclass
+class Mod:
+    path: str
+    instructions: List[Instruction] = None
+
+    def __post_init__(self):
+        if self.instructions is None:
+            self.instructions = compile_program(self.path).instructions()
+
+    def process(self, data: Dataset) -> Dataset:
+        return run_instructions(self.instructions, data)
 
 
 def get_mods(paths: List[str]):
-    mods = [Mod(path=path) for path in paths]
+    # Already constructed mods are passed through untouched
+    mods = [path if isinstance(path, Mod) else Mod(path=path, instructions=load_program(path).instructions()) for path in paths]
     return mods
                 
@@ -0,0 +1,54 @@
+from typing import List
+
+from chasm.library.mod import Instruction, AddInt, ISA_NAMES
+
+
+def fold_constants(instructions: List[Instruction]) -> List[Instruction]:
+    """
+    Merge AddInt instructions on the same key into one, as long as everything
+    between them is rowwise and leaves that key alone. Integer columns give
+    exactly the same result; float columns may differ in the last bit.
+    """
+    result = []
+
+    for instruction in instructions:
+        if isinstance(instruction, AddInt):
+            key = instruction.parsed_args.key
+
+            for index in range(len(result) - 1, -1, -1):
+                previous = result[index]
+
+                if isinstance(previous, AddInt) and previous.parsed_args.key == key:
+                    adder = previous.parsed_args.adder + instruction.parsed_args.adder
+                    result[index] = AddInt.from_compiled({"adder": adder, "key": key})
+                    break
+
+                if not previous.rowwise or previous.keys() is None or key in previous.keys():
+                    result.append(instruction)
+                    break
+            else:
+                result.append(instruction)
+        else:
+            result.append(instruction)
+
+    return result
+
+
+def optimize(instructions: List[Instruction]) -> List[Instruction]:
+    return fold_constants(instructions)
+
+
+def describe(instruction: Instruction) -> str:
+    args = ", ".join(f"{key}={value}" for key, value in instruction.args.items())
+    return f"{ISA_NAMES.get(type(instruction), type(instruction).__name__)} {args}"
+
+
+def explain(instructions: List[Instruction], plan: List[Instruction]) -> str:
+    """Render an optimized plan next to the number of instructions it replaces"""
+    lines = [f"Mod plan: {len(instructions)} instructions -> {len(plan)} steps"]
+
+    # Each step says which path run_instructions takes it down
+    for index, step in enumerate(plan, 1):
+        lines.append(f"  {index}. {describe(step)} [{'columns' if step.vectorized else 'rows'}]")
+
+    return "\n".join(lines)
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterator, List, Optional
+
+
+PROFILE_FORMATS = ("json", "chrome")
+
+
+@dataclass
+class StageRecord:
+    name: str
+    start_ms: float = 0.0 # Relative to the start of the profile
+    duration_ms: float = 0.0
+    depth: int = 0
+    rows: Optional[int] = None
+    peak_bytes: Optional[int] = None # Peak traced allocation during the stage
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class Profiler:
+    """
+    Collects a StageRecord for every stage() entered while it is active.
+    Peak memory is measured with tracemalloc, which slows allocation-heavy
+    code down noticeably; pass memory=False for timings alone.
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records: List[StageRecord] = []
+
+        self._origin = time.perf_counter()
+        self._depth = 0
+        self._peaks: List[int] = []
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._origin) * 1000
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate records by stage name: call count, total and max wall time,
+        rows processed and the highest peak memory seen.
+        """
+        stages: Dict[str, Dict[str, Any]] = {}
+
+        for record in self.records:
+            stats = stages.setdefault(record.name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "peak_bytes": None})
+            stats["count"] += 1
+            stats["total_ms"] += record.duration_ms
+            stats["max_ms"] = max(stats["max_ms"], record.duration_ms)
+            stats["rows"] += record.rows or 0
+
+            if record.peak_bytes is not None:
+                stats["peak_bytes"] = max(stats["peak_bytes"] or 0, record.peak_bytes)
+
+        return stages
+
+    def to_json(self) -> Dict[str, Any]:
+        records = sorted(self.records, key=lambda record: record.start_ms)
+
+        return {"stages": [asdict(record) for record in records], "summary": self.summary()}
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        # Complete ("X") events, loadable in chrome://tracing or Perfetto
+        pid, tid = os.getpid(), threading.get_ident()
+        events = []
+
+        for record in self.records:
+            args = dict(record.args)
+
+            if record.rows is not None:
+                args["rows"] = record.rows
+
+            if record.peak_bytes is not None:
+                args["peak_bytes"] = record.peak_bytes
+
+            events.append({
+                "name": record.name,
+                "cat": "chasm",
+                "ph": "X",
+                "ts": record.start_ms * 1000,
+                "dur": record.duration_ms * 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, file: Any, profile_format: str = "json") -> None:
+        report = self.to_chrome_trace() if profile_format == "chrome" else self.to_json()
+        json.dump(report, file, indent=2, default=str)
+        file.write("\n")
+
+
+_active: ContextVar[Optional[Profiler]] = ContextVar("chasm_profiler", default=None)
+
+# Handed out by stage() while nothing is profiling, so callers can always set rows
+_DISCARDED = StageRecord(name="")
+
+
+@contextmanager
+def stage(name: str, rows: int = None, **args: Any) -> Iterator[StageRecord]:
+    """
+    Time a stage of the pipeline under the active profiler, if any. The
+    yielded record's rows may be updated once the stage knows its output size.
+    Costs one context variable lookup when profiling is off.
+    """
+    profiler = _active.get()
+
+    if profiler is None:
+        yield _DISCARDED
+        return
+
+    record = StageRecord(name=name, depth=profiler._depth, rows=rows, args=args)
+    tracing = profiler.memory and tracemalloc.is_tracing()
+
+    # tracemalloc has a single peak, so it is reset at every stage boundary and
+    # each open stage keeps the highest peak seen across its intervals
+    if tracing:
+        if profiler._peaks:
+            profiler._peaks[-1] = max(profiler._peaks[-1], tracemalloc.get_traced_memory()[1])
+
+        profiler._peaks.append(0)
+        _reset_peak()
+
+    profiler._depth += 1
+    record.start_ms = profiler._now_ms()
+
+    try:
+        yield record
+    finally:
+        record.duration_ms = profiler._now_ms() - record.start_ms
+        profiler._depth -= 1
+
+        if tracing:
+            record.peak_bytes = max(profiler._peaks.pop(), tracemalloc.get_traced_memory()[1])
+
+            if profiler._peaks:
+                profiler._peaks[-1] = max(profiler._peaks[-1], record.peak_bytes)
+
+            _reset_peak()
+
+        profiler.records.append(record)
+
+
+def _reset_peak() -> None:
+    # tracemalloc.reset_peak is Python 3.9+; on 3.8 peaks run from the start of tracing
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+
+@contextmanager
+def profiling(memory: bool = True, cprofile_path: str = None) -> Iterator[Profiler]:
+    """
+    Profile every make_chart stage and mod instruction run inside the
+    context, e.g. to aggregate stats across a batch:
+
+        with profiling() as profiler:
+            run_batch(jobs)
+
+        print(profiler.summary())
+
+    With cprofile_path, a cProfile of the whole context is also written there
+    (readable with pstats or snakeviz).
+    """
+    profiler = Profiler(memory=memory)
+    token = _active.set(profiler)
+    started_tracing = memory and not tracemalloc.is_tracing()
+
+    if started_tracing:
+        tracemalloc.start()
+
+    cprofiler = None
+
+    if cprofile_path:
+        import cProfile
+
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+
+    try:
+        yield profiler
+    finally:
+        if cprofiler is not None:
+            cprofiler.disable()
+            cprofiler.dump_stats(cprofile_path)
+
+        if started_tracing:
+            tracemalloc.stop()
+
+        _active.reset(token)
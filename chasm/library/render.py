@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+from concurrent.futures import Future
+from typing import Any, Iterator, List, Optional
+
+from chasm.library.scheduler import RenderScheduler
+
+
+# Number of warm_renderer contexts open in this process
+_sessions = 0
+
+
+@contextmanager
+def warm_renderer() -> Iterator[None]:
+    """
+    Keep one kaleido browser session alive for every export made inside the
+    context. Without this, each fig.write_image call cold-starts its own
+    headless browser, which dominates the cost of rendering many charts.
+    Contexts nest: only the outermost one starts and stops the session.
+    """
+    global _sessions
+
+    import kaleido
+
+    if _sessions == 0:
+        kaleido.start_sync_server(silence_warnings=True)
+
+    _sessions += 1
+
+    try:
+        yield
+    finally:
+        _sessions -= 1
+
+        if _sessions == 0:
+            kaleido.stop_sync_server(silence_warnings=True)
+
+
+def write_figure(fig: Any, output_path: str, scheduler: RenderScheduler = None) -> Optional[Future]:
+    """
+    Export a figure to output_path, either in this process or by handing it to
+    a RenderScheduler. When a scheduler is used the returned future resolves
+    once the worker has written the file.
+    """
+    if scheduler is not None:
+        return scheduler.submit(fig, output_path)
+
+    # Plain figure specs are exported as built, without plotly re-validating them
+    if isinstance(fig, dict):
+        import plotly.io as pio
+
+        pio.write_image(fig, f"{output_path}", validate=False)
+    else:
+        fig.write_image(f"{output_path}")
+
+
+def write_figures(fig: Any, output_paths: List[str], scheduler: RenderScheduler = None) -> List[Future]:
+    """
+    Export one figure to several paths, e.g. one per format. Without a
+    scheduler the exports are made together in this process's kaleido
+    session, which renders them concurrently; with one, each is submitted as
+    its own export so workers write them in parallel, and their futures are
+    returned.
+    """
+    if scheduler is not None:
+        return [scheduler.submit(fig, output_path) for output_path in output_paths]
+
+    import plotly.io as pio
+
+    # write_images is only in plotly 6.1+, which kaleido 1.x wants anyway
+    if len(output_paths) == 1 or not hasattr(pio, "write_images"):
+        for output_path in output_paths:
+            write_figure(fig, output_path)
+    else:
+        pio.write_images([fig] * len(output_paths), [f"{output_path}" for output_path in output_paths], validate=False)
+
+    return []
@@ -0,0 +1,106 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Iterator, Optional, Tuple
+from dataclasses import dataclass
+
+
+@dataclass
+class RenderResult:
+    output_path: str
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _start_worker() -> None:
+    # Each worker process holds its own warm kaleido session for its lifetime.
+    # Finalizers registered this way run when the pool shuts the worker down,
+    # unlike atexit handlers which multiprocessing children skip.
+    from multiprocessing.util import Finalize
+    from chasm.library.render import warm_renderer
+
+    session = warm_renderer()
+    session.__enter__()
+    Finalize(None, session.__exit__, args=(None, None, None), exitpriority=10)
+
+
+def _export(fig_dict: dict, output_path: str) -> str:
+    import plotly.io as pio
+
+    # Figures are plain specs, validated (if at all) when built in the parent process
+    pio.write_image(fig_dict, output_path, validate=False)
+
+    return output_path
+
+
+class RenderScheduler:
+    """
+    Fan figure exports out to a pool of worker processes, each with a warm
+    kaleido instance.
+
+    At most `max_pending` exports may be in flight; `submit` blocks until a slot
+    frees up so a fast producer cannot queue an unbounded number of figures.
+    `results` yields outcomes in submission order regardless of which worker
+    finished first.
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 2
+
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pending: Deque[Tuple[str, Future]] = deque()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Exports submitted over the scheduler's life, however many results were consumed
+        self.submitted = 0
+
+    def __enter__(self) -> "RenderScheduler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_start_worker)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def submit(self, fig: Any, output_path: str) -> Future:
+        self.start()
+
+        # Figures are shipped to workers as plain dicts, which pickle cheaply
+        fig_dict = fig.to_dict() if hasattr(fig, "to_dict") else fig
+
+        self._slots.acquire()
+
+        try:
+            future = self._executor.submit(_export, fig_dict, f"{output_path}")
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        self._pending.append((output_path, future))
+        self.submitted += 1
+
+        return future
+
+    def results(self) -> Iterator[RenderResult]:
+        while self._pending:
+            output_path, future = self._pending.popleft()
+
+            try:
+                future.result()
+                yield RenderResult(output_path=output_path)
+            except Exception as e:
+                yield RenderResult(output_path=output_path, error=e)
@@ -0,0 +1,470 @@
+import os
+import json
+import time
+import signal
+import asyncio
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from chasm.library.config import CHART_TYPES, DEFAULT_CACHE_DIR, RENDERERS
+from chasm.library.scheduler import _start_worker
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_QUEUE = 64
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+LATENCY_WINDOW = 1024 # Percentiles are reported over this many most recent renders
+
+# A render whose worker pool broke under it is retried on a fresh pool this many times
+RENDER_RETRIES = 1
+
+CONTENT_TYPES = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "pdf": "application/pdf",
+}
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def confine(root: str, path: str, what: str) -> str:
+    """
+    Resolve path against root (symlinks included) and return it absolute.
+
+    Raises:
+        ValueError: If the path resolves to somewhere outside root
+    """
+    resolved = os.path.realpath(os.path.join(root, path))
+
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{what} '{path}' is outside the server root {root}")
+
+    return resolved
+
+
+def _confine_input(root: str, value: str, what: str) -> str:
+    # Anything the pipeline would open as a file is a path and must be under
+    # root; anything else is inline (JSON data or YAML layer text)
+    if os.path.exists(value) or os.path.exists(os.path.join(root, value)):
+        return confine(root, value, what)
+
+    return value
+
+
+@dataclass
+class RenderRequest:
+    """
+    The body of a POST /render. Data is a JSON string or path like the CLI's
+    --data, or inline JSON. With output set the chart is written there and its
+    path returned; otherwise the image bytes (in format) are returned. Paths
+    are relative to the server root and may not lead outside it.
+    """
+    chart_type: str
+    data: Any
+    layers: List[str] = field(default_factory=list)
+    mods: List[str] = field(default_factory=list)
+    output: Optional[str] = None
+    format: str = "svg"
+    renderer: str = "plotly"
+    cache: bool = True
+
+    @classmethod
+    def from_json(cls, obj: Any, root: str) -> "RenderRequest":
+        if not isinstance(obj, dict):
+            raise ValueError("Request body must be a JSON object")
+
+        for key in ("chart_type", "data"):
+            if key not in obj:
+                raise ValueError(f"Request is missing '{key}'")
+
+        unknown = set(obj) - set(cls.__dataclass_fields__)
+
+        if unknown:
+            raise ValueError(f"Request has unknown fields: {', '.join(sorted(unknown))}")
+
+        request = cls(**obj)
+
+        if request.chart_type not in CHART_TYPES:
+            raise ValueError(f"Unknown chart_type '{request.chart_type}'")
+
+        if request.renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer '{request.renderer}'")
+
+        if not isinstance(request.layers, list) or not isinstance(request.mods, list):
+            raise ValueError("'layers' and 'mods' must be lists of paths")
+
+        if request.output is None and request.format not in CONTENT_TYPES:
+            raise ValueError(f"Unknown format '{request.format}'")
+
+        # Data may be given inline rather than as a path or JSON string
+        if not isinstance(request.data, str):
+            request.data = json.dumps(request.data)
+
+        request.data = _confine_input(root, request.data, "Data")
+        request.layers = [_confine_input(root, layer, "Layer") for layer in request.layers]
+        request.mods = [confine(root, mod, "Mod") for mod in request.mods]
+
+        if request.output is not None:
+            request.output = confine(root, request.output, "Output")
+
+        return request
+
+
+# Per worker process caches, created once by _start_render_worker
+_worker_state: Dict[str, Any] = {}
+
+
+def _start_render_worker(layers_dir: Optional[str]) -> None:
+    from chasm.library.cache import RenderCache
+    from chasm.library.layer import preload_layers
+    from chasm.library.layout import LayoutCache
+
+    # Forked workers inherit the daemon's asyncio signal wakeup fd, so a signal
+    # to a worker (like the SIGTERM a broken pool sends its survivors) would
+    # otherwise stop the daemon. Ctrl+C is left to the daemon's shutdown.
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    _start_worker()
+
+    _worker_state["cache"] = RenderCache()
+    _worker_state["layouts"] = LayoutCache(DEFAULT_CACHE_DIR)
+
+    if layers_dir:
+        preload_layers(layers_dir)
+
+
+def _render(request: RenderRequest) -> Union[str, bytes]:
+    from chasm.library.chart import make_chart
+
+    cache = _worker_state.get("cache") if request.cache else None
+
+    def render_to(output_path: str) -> None:
+        make_chart(
+            request.chart_type,
+            raw_data=request.data,
+            layer_paths=request.layers,
+            mod_paths=request.mods,
+            output_path=output_path,
+            cache=cache,
+            renderer=request.renderer,
+            layouts=_worker_state.get("layouts"),
+        )
+
+    if request.output is not None:
+        render_to(request.output)
+        return request.output
+
+    handle, temp_path = tempfile.mkstemp(suffix=f".{request.format}")
+    os.close(handle)
+
+    try:
+        render_to(temp_path)
+
+        with open(temp_path, 'rb') as file:
+            return file.read()
+    finally:
+        os.remove(temp_path)
+
+
+def percentile(samples: List[float], fraction: float) -> Optional[float]:
+    # Nearest-rank percentile; samples must be sorted
+    if not samples:
+        return None
+
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))]
+
+
+class RenderServer:
+    """
+    Local render daemon. An asyncio front end speaks just enough HTTP/1.1
+    (with keep-alive) for POST /render and GET /stats, over TCP or a Unix
+    socket. Accepted renders wait in a queue of at most max_queue requests
+    (further requests get a 503) and are run by a pool of worker processes,
+    each keeping a warm kaleido session and its own layer, layout, program
+    and render caches between requests. If a worker dies, the pool is
+    replaced and the renders it took down are retried on the new one.
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = DEFAULT_MAX_QUEUE, layers_dir: str = None, root: str = "."):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.layers_dir = layers_dir
+        self.root = os.path.realpath(root)
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.restarts = 0
+        self.started = time.monotonic()
+
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_limit": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "pool_restarts": self.restarts,
+            "uptime_s": round(time.monotonic() - self.started, 3),
+            "latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(latencies, 0.50),
+                "p90": percentile(latencies, 0.90),
+                "p99": percentile(latencies, 0.99),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: str = None) -> None:
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._executor = self._start_executor()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+        if socket_path:
+            server = await asyncio.start_unix_server(self._handle, path=socket_path)
+        else:
+            server = await asyncio.start_server(self._handle, host=host, port=port)
+
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+            self._executor.shutdown(wait=True)
+
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+    def _start_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_start_render_worker, initargs=(self.layers_dir,))
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        # Every render that was on the broken pool lands here; only the first replaces it
+        if self._executor is not broken:
+            return
+
+        broken.shutdown(wait=False)
+        self._executor = self._start_executor()
+        self.restarts += 1
+
+    async def _render(self, request: RenderRequest) -> Union[str, bytes]:
+        loop = asyncio.get_running_loop()
+        attempt = 0
+
+        while True:
+            executor = self._executor
+
+            try:
+                return await loop.run_in_executor(executor, _render, request)
+            except BrokenProcessPool:
+                # A worker died (killed, or crashed in the browser) and a
+                # process pool can't recover from that; swap in a fresh one
+                self._replace_executor(executor)
+
+                if attempt == RENDER_RETRIES:
+                    raise
+
+                attempt += 1
+
+    async def _work(self) -> None:
+        while True:
+            request, future, received = await self._queue.get()
+            self.in_flight += 1
+
+            try:
+                result = await self._render(request)
+                self.completed += 1
+
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                self.failed += 1
+
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.in_flight -= 1
+                self._latencies.append((time.monotonic() - received) * 1000)
+                self._queue.task_done()
+
+    async def _submit(self, request: RenderRequest) -> Union[str, bytes]:
+        future = asyncio.get_running_loop().create_future()
+
+        try:
+            self._queue.put_nowait((request, future, time.monotonic()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise HttpError(503, f"Render queue is full ({self.max_queue} pending)")
+
+        return await future
+
+    async def _route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, bytes, str]:
+        if path == "/stats":
+            if method != "GET":
+                raise HttpError(405, "Use GET /stats")
+
+            return 200, json.dumps(self.stats()).encode(), "application/json"
+
+        if path == "/render":
+            if method != "POST":
+                raise HttpError(405, "Use POST /render")
+
+            # Browsers send an Origin with every cross-site request, and can't
+            # send a JSON content type cross-site without a preflight, so
+            # together these keep web pages from driving the daemon
+            if "origin" in headers:
+                raise HttpError(403, "Cross-origin requests are not accepted")
+
+            if headers.get("content-type", "").split(";", 1)[0].strip().lower() != "application/json":
+                raise HttpError(415, "POST /render needs Content-Type: application/json")
+
+            try:
+                request = RenderRequest.from_json(json.loads(body or b"null"), self.root)
+            except (ValueError, TypeError) as e:
+                raise HttpError(400, str(e))
+
+            try:
+                result = await self._submit(request)
+            except HttpError:
+                raise
+            except ValueError as e:
+                # Bad data, layers or mods surface as ValueErrors from the pipeline
+                raise HttpError(400, f"{type(e).__name__}: {e}")
+            except Exception as e:
+                raise HttpError(500, f"{type(e).__name__}: {e}")
+
+            if isinstance(result, bytes):
+                return 200, result, CONTENT_TYPES[request.format]
+
+            return 200, json.dumps({"output": result}).encode(), "application/json"
+
+        raise HttpError(404, f"No route for {path}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    parsed = await _read_request(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HttpError as e:
+                    writer.write(_response(e.status, json.dumps({"error": str(e)}).encode(), "application/json", keep_alive=False))
+                    break
+
+                if parsed is None:
+                    break
+
+                method, path, headers, body = parsed
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                try:
+                    status, payload, content_type = await self._route(method, path, headers, body)
+                except HttpError as e:
+                    status, payload, content_type = e.status, json.dumps({"error": str(e)}).encode(), "application/json"
+
+                writer.write(_response(status, payload, content_type, keep_alive))
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    line = await reader.readline()
+
+    if not line:
+        return None
+
+    try:
+        method, target, _ = line.decode('latin-1').split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+
+    headers = {}
+
+    while True:
+        line = await reader.readline()
+
+        if line in (b"\r\n", b"\n", b""):
+            break
+
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Malformed Content-Length")
+
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Request body is larger than {MAX_BODY_BYTES} bytes")
+
+    body = await reader.readexactly(length) if length else b""
+
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _response(status: int, body: bytes, content_type: str, keep_alive: bool) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+
+    return head.encode('latin-1') + body
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: str = None, workers: int = None, max_queue: int = DEFAULT_MAX_QUEUE, layers_dir: str = None, root: str = ".") -> None:
+    asyncio.run(RenderServer(workers=workers, max_queue=max_queue, layers_dir=layers_dir, root=root).serve(host, port, socket_path))
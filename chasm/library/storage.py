@@ -0,0 +1,212 @@
+import os, json
+import numpy as np
+from typing import Any, Iterable, Optional
+from chasm.library.dataset import Dataset
+
+
+# Single file Arrow IPC extensions; any directory is treated as .npy columns
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+NPY_SCHEMA_FILE = "columns.json"
+
+
+def get_binary_format(path: Any) -> Optional[str]:
+    if not isinstance(path, str):
+        return None
+
+    if os.path.isdir(path):
+        return "npy"
+
+    if os.path.isfile(path) and os.path.splitext(path)[1].lower() in ARROW_EXTENSIONS:
+        return "arrow"
+
+    return None
+
+
+def read_binary(path: str) -> Dataset:
+    if get_binary_format(path) == "npy":
+        return read_npy_dir(path)
+
+    return read_arrow(path)
+
+
+def write_binary(dataset: Dataset, path: str) -> None:
+    """Write to Arrow IPC if path has an Arrow extension, otherwise to a directory of .npy columns"""
+    if os.path.splitext(path)[1].lower() in ARROW_EXTENSIONS:
+        write_arrow(dataset, path)
+    else:
+        write_npy_dir(dataset, path)
+
+
+def read_npy_dir(path: str) -> Dataset:
+    """
+    Open a directory of .npy files as a dataset, one column per file. Columns
+    are memory-mapped, so only the pages a chart or mod actually touches are
+    read from disk. Column order comes from columns.json when present,
+    otherwise from the sorted file names.
+
+    Raises:
+        ValueError: If a column holds Python objects, which can't be mapped
+    """
+    schema_path = os.path.join(path, NPY_SCHEMA_FILE)
+
+    if os.path.isfile(schema_path):
+        with open(schema_path, 'r', encoding='utf-8') as file:
+            keys = json.load(file)
+    else:
+        keys = sorted(name[:-len(".npy")] for name in os.listdir(path) if name.endswith(".npy"))
+
+    dataset = Dataset()
+
+    for key in keys:
+        # np.load refuses to map (or unpickle) object arrays, and raises ValueError
+        dataset[key] = np.load(os.path.join(path, f"{key}.npy"), mmap_mode='r')
+
+    return dataset
+
+
+def _storable_column(key: str, column: np.ndarray) -> np.ndarray:
+    if column.dtype != object:
+        return column
+
+    # Object columns can't be memory-mapped, so store text and booleans natively
+    values = column.tolist()
+
+    if all(isinstance(value, str) for value in values):
+        return np.array(values, dtype=str)
+
+    if all(isinstance(value, bool) for value in values):
+        return np.array(values, dtype=bool)
+
+    # Numeric columns with gaps (e.g. rows appended by a mod) keep the gaps as NaN
+    if all(value is None or type(value) in (int, float) for value in values):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    raise ValueError(f"Column {key} mixes value types and can't be stored in a binary columnar format")
+
+
+def write_npy_dir(dataset: Dataset, path: str) -> None:
+    for key in dataset.keys():
+        if os.sep in key or (os.altsep and os.altsep in key):
+            raise ValueError(f"Column {key} can't be used as a file name")
+
+    # Convert everything up front so a bad column doesn't leave a partial directory
+    columns = {key: _storable_column(key, dataset[key]) for key in dataset.keys()}
+
+    os.makedirs(path, exist_ok=True)
+
+    for key, column in columns.items():
+        np.save(os.path.join(path, f"{key}.npy"), column, allow_pickle=False)
+
+    with open(os.path.join(path, NPY_SCHEMA_FILE), 'w', encoding='utf-8') as file:
+        json.dump(dataset.keys(), file)
+
+
+def write_npy_dir_chunks(chunks: Iterable[Dataset], path: str, rows: int) -> int:
+    """
+    Write a dataset of rows rows, arriving in chunks, as a directory of .npy
+    columns. Each column file is created at its full size up front and
+    filled through a memory map, so only one chunk is ever held in memory.
+    Column types are taken from the first chunk. Returns the rows written.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    columns = None
+    written = 0
+
+    for chunk in chunks:
+        if columns is None:
+            for key in chunk.keys():
+                if os.sep in key or (os.altsep and os.altsep in key):
+                    raise ValueError(f"Column {key} can't be used as a file name")
+
+            first = {key: _storable_column(key, chunk[key]) for key in chunk.keys()}
+            columns = {
+                key: np.lib.format.open_memmap(os.path.join(path, f"{key}.npy"), mode='w+', dtype=column.dtype, shape=(rows,))
+                for key, column in first.items()
+            }
+
+            with open(os.path.join(path, NPY_SCHEMA_FILE), 'w', encoding='utf-8') as file:
+                json.dump(chunk.keys(), file)
+
+        if written + len(chunk) > rows:
+            raise ValueError(f"Received more than the {rows} rows expected for {path}")
+
+        for key, column in columns.items():
+            column[written:written + len(chunk)] = _storable_column(key, chunk[key])
+
+        written += len(chunk)
+
+    if columns is not None:
+        for column in columns.values():
+            column.flush()
+
+    if written != rows:
+        raise ValueError(f"Received {written} of the {rows} rows expected for {path}")
+
+    return written
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("Arrow IPC files require pyarrow; install it with `pip install pyarrow` (or the chasm[arrow] extra)")
+
+    return pyarrow
+
+
+def read_arrow(path: str) -> Dataset:
+    """
+    Open an Arrow IPC file as a dataset. The file is memory-mapped and numeric
+    columns without nulls are exposed as zero-copy numpy views of the mapping.
+    """
+    pa = _import_pyarrow()
+
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    dataset = Dataset()
+
+    for key in table.column_names:
+        column = table.column(key)
+
+        if column.num_chunks == 1:
+            column = column.chunk(0)
+
+        # Strings and nulls come back as object arrays; anything else is a view
+        dataset[key] = column.to_numpy(zero_copy_only=False)
+
+    return dataset
+
+
+def write_arrow(dataset: Dataset, path: str) -> None:
+    pa = _import_pyarrow()
+
+    table = pa.table({key: pa.array(dataset[key].tolist() if dataset[key].dtype == object else dataset[key]) for key in dataset.keys()})
+
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def write_arrow_chunks(chunks: Iterable[Dataset], path: str) -> int:
+    """Write chunks to an Arrow IPC file as one record batch each. Returns the rows written."""
+    pa = _import_pyarrow()
+
+    writer = None
+    written = 0
+
+    with pa.OSFile(path, 'wb') as sink:
+        for chunk in chunks:
+            batch = pa.record_batch([pa.array(chunk[key].tolist() if chunk[key].dtype == object else chunk[key]) for key in chunk.keys()], names=chunk.keys())
+
+            if writer is None:
+                writer = pa.ipc.new_file(sink, batch.schema)
+
+            writer.write_batch(batch)
+            written += len(chunk)
+
+        if writer is not None:
+            writer.close()
+
+    return written
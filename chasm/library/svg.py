@@ -0,0 +1,512 @@
+import math
+import numpy as np
+from xml.sax.saxutils import escape, quoteattr
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from chasm.library.config import ChartConfig
+from chasm.library.dataset import Dataset, to_float_column
+from chasm.library.decimate import Decimation, decimate_series, require_x_column
+
+
+# Canvas and styling defaults mirror plotly's, so both renderers lay a chart out alike
+WIDTH = 700
+HEIGHT = 500
+
+FONT_FAMILY = "'Open Sans', verdana, arial, sans-serif"
+FONT_SIZE = 12
+FONT_COLOR = "#2a3f5f"
+CHAR_WIDTH = 7 # Average glyph width at FONT_SIZE, used to size labels without a font engine
+
+BAR_GAP = 0.2
+BAR_LINE_COLOR = "#e5ecf6"
+LINE_WIDTH = 2
+MARKER_RADIUS = 3
+ZEROLINE_COLOR = "#ffffff"
+ZEROLINE_WIDTH = 2
+
+AUTOMODE_MAX_POINTS = 20 # Scatter traces without a mode draw markers below this many points
+LEGEND_SWATCH = 30
+
+TICK_TARGET = 6
+
+
+@dataclass
+class Series:
+    key: str
+    name: str
+    values: np.ndarray # float, NaN where the datum is missing
+    color: str
+    index: np.ndarray = None # Rows kept by decimation, or None for every row
+    bar: bool = False
+    mode: str = "markers"
+    secondary: bool = False
+
+
+@dataclass
+class Axis:
+    """
+    Maps data values onto one pixel span. Category axes place each category at
+    the centre of an equal band; linear axes interpolate between lo and hi.
+    """
+    start: float
+    end: float
+    lo: float = 0.0
+    hi: float = 1.0
+    categories: List[str] = None
+
+    @property
+    def band(self) -> float:
+        return (self.end - self.start) / max(len(self.categories), 1)
+
+    def __call__(self, value: float) -> float:
+        if self.categories is not None:
+            return self.start + (value + 0.5) * self.band
+
+        return self.start + (value - self.lo) / (self.hi - self.lo) * (self.end - self.start)
+
+    def ticks(self) -> List[Tuple[float, str]]:
+        if self.categories is not None:
+            return [(i, label) for i, label in enumerate(self.categories)]
+
+        step = _tick_step(self.lo, self.hi)
+        values = _tick_values(self.lo, self.hi, step)
+
+        return list(zip(values, _format_ticks(values, step)))
+
+
+def _categories(column: np.ndarray) -> Tuple[List[str], np.ndarray]:
+    index = {}
+    positions = np.empty(len(column), dtype=float)
+
+    for i, value in enumerate(column):
+        positions[i] = index.setdefault(str(value), len(index))
+
+    return list(index), positions
+
+
+def _positions(positions: np.ndarray, series: Series) -> np.ndarray:
+    return positions if series.index is None else positions[series.index]
+
+
+def _tick_step(lo: float, hi: float) -> float:
+    raw = (hi - lo) / TICK_TARGET
+    magnitude = 10 ** math.floor(math.log10(raw))
+
+    for multiple in (1, 2, 2.5, 5, 10):
+        if raw <= multiple * magnitude:
+            return multiple * magnitude
+
+    return 10 * magnitude
+
+
+def _tick_values(lo: float, hi: float, step: float) -> List[float]:
+    first = math.ceil(lo / step - 1e-9)
+    last = math.floor(hi / step + 1e-9)
+
+    return [i * step for i in range(first, last + 1)]
+
+
+def _format_ticks(values: List[float], step: float) -> List[str]:
+    # Large values share one SI suffix across the axis, as plotly's default tickformat does
+    scale, suffix = 1.0, ""
+    largest = max((abs(value) for value in values), default=0)
+
+    for threshold, candidate_scale, candidate_suffix in ((1e9, 1e9, "G"), (1e6, 1e6, "M"), (1e4, 1e3, "k")):
+        if largest >= threshold:
+            scale, suffix = candidate_scale, candidate_suffix
+            break
+
+    decimals = max(0, -math.floor(math.log10(step / scale) + 1e-9))
+
+    return [f"{value / scale:.{decimals}f}{suffix}" if abs(value) >= step * 1e-9 else "0" for value in values]
+
+
+def _domain_range(positions: np.ndarray) -> Tuple[float, float]:
+    finite = positions[np.isfinite(positions)]
+
+    if not len(finite):
+        return 0.0, 1.0
+
+    lo, hi = float(finite.min()), float(finite.max())
+    pad = (hi - lo) * 0.05 if hi > lo else 1.0
+
+    return lo - pad, hi + pad
+
+
+def _value_range(series: List[Series], stacked: bool, include_zero: bool) -> Tuple[float, float]:
+    columns = [s.values for s in series]
+
+    if stacked:
+        bars = [np.nan_to_num(s.values) for s in series if s.bar]
+
+        if bars:
+            stack = np.vstack(bars)
+            columns += [np.where(stack > 0, stack, 0).sum(axis=0), np.where(stack < 0, stack, 0).sum(axis=0)]
+
+    finite = [c[np.isfinite(c)] for c in columns]
+    finite = np.concatenate(finite) if finite else np.empty(0)
+
+    if not len(finite):
+        return 0.0, 1.0
+
+    lo, hi = float(finite.min()), float(finite.max())
+
+    if include_zero:
+        lo, hi = min(lo, 0.0), max(hi, 0.0)
+
+    if lo == hi:
+        lo, hi = lo - 1, hi + 1
+
+    pad = (hi - lo) * 0.05
+
+    # Bars grow out of zero, so the range is not padded past it
+    return (lo if include_zero and lo == 0 else lo - pad), (hi if include_zero and hi == 0 else hi + pad)
+
+
+def build_series(chart_type: str, data: Dataset, config: ChartConfig, decimations: Dict[str, Decimation] = None) -> List[Series]:
+    """
+    Collect the series of a chart in plotly's trace order, so colours are drawn
+    from the colorway exactly as the plotly renderer would assign them.
+    """
+    series = []
+
+    if chart_type in ("bar", "stackedbar"):
+        keys = config.data_ykeys + config.data_skeys + config.data_yskeys
+    else:
+        keys = config.data_ykeys
+
+    decimations = decimations or {}
+
+    for key in keys:
+        decimation = decimations.get(key)
+        index = decimation.index if decimation is not None else None
+        values = to_float_column(data[key])
+
+        s = Series(
+            key=key,
+            name=config.data_ykey_name_lookup.get(key, f"Series {key}"),
+            values=values if index is None else values[index],
+            color=config.chart_colorway[len(series) % len(config.chart_colorway)],
+            index=index,
+        )
+
+        if chart_type not in ("bar", "stackedbar"):
+            s.mode = config.get_config(key, "scatter_mode")
+        elif key in config.data_ykeys:
+            s.bar = True
+        else:
+            s.mode = "lines+markers" if len(data) < AUTOMODE_MAX_POINTS else "lines"
+            s.secondary = key in config.data_skeys and key not in config.data_yskeys
+
+        series.append(s)
+
+    return series
+
+
+class SvgWriter:
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.parts = []
+
+    def rect(self, x: float, y: float, w: float, h: float, fill: str, stroke: str = None, stroke_width: float = 0) -> None:
+        stroke_attrs = f' stroke={quoteattr(stroke)} stroke-width="{stroke_width:g}"' if stroke and stroke_width else ""
+        self.parts.append(f'<rect x="{x:.2f}" y="{y:.2f}" width="{max(w, 0):.2f}" height="{max(h, 0):.2f}" fill={quoteattr(fill)}{stroke_attrs}/>')
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, stroke: str, stroke_width: float = 1) -> None:
+        self.parts.append(f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" stroke={quoteattr(stroke)} stroke-width="{stroke_width:g}"/>')
+
+    def polyline(self, points: List[Tuple[float, float]], stroke: str, stroke_width: float) -> None:
+        coords = " ".join(f"{x:.2f},{y:.2f}" for x, y in points)
+        self.parts.append(f'<polyline points="{coords}" fill="none" stroke={quoteattr(stroke)} stroke-width="{stroke_width:g}" stroke-linejoin="round"/>')
+
+    def circle(self, x: float, y: float, r: float, fill: str, stroke: str = None, stroke_width: float = 0) -> None:
+        stroke_attrs = f' stroke={quoteattr(stroke)} stroke-width="{stroke_width:g}"' if stroke and stroke_width else ""
+        self.parts.append(f'<circle cx="{x:.2f}" cy="{y:.2f}" r="{r:g}" fill={quoteattr(fill)}{stroke_attrs}/>')
+
+    def text(self, x: float, y: float, content: str, anchor: str = "middle", size: int = FONT_SIZE, weight: int = None, rotate: bool = False) -> None:
+        weight_attr = f' font-weight={quoteattr(str(weight))}' if weight else ""
+        rotate_attr = f' transform="rotate(-90 {x:.2f} {y:.2f})"' if rotate else ""
+        self.parts.append(
+            f'<text x="{x:.2f}" y="{y:.2f}" text-anchor={quoteattr(anchor)} font-family={quoteattr(FONT_FAMILY)} '
+            f'font-size="{size}" fill={quoteattr(FONT_COLOR)}{weight_attr}{rotate_attr}>{escape(str(content))}</text>'
+        )
+
+    def render(self) -> str:
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+            f'viewBox="0 0 {self.width} {self.height}">' + "".join(self.parts) + "</svg>\n"
+        )
+
+
+def _label_width(labels: List[str]) -> int:
+    return max((len(label) for label in labels), default=0) * CHAR_WIDTH
+
+
+def _thin(ticks: List[Tuple[float, str]], span: float, per_label: float) -> List[Tuple[float, str]]:
+    # Categories that wouldn't fit are skipped at a regular stride, like plotly's auto tick spacing
+    fits = max(int(span // max(per_label, 1)), 1)
+    stride = math.ceil(len(ticks) / fits)
+
+    return ticks[::stride]
+
+
+def render_svg(chart_type: str, data: Dataset, config: ChartConfig, decimations: Dict[str, Decimation] = None) -> str:
+    """
+    Render a bar, line or scatter chart straight to an SVG document, without
+    going through plotly or a browser. config must already have its keys
+    computed and its chart type settings applied (see configure_chart_type).
+    Series are drawn from decimations, which are computed if not given.
+    """
+    x_column = require_x_column(data, config)
+
+    if decimations is None:
+        decimations = decimate_series(chart_type, data, config)
+
+    series = build_series(chart_type, data, config, decimations)
+    horizontal = config.orientation == 'h'
+    stacked = config.chart_layout_barmode in ("stack", "relative")
+    has_bars = any(s.bar for s in series)
+
+    categorical = has_bars or x_column.dtype.kind not in "iuf"
+
+    if categorical:
+        categories, positions = _categories(x_column)
+    else:
+        categories, positions = None, x_column.astype(float)
+
+    # Horizontal secondary series share the value axis, as plotly overlays only y axes
+    if horizontal:
+        for s in series:
+            s.secondary = False
+
+    primary = [s for s in series if not s.secondary]
+    secondary = [s for s in series if s.secondary]
+
+    value_lo, value_hi = _value_range(primary, stacked, include_zero=has_bars)
+
+    # The domain axis is the one the x column lies along; the value axis carries the series
+    domain_settings, value_settings = ("yaxis", "xaxis") if horizontal else ("xaxis", "yaxis")
+
+    def setting(axis: str, name: str):
+        return getattr(config, f"chart_{axis}_{name}")
+
+    def shows_labels(axis: str) -> bool:
+        return setting(axis, "visible") and setting(axis, "showticklabels")
+
+    # Provisional axes only feed label sizes into the margins; they are rebuilt below
+    if categorical:
+        domain_labels = categories
+    else:
+        domain_labels = [label for _, label in Axis(0, 1, *_domain_range(positions)).ticks()]
+
+    value_labels = [label for _, label in Axis(0, 1, value_lo, value_hi).ticks()]
+    x_labels, y_labels = (value_labels, domain_labels) if horizontal else (domain_labels, value_labels)
+
+    margin_l, margin_r, margin_t, margin_b = config.chart_margin_l, config.chart_margin_r, config.chart_margin_t, config.chart_margin_b
+
+    # Automargin: margins grow to fit tick labels, axis titles and the chart title
+    if config.chart_automargin:
+        left = (_label_width(y_labels) + config.chart_yaxis_ticklabelstandoff if shows_labels("yaxis") else 0)
+        left += FONT_SIZE + 10 if config.chart_yaxis_title and config.chart_yaxis_visible else 0
+        bottom = (FONT_SIZE + config.chart_xaxis_ticklabelstandoff if shows_labels("xaxis") else 0)
+        bottom += FONT_SIZE + 10 if config.chart_xaxis_title and config.chart_xaxis_visible else 0
+
+        margin_l = max(margin_l, left)
+        margin_b = max(margin_b, bottom)
+
+        if secondary and not horizontal and shows_labels("yaxis"):
+            secondary_labels = [label for _, label in Axis(0, 1, *_value_range(secondary, False, False)).ticks()]
+            margin_r = max(margin_r, _label_width(secondary_labels) + config.chart_yaxis_ticklabelstandoff)
+
+    if config.chart_title_text and config.chart_title_automargin:
+        margin_t = max(margin_t, config.chart_title_pad_t + config.chart_title_font_size + config.chart_title_pad_b)
+
+    legend_width = 0
+
+    if config.chart_layout_showlegend and series:
+        legend_width = LEGEND_SWATCH + 10 + _label_width([s.name for s in series])
+
+    plot_l, plot_r = margin_l, WIDTH - margin_r - legend_width
+    plot_t, plot_b = margin_t, HEIGHT - margin_b
+
+    # Pixel axes run left to right and bottom to top, as plotly's do
+    def make_axis(vertical: bool, lo: float, hi: float, cats: List[str] = None) -> Axis:
+        if vertical:
+            return Axis(plot_b, plot_t, lo, hi, cats)
+
+        return Axis(plot_l, plot_r, lo, hi, cats)
+
+    if categorical:
+        domain = make_axis(horizontal, 0, 1, categories)
+    else:
+        domain = make_axis(horizontal, *_domain_range(positions))
+
+    values = make_axis(not horizontal, value_lo, value_hi)
+    secondary_values = make_axis(not horizontal, *_value_range(secondary, False, False)) if secondary else None
+
+    def point(position: float, value: float, value_axis: Axis) -> Tuple[float, float]:
+        if horizontal:
+            return value_axis(value), domain(position)
+
+        return domain(position), value_axis(value)
+
+    svg = SvgWriter(WIDTH, HEIGHT)
+    svg.rect(0, 0, WIDTH, HEIGHT, config.chart_paper_bgcolor)
+    svg.rect(plot_l, plot_t, plot_r - plot_l, plot_b - plot_t, config.chart_plot_bgcolor)
+
+    axes = {domain_settings: domain, value_settings: values}
+
+    # Gridlines and zerolines sit underneath the data
+    for name, axis in axes.items():
+        if not setting(name, "visible"):
+            continue
+
+        vertical_lines = name == "xaxis"
+
+        if setting(name, "showgrid"):
+            for value, _ in axis.ticks():
+                pixel = axis(value)
+
+                if vertical_lines:
+                    svg.line(pixel, plot_t, pixel, plot_b, setting(name, "gridcolor"))
+                else:
+                    svg.line(plot_l, pixel, plot_r, pixel, setting(name, "gridcolor"))
+
+        if setting(name, "zeroline") and axis.categories is None and axis.lo < 0 < axis.hi:
+            pixel = axis(0)
+
+            if vertical_lines:
+                svg.line(pixel, plot_t, pixel, plot_b, ZEROLINE_COLOR, ZEROLINE_WIDTH)
+            else:
+                svg.line(plot_l, pixel, plot_r, pixel, ZEROLINE_COLOR, ZEROLINE_WIDTH)
+
+    bars = [s for s in series if s.bar]
+
+    if bars:
+        group = abs(domain.band) * (1 - BAR_GAP)
+        width = group if stacked or config.chart_layout_barmode == "overlay" else group / len(bars)
+        base_pos = np.zeros(len(categories))
+        base_neg = np.zeros(len(categories))
+
+        for n, s in enumerate(bars):
+            offset = 0.0 if width == group else -group / 2 + (n + 0.5) * width
+            line_width = config.get_config(s.key, "marker_line_width")
+
+            for position, value in zip(_positions(positions, s).astype(int), s.values):
+                if not np.isfinite(value):
+                    continue
+
+                base = 0.0
+
+                if stacked:
+                    bases = base_pos if value >= 0 else base_neg
+                    base = bases[position]
+                    bases[position] += value
+
+                centre = domain(position) + offset * (-1 if horizontal else 1)
+                start, end = sorted((values(base), values(base + value)))
+
+                if horizontal:
+                    svg.rect(start, centre - width / 2, end - start, width, s.color, BAR_LINE_COLOR, line_width)
+                else:
+                    svg.rect(centre - width / 2, start, width, end - start, s.color, BAR_LINE_COLOR, line_width)
+
+    for s in series:
+        if s.bar:
+            continue
+
+        value_axis = secondary_values if s.secondary else values
+        points = [point(p, v, value_axis) if np.isfinite(p) and np.isfinite(v) else None for p, v in zip(_positions(positions, s), s.values)]
+
+        if "lines" in s.mode:
+            segment = []
+
+            # Missing values break the line rather than being bridged
+            for p in points + [None]:
+                if p is not None:
+                    segment.append(p)
+                    continue
+
+                if len(segment) > 1:
+                    svg.polyline(segment, s.color, LINE_WIDTH)
+
+                segment = []
+
+        if "markers" in s.mode:
+            for p in points:
+                if p is not None:
+                    svg.circle(p[0], p[1], MARKER_RADIUS, s.color, BAR_LINE_COLOR, config.get_config(s.key, "marker_line_width"))
+
+    # Tick labels
+    if secondary_values is not None and not horizontal:
+        axes["yaxis2"] = secondary_values
+
+    for name, axis in axes.items():
+        settings = name[:5]
+
+        if not shows_labels(settings):
+            continue
+
+        standoff = setting(settings, "ticklabelstandoff")
+        ticks = axis.ticks()
+
+        if name == "xaxis":
+            if axis.categories is not None:
+                ticks = _thin(ticks, plot_r - plot_l, _label_width([label for _, label in ticks]) + CHAR_WIDTH)
+
+            for value, label in ticks:
+                svg.text(axis(value), plot_b + standoff + FONT_SIZE, label)
+        else:
+            if axis.categories is not None:
+                ticks = _thin(ticks, plot_b - plot_t, FONT_SIZE + 4)
+
+            for value, label in ticks:
+                if name == "yaxis2":
+                    svg.text(plot_r + standoff, axis(value) + FONT_SIZE / 3, label, anchor="start")
+                else:
+                    svg.text(plot_l - standoff, axis(value) + FONT_SIZE / 3, label, anchor="end")
+
+    if config.chart_xaxis_title and config.chart_xaxis_visible:
+        labels_height = FONT_SIZE + config.chart_xaxis_ticklabelstandoff if shows_labels("xaxis") else 0
+        svg.text((plot_l + plot_r) / 2, plot_b + labels_height + FONT_SIZE + 8, config.chart_xaxis_title)
+
+    if config.chart_yaxis_title and config.chart_yaxis_visible:
+        svg.text(FONT_SIZE + 2, (plot_t + plot_b) / 2, config.chart_yaxis_title, rotate=True)
+
+    if config.chart_title_text:
+        svg.text(
+            WIDTH * 0.05 + config.chart_title_pad_l,
+            config.chart_title_pad_t + config.chart_title_font_size,
+            config.chart_title_text,
+            anchor="start",
+            size=config.chart_title_font_size,
+            weight=config.chart_title_font_weight,
+        )
+
+    if legend_width:
+        x = WIDTH - margin_r - legend_width + 10
+
+        for n, s in enumerate(series):
+            y = plot_t + 10 + n * (FONT_SIZE + 8)
+
+            if s.bar:
+                svg.rect(x + 8, y - 6, LEGEND_SWATCH - 16, 12, s.color)
+            else:
+                if "lines" in s.mode:
+                    svg.line(x, y, x + LEGEND_SWATCH - 4, y, s.color, LINE_WIDTH)
+                if "markers" in s.mode:
+                    svg.circle(x + (LEGEND_SWATCH - 4) / 2, y, MARKER_RADIUS, s.color)
+
+            svg.text(x + LEGEND_SWATCH + 4, y + FONT_SIZE / 3, s.name, anchor="start")
+
+    return svg.render()
+
+
+def write_svg(chart_type: str, data: Dataset, config: ChartConfig, output_path: str, decimations: Dict[str, Decimation] = None) -> None:
+    if not output_path.lower().endswith(".svg"):
+        raise ValueError(f"The native renderer only writes SVG, not {output_path}")
+
+    with open(output_path, 'w', encoding='utf-8') as file:
+        file.write(render_svg(chart_type, data, config, decimations))
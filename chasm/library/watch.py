@@ -0,0 +1,163 @@
+import os
+import time
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+from chasm.library.chart import configure_chart_type, render_chart
+from chasm.library.config import ChartConfig
+from chasm.library.data import load_instructions, read_data_input
+from chasm.library.dataset import Dataset
+from chasm.library.decimate import Decimation
+from chasm.library.engine import run_instructions
+from chasm.library.layer import get_chart_config, layer_identity
+from chasm.library.layout import LayoutCache
+from chasm.library.profile import stage
+from chasm.library.render import warm_renderer
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+
+# The stages whose outputs are kept between renders, in pipeline order;
+# the first three each start where one kind of input comes in
+WATCH_STAGES = ("parse", "mods", "config", "figure")
+
+DEFAULT_WATCH_INTERVAL = 0.5
+
+
+def input_identity(path: Any) -> Tuple:
+    """
+    Identify an input by its current version: a file's mtime and size, or
+    every file's for a directory (of .npy columns). Anything that isn't an
+    existing path is inline input, identified by itself.
+    """
+    if isinstance(path, str) and os.path.isfile(path):
+        stat = os.stat(path)
+        return ("file", stat.st_mtime_ns, stat.st_size)
+
+    if isinstance(path, str) and os.path.isdir(path):
+        entries = []
+
+        for entry in sorted(os.scandir(path), key=lambda entry: entry.name):
+            stat = entry.stat()
+            entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+
+        return ("directory", tuple(entries))
+
+    return ("inline", path)
+
+
+class ChartWatch:
+    """
+    A chart kept in memory between renders, with the output of each stage:
+    the data as parsed, the data put through its mods, the resolved config
+    and the figure. A render recomputes only the stages at or after the
+    first whose inputs changed, so an edited layer reuses the parsed and
+    modded data, and an edited mod reuses the parsed data.
+    """
+
+    def __init__(self, chart_type: str, raw_data: Any, layer_paths: List[str], mod_paths: List[str], output_paths: List[str], *, renderer: str = "plotly", validate: bool = False, layouts: LayoutCache = None, on_decimate: Callable[[Dict[str, Decimation]], None] = None):
+        self.chart_type = chart_type
+        self.raw_data = raw_data
+        self.layer_paths = list(layer_paths)
+        self.mod_paths = list(mod_paths)
+        self.output_paths = list(output_paths)
+        self.renderer = renderer
+        self.validate = validate
+        self.layouts = layouts
+        self.on_decimate = on_decimate
+
+        self.parsed: Optional[Dataset] = None
+        self.data: Optional[Dataset] = None
+        self.config: Optional[ChartConfig] = None
+        self.figure: Optional[Union[dict, "go.Figure", List[Union[dict, "go.Figure"]]]] = None
+
+        self._versions: Dict[str, Tuple] = {}
+
+    def _input_versions(self) -> Dict[str, Tuple]:
+        return {
+            "parse": input_identity(self.raw_data),
+            "mods": tuple(input_identity(path) for path in self.mod_paths),
+            "config": tuple(layer_identity(path) for path in self.layer_paths),
+        }
+
+    def changed(self) -> List[str]:
+        """The stages whose inputs changed since the last render"""
+        versions = self._input_versions()
+
+        return [name for name, version in versions.items() if self._versions.get(name) != version]
+
+    def render(self) -> List[str]:
+        """
+        Render the chart, recomputing the stages whose inputs changed and
+        every stage after them. Returns the stages that were recomputed.
+        """
+        changed = self.changed()
+
+        # Taken before reading, so an edit made while rendering shows up as a change
+        self._versions = self._input_versions()
+
+        outputs = (self.parsed, self.data, self.config)
+        missing = [index for index, output in enumerate(outputs) if output is None]
+        start = min([WATCH_STAGES.index(name) for name in changed] + missing + [WATCH_STAGES.index("figure")])
+
+        # Cleared first, so a stage that fails is recomputed by the next render
+        if start <= 0:
+            self.parsed = None
+        if start <= 1:
+            self.data = None
+        if start <= 2:
+            self.config = None
+
+        if start <= 0:
+            with stage("parse_data") as record:
+                self.parsed = read_data_input(self.raw_data)
+                record.rows = len(self.parsed)
+
+        if start <= 1:
+            with stage("optimize_mods"):
+                instructions = load_instructions(self.mod_paths)
+
+            # Instructions replace columns rather than writing into them, so a
+            # shallow copy keeps the parsed data intact for the next mod edit
+            with stage("run_mods", rows=len(self.parsed)):
+                self.data = run_instructions(instructions, Dataset(dict(self.parsed.columns)))
+
+        if start <= 2:
+            config = get_chart_config(data=self.data, layers=self.layer_paths)
+            configure_chart_type(self.chart_type, config)
+            self.config = config
+
+        self.figure, _ = render_chart(self.chart_type, self.data, self.config, self.output_paths, renderer=self.renderer, validate=self.validate, layouts=self.layouts, on_decimate=self.on_decimate)
+
+        return list(WATCH_STAGES[start:])
+
+    def run(self, interval: float = DEFAULT_WATCH_INTERVAL, on_render: Callable[[List[str], float], None] = None, on_error: Callable[[Exception], None] = None) -> None:
+        """
+        Render the chart, then poll its inputs every interval seconds and
+        re-render whenever one changes, until interrupted. A failed render is
+        passed to on_error and the watch goes on. The exporter is kept warm
+        for the whole watch.
+        """
+        session = warm_renderer() if self.renderer != "native" else nullcontext()
+
+        with session:
+            pending = True
+
+            while True:
+                if pending:
+                    started = time.perf_counter()
+
+                    try:
+                        stages = self.render()
+                    except Exception as e:
+                        if on_error is None:
+                            raise
+
+                        on_error(e)
+                    else:
+                        if on_render:
+                            on_render(stages, time.perf_counter() - started)
+
+                time.sleep(interval)
+                pending = bool(self.changed())
@@ -0,0 +1,171 @@
+import math
+from collections import deque
+from typing import Iterable
+
+import numpy as np
+
+
+class RollingWindow:
+    """
+    Single-pass sliding window over a stream of values.
+
+    Every push is O(1) amortised regardless of the window size: sums come from
+    blocks of wsize values (see window_sums), min/max from monotonic deques,
+    the standard deviation from a sliding Welford update that is recomputed
+    from the window every wsize pushes, and the exponential moving average
+    from the usual recurrence with span = wsize. Only the aggregates listed in
+    `stats` are maintained. Until the window fills, each aggregate covers the
+    values seen so far.
+    """
+
+    STATS = ("sum", "mean", "min", "max", "std", "ema")
+
+    def __init__(self, wsize: int, stats: Iterable[str] = ("mean",)):
+        stats = set(stats)
+        unknown = stats - set(self.STATS)
+
+        if unknown:
+            raise ValueError(f"Unknown rolling statistics: {sorted(unknown)}")
+
+        self.wsize = wsize
+        self.count = 0
+
+        self._track_sum = bool(stats & {"sum", "mean"})
+        self._track_min = "min" in stats
+        self._track_max = "max" in stats
+        self._track_std = "std" in stats
+        self._track_ema = "ema" in stats
+
+        # The current block's values and running sum, and the previous block's suffix sums
+        self._block = []
+        self._head = 0
+        self._tails = None
+
+        # (index, value) pairs, monotonically increasing / decreasing in value
+        self._mins = deque()
+        self._maxs = deque()
+
+        self._values = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+        self._alpha = 2 / (wsize + 1)
+        self._ema = None
+
+    def push(self, value) -> None:
+        index = self.count
+        self.count += 1
+
+        if self._track_sum:
+            if len(self._block) == self.wsize:
+                self._tails = suffix_sums(self._block)
+                self._block = []
+                self._head = 0
+
+            self._block.append(value)
+            self._head = self._head + value
+
+        if self._track_min:
+            while self._mins and self._mins[-1][1] >= value:
+                self._mins.pop()
+
+            self._mins.append((index, value))
+
+            if self._mins[0][0] <= index - self.wsize:
+                self._mins.popleft()
+
+        if self._track_max:
+            while self._maxs and self._maxs[-1][1] <= value:
+                self._maxs.pop()
+
+            self._maxs.append((index, value))
+
+            if self._maxs[0][0] <= index - self.wsize:
+                self._maxs.popleft()
+
+        if self._track_std:
+            self._values.append(value)
+
+            delta = value - self._mean
+            self._mean += delta / len(self._values)
+            self._m2 += delta * (value - self._mean)
+
+            if len(self._values) > self.wsize:
+                old = self._values.popleft()
+
+                delta = old - self._mean
+                self._mean -= delta / len(self._values)
+                self._m2 -= delta * (old - self._mean)
+
+            # Removing values drifts, so start again from the window itself now and then
+            if self.count % self.wsize == 0:
+                self._mean = sum(self._values) / len(self._values)
+                self._m2 = sum((v - self._mean) ** 2 for v in self._values)
+
+        if self._track_ema:
+            self._ema = value if self._ema is None else self._ema + self._alpha * (value - self._ema)
+
+    @property
+    def size(self) -> int:
+        return min(self.count, self.wsize)
+
+    def sum(self):
+        if self._tails is None:
+            return self._head
+
+        return self._head + self._tails[len(self._block) - 1]
+
+    def mean(self) -> float:
+        return self.sum() / self.size
+
+    def min(self):
+        return self._mins[0][1]
+
+    def max(self):
+        return self._maxs[0][1]
+
+    def std(self) -> float:
+        # Population standard deviation; clamp tiny negative drift from the updates
+        return math.sqrt(max(self._m2, 0.0) / len(self._values))
+
+    def ema(self) -> float:
+        return self._ema
+
+
+def suffix_sums(block: list) -> list:
+    """tails[j] is the sum of block[j + 1:], added from the end as np.cumsum does reversed"""
+    tails = [0] * len(block)
+    total = 0
+
+    for j in range(len(block) - 1, 0, -1):
+        total = total + block[j]
+        tails[j - 1] = total
+
+    return tails
+
+
+def window_sums(values: np.ndarray, wsize: int) -> np.ndarray:
+    """
+    Sum every window of wsize values, the first wsize - 1 windows being
+    partial. The column is cut into blocks of wsize values, and the window
+    ending at offset j of a block is the block's running sum up to j plus the
+    previous block's sum after j. Nothing is ever subtracted, so unlike
+    differences of a running total the error stays that of summing the
+    window itself, however long the column. RollingWindow adds in the same
+    order, so both give the same floats.
+    """
+    n = len(values)
+    blocks = -(-n // wsize)
+
+    padded = np.zeros(blocks * wsize, dtype=values.dtype)
+    padded[:n] = values
+    padded = padded.reshape(blocks, wsize)
+
+    heads = np.cumsum(padded, axis=1)
+    tails = np.zeros_like(heads)
+    tails[:, :-1] = np.cumsum(padded[:, ::-1], axis=1)[:, ::-1][:, 1:]
+
+    sums = heads
+    sums[1:] += tails[:-1]
+
+    return sums.ravel()[:n]
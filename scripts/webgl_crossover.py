@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Benchmark SVG against WebGL scatter traces in raster exports.
+
+Builds the same line chart at increasing point counts, exports it to PNG
+through one warm kaleido session with every series as `scatter` and then as
+`scattergl`, and reports the median export time of each. The crossover is
+the smallest size from which WebGL stays faster; use it to pick
+`webgl_threshold` for a machine. Decimation is turned off so every point is
+drawn.
+
+Usage: python scripts/webgl_crossover.py [--sizes 1000,5000,...] [--series N] [--repeat N] [--format png]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chasm.library.chart import build_figure
+from chasm.library.dataset import Dataset
+from chasm.library.layer import get_chart_config
+from chasm.library.render import warm_renderer
+
+DEFAULT_SIZES = [500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000]
+
+
+def make_data(points, series, rng):
+    columns = {"x": np.arange(points, dtype=np.int64)}
+
+    for i in range(series):
+        columns[f"y{i}"] = np.cumsum(rng.normal(size=points))
+
+    return Dataset(columns)
+
+
+def time_export(fig, path, repeat):
+    import plotly.io as pio
+
+    samples = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pio.write_image(fig, path, validate=False)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="comma separated points per series")
+    parser.add_argument("--series", type=int, default=2, help="series per chart")
+    parser.add_argument("--repeat", type=int, default=5, help="exports per measurement (median is reported)")
+    parser.add_argument("--format", default="png", choices=["png", "jpeg", "webp"], help="raster format to export")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rng = np.random.default_rng(0)
+    rows = []
+
+    with tempfile.TemporaryDirectory() as directory, warm_renderer():
+        path = os.path.join(directory, f"chart.{args.format}")
+
+        for points in sizes:
+            data = make_data(points, args.series, rng)
+            timings = {}
+
+            # Thresholds force each trace type regardless of the configured default
+            for trace_type, threshold in (("scatter", 0), ("scattergl", 1)):
+                config = get_chart_config(data, ["decimate_max_points: 0", f"webgl_threshold: {threshold}"])
+                fig = build_figure("line", data, config, raster=True)
+
+                # Warm up plotly.js for this trace type before timing it
+                time_export(fig, path, 1)
+                timings[trace_type] = time_export(fig, path, args.repeat)
+
+            rows.append((points, timings["scatter"], timings["scattergl"]))
+            print(f"{points:>9} points  svg {timings['scatter']:>9.1f} ms  webgl {timings['scattergl']:>9.1f} ms  "
+                  f"{'webgl' if timings['scattergl'] < timings['scatter'] else 'svg'} faster")
+
+    crossover = None
+
+    for i, (points, _, _) in enumerate(rows):
+        if all(gl < svg for _, svg, gl in rows[i:]):
+            crossover = points
+            break
+
+    if crossover is None:
+        print("\nWebGL never stayed faster over the measured sizes")
+    else:
+        print(f"\nWebGL is faster from {crossover} points per series; set webgl_threshold just below that")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def program_cache(tmp_path, monkeypatch):
+    # Compiled mods go to a fresh directory per test, never the user's cache
+    directory = tmp_path / "programs"
+    monkeypatch.setattr("chasm.library.mod.PROGRAM_CACHE_DIR", str(directory))
+    return directory
@@ -0,0 +1,106 @@
+import math
+
+import numpy as np
+import pytest
+
+from chasm.library.dataset import Dataset
+from chasm.library.mod import GroupBy, TimeBucket, TopN
+
+RECORDS = [
+    {"x": "a", "ts": "2024-01-01T00:00:10", "y0": 5, "y1": 1.5,  "y2": None, "label": "p"},
+    {"x": "b", "ts": "2024-01-01T00:01:10", "y0": 3, "y1": None, "y2": 2.0,  "label": "q"},
+    {"x": "a", "ts": None,                  "y0": 5, "y1": 2.5,  "y2": None, "label": "r"},
+    {"x": None, "ts": "2024-01-01T00:00:50", "y0": 1, "y1": 4.0,  "y2": 3.5,  "label": "s"},
+    {"x": "c", "ts": "2024-01-01T00:03:00", "y0": 5, "y1": None, "y2": None, "label": "t"},
+    {"x": "b", "ts": "2024-01-01T00:01:59", "y0": 3, "y1": 0.5,  "y2": 1.0,  "label": "u"},
+]
+
+
+def normalize(data):
+    records = data.to_records() if isinstance(data, Dataset) else data
+
+    return [{key: None if isinstance(value, float) and math.isnan(value) else value for key, value in record.items()} for record in records]
+
+
+def both_paths(make, records=RECORDS):
+    rows = make().process([dict(record) for record in records])
+    columns = make().process_columns(Dataset.from_records([dict(record) for record in records]))
+
+    return normalize(rows), normalize(columns)
+
+
+def nan_gaps(records):
+    # The same data with gaps as NaN in float columns rather than None in object columns
+    return [{key: float("nan") if value is None and key in ("y1", "y2") else value for key, value in record.items()} for record in records]
+
+
+@pytest.mark.parametrize("records", [RECORDS, nan_gaps(RECORDS)], ids=["none", "nan"])
+@pytest.mark.parametrize("agg", ["sum", "count", "mean", "min", "max"])
+def test_groupby(agg, records):
+    rows, columns = both_paths(lambda: GroupBy({"key": "x", "agg": agg, "ckey": "n"}), records)
+
+    assert columns == rows
+    assert [record["x"] for record in columns] == ["a", "b", None, "c"]
+    assert [record["n"] for record in columns] == [2, 2, 1, 1]
+
+
+def test_groupby_skips_gaps():
+    _, columns = both_paths(lambda: GroupBy({"key": "x", "agg": "mean"}))
+
+    assert columns[0]["y1"] == 2.0
+    assert columns[3]["y1"] is None
+    assert "label" not in columns[0]
+
+
+@pytest.mark.parametrize("records", [RECORDS, nan_gaps(RECORDS)], ids=["none", "nan"])
+@pytest.mark.parametrize("agg", ["sum", "mean", "max"])
+def test_timebucket(agg, records):
+    rows, columns = both_paths(lambda: TimeBucket({"unit": "minute", "key": "ts", "agg": agg, "ckey": "n"}), records)
+
+    assert columns == rows
+    assert [record["ts"] for record in columns] == ["2024-01-01T00:00", "2024-01-01T00:01", "2024-01-01T00:03"]
+    assert [record["n"] for record in columns] == [2, 2, 1]
+
+
+def test_timebucket_epoch_seconds():
+    records = [{"ts": 60 * i + 5, "y": i} for i in range(10)]
+    rows, columns = both_paths(lambda: TimeBucket({"unit": "minute", "every": 5, "key": "ts", "agg": "sum"}), records)
+
+    assert columns == rows == [{"ts": 0, "y": 10}, {"ts": 300, "y": 35}]
+
+
+@pytest.mark.parametrize("records", [RECORDS, nan_gaps(RECORDS)], ids=["none", "nan"])
+@pytest.mark.parametrize("n", [1, 2, 3, 6, 10])
+def test_topn_ties(n, records):
+    rows, columns = both_paths(lambda: TopN({"n": n, "vkey": "y0", "key": "x"}), records)
+
+    assert columns == rows
+
+    # Ties keep their original order
+    assert [record["label"] for record in columns[:min(n, 3)]] == ["p", "r", "t"][:n]
+
+
+@pytest.mark.parametrize("records", [RECORDS, nan_gaps(RECORDS)], ids=["none", "nan"])
+def test_topn_ranks_gaps_last(records):
+    rows, columns = both_paths(lambda: TopN({"n": 5, "vkey": "y1", "key": "x", "other": None}), records)
+
+    assert columns == rows
+    assert [record["label"] for record in columns] == ["s", "r", "p", "u", "q"]
+
+
+def test_topn_rolls_up_the_rest():
+    _, columns = both_paths(lambda: TopN({"n": 2, "vkey": "y0", "key": "x"}))
+
+    assert columns[-1]["x"] == "Other"
+    assert columns[-1]["y0"] == 12
+    assert columns[-1]["y1"] == 4.5
+
+
+@pytest.mark.parametrize("make", [
+    lambda: GroupBy({"key": "x"}),
+    lambda: TimeBucket({"unit": "day", "key": "x"}),
+    lambda: TopN({"n": 3, "vkey": "y"}),
+])
+def test_empty_data(make):
+    assert len(make().process_columns(Dataset())) == 0
+    assert make().process([]) == []
@@ -0,0 +1,153 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from chasm.library import chart
+from chasm.library.cache import RenderCache
+from chasm.library.config import ChartConfig
+from chasm.library.mod import ISA, Mod
+
+DATA = json.dumps([{"x": i, "y0": i * i} for i in range(5)])
+
+
+def mod(*instructions):
+    return Mod(path="inline.chasm", instructions=[ISA[name](args) for name, args in instructions])
+
+
+def key(cache, chart_type="line", raw_data=DATA, config=None, mods=(), output_path="chart.svg", renderer="plotly", raster=False):
+    return cache.key(chart_type, raw_data, config or ChartConfig(), list(mods), output_path, renderer, raster)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RenderCache(str(tmp_path / "cache"))
+
+
+def test_key_is_stable(cache):
+    assert key(cache) == key(cache)
+    assert key(cache, output_path="other/chart.SVG") == key(cache)
+
+
+@pytest.mark.parametrize("change", [
+    {"chart_type": "bar"},
+    {"raw_data": json.dumps([{"x": 0, "y0": 1}])},
+    {"config": ChartConfig(chart_title_text="Title")},
+    {"mods": [mod(("addint", {"adder": 1, "key": "y0"}))]},
+    {"output_path": "chart.png"},
+    {"renderer": "native"},
+    {"raster": True},
+])
+def test_key_covers(cache, change):
+    assert key(cache, **change) != key(cache)
+
+
+def test_key_covers_instruction_arguments(cache):
+    assert key(cache, mods=[mod(("addint", {"adder": 1, "key": "y0"}))]) != key(cache, mods=[mod(("addint", {"adder": 2, "key": "y0"}))])
+
+
+def test_key_covers_file_content(cache, tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(DATA)
+    before = key(cache, raw_data=str(path))
+
+    path.write_text(DATA.replace("16", "17"))
+
+    assert key(cache, raw_data=str(path)) != before
+
+
+def test_key_covers_npy_columns_only(cache, tmp_path):
+    directory = tmp_path / "columns"
+    directory.mkdir()
+    np.save(directory / "x.npy", np.arange(5))
+    before = key(cache, raw_data=str(directory))
+
+    # Files read_npy_dir never loads don't change the key, or break it
+    (directory / "notes.txt").write_text("unrelated")
+    (directory / "nested").mkdir()
+    assert key(cache, raw_data=str(directory)) == before
+
+    np.save(directory / "x.npy", np.arange(6))
+    assert key(cache, raw_data=str(directory)) != before
+
+
+def test_png_alongside_svg_is_a_different_entry(cache, tmp_path, monkeypatch):
+    stored = []
+    monkeypatch.setattr(cache, "store", lambda key, path: stored.append((key, os.path.basename(path))))
+    monkeypatch.setattr(chart, "render_chart", lambda *args, **kwargs: (None, []))
+
+    chart.make_chart("line", DATA, [], [], [str(tmp_path / "a.svg"), str(tmp_path / "a.png")], cache=cache)
+    chart.make_chart("line", DATA, [], [], str(tmp_path / "b.png"), cache=cache)
+
+    assert stored[1][1] == "a.png" and stored[2][1] == "b.png"
+    assert stored[1][0] != stored[2][0]
+
+
+def test_unseeded_random_is_uncacheable(cache):
+    assert key(cache, mods=[mod(("injectrandint", {"low": 0, "high": 9, "ykey": "y1"}))]) is None
+    assert key(cache, mods=[mod(("injectrandint", {"low": 0, "high": 9, "ykey": "y1", "seed": 1}))]) is not None
+
+
+def test_store_and_fetch(cache, tmp_path):
+    output = tmp_path / "chart.svg"
+    copy = tmp_path / "copy.svg"
+    output.write_text("<svg/>")
+
+    assert not cache.fetch("k", str(copy))
+
+    cache.store("k", str(output))
+
+    assert cache.fetch("k", str(copy))
+    assert copy.read_text() == "<svg/>"
+    assert not cache.fetch("k", str(tmp_path / "chart.png"))
+
+
+def test_fetch_after_eviction_is_a_miss(cache, tmp_path):
+    output = tmp_path / "chart.svg"
+    output.write_text("<svg/>")
+    cache.store("k", str(output))
+
+    os.remove(cache._entry("k", str(output)))
+
+    assert not cache.fetch("k", str(tmp_path / "copy.svg"))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=1000)
+    output = tmp_path / "chart.svg"
+    output.write_text("x" * 100)
+
+    for i in range(10):
+        cache.store(f"k{i}", str(output))
+        os.utime(cache._entry(f"k{i}", str(output)), (i, i))
+
+    # Using k0 makes k1 the least recently used
+    cache.fetch("k0", str(tmp_path / "copy.svg"))
+    cache.store("k10", str(output))
+
+    entries = os.listdir(cache.directory)
+
+    assert sum(os.path.getsize(os.path.join(cache.directory, entry)) for entry in entries) <= 1000
+    assert "k0.svg" in entries and "k10.svg" in entries
+    assert "k1.svg" not in entries
+
+
+def test_make_chart_hit(cache, tmp_path, monkeypatch):
+    output = str(tmp_path / "chart.svg")
+
+    chart.make_chart("line", DATA, [], [], output, cache=cache, renderer="native")
+    first = open(output).read()
+    os.remove(output)
+
+    def parse(*args, **kwargs):
+        raise AssertionError("a cache hit must not parse the data")
+
+    monkeypatch.setattr(chart, "parse_data_input", parse)
+
+    assert chart.make_chart("line", DATA, [], [], output, cache=cache, renderer="native") is None
+    assert open(output).read() == first
+
+    # A different layer stack is a miss
+    with pytest.raises(AssertionError):
+        chart.make_chart("line", DATA, ["chart_title_text: Other"], [], output, cache=cache, renderer="native")
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from chasm.library.data import parse_data_input, read_chunks, read_csv_chunks, read_data_input, read_ndjson_chunks
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def ndjson(records):
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+RECORDS = [{"x": f"Value {i}", "y": i, "z": i / 2} for i in range(10)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 10, 100])
+def test_ndjson_chunks(tmp_path, chunk_size):
+    path = write(tmp_path, "data.ndjson", ndjson(RECORDS) + "\n")
+    chunks = list(read_ndjson_chunks(path, chunk_size))
+
+    assert [len(chunk) for chunk in chunks] == [min(chunk_size, 10 - i) for i in range(0, 10, chunk_size)]
+    assert [record for chunk in chunks for record in chunk.to_records()] == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_csv_chunks(tmp_path, chunk_size):
+    path = write(tmp_path, "data.csv", "x,y,z\n" + "".join(f"Value {i},{i},{i / 2}\n" for i in range(10)))
+    chunks = list(read_csv_chunks(path, chunk_size))
+
+    assert [record for chunk in chunks for record in chunk.to_records()] == RECORDS
+
+
+def test_csv_values(tmp_path):
+    path = write(tmp_path, "data.csv", "x,y\na,1\nb,\nc,2.5\n")
+
+    assert read_data_input(path).to_records() == [{"x": "a", "y": 1}, {"x": "b", "y": None}, {"x": "c", "y": 2.5}]
+
+
+# Errors in a later chunk must still be caught, with the position in the whole file
+@pytest.mark.parametrize("chunk_size", [2, 100])
+def test_ndjson_invalid_json(tmp_path, chunk_size):
+    path = write(tmp_path, "data.ndjson", ndjson(RECORDS[:5]) + "{broken\n")
+
+    with pytest.raises(json.JSONDecodeError, match="line 6"):
+        list(read_ndjson_chunks(path, chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [2, 100])
+def test_ndjson_different_keys(tmp_path, chunk_size):
+    path = write(tmp_path, "data.ndjson", ndjson(RECORDS[:5] + [{"x": "Value 5", "y": 5}]))
+
+    with pytest.raises(ValueError, match="index 5 has different keys"):
+        list(read_ndjson_chunks(path, chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [2, 100])
+def test_ndjson_not_an_object(tmp_path, chunk_size):
+    path = write(tmp_path, "data.ndjson", ndjson(RECORDS[:3]) + "[1, 2]\n")
+
+    with pytest.raises(ValueError, match="index 3 is not a dictionary"):
+        list(read_ndjson_chunks(path, chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [2, 100])
+def test_csv_wrong_field_count(tmp_path, chunk_size):
+    path = write(tmp_path, "data.csv", "x,y\na,1\nb,2\nc,3\nd\n")
+
+    with pytest.raises(ValueError, match="index 3 has 1 fields"):
+        list(read_csv_chunks(path, chunk_size))
+
+
+def test_csv_duplicate_header(tmp_path):
+    path = write(tmp_path, "data.csv", "x,y,x\na,1,b\n")
+
+    with pytest.raises(ValueError, match="duplicate columns"):
+        list(read_csv_chunks(path))
+
+
+def test_csv_empty(tmp_path):
+    assert list(read_chunks(write(tmp_path, "data.csv", ""))) == []
+
+
+def test_streamed_mods_match_whole_input(tmp_path):
+    path = write(tmp_path, "data.ndjson", ndjson(RECORDS))
+    mod = write(tmp_path, "mod.chasm", "addint adder=2, key=y\ninjectrollingsum wsize=3, skey=y, tkey=t\n")
+
+    streamed = parse_data_input(path, [mod], chunk_size=3)
+    whole = parse_data_input(json.dumps(RECORDS), [mod])
+
+    assert streamed.to_records() == whole.to_records()
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from chasm.library.chart import configure_chart_type
+from chasm.library.config import ChartConfig
+from chasm.library.dataset import Dataset
+from chasm.library.decimate import decimate_series, describe_decimations, lttb_indices, minmax_indices
+
+N = 1000
+X = np.arange(N, dtype=float)
+Y = np.sin(X / 25) * 100 + np.random.default_rng(0).normal(0, 5, N)
+
+
+def make_config(data, chart_type="line", **layer):
+    config = ChartConfig()
+    config.apply_layer(layer)
+    config.compute_keys(data)
+    configure_chart_type(chart_type, config)
+    return config
+
+
+@pytest.mark.parametrize("threshold", [3, 10, 100, 999])
+def test_lttb_indices(threshold):
+    index = lttb_indices(X, Y, threshold)
+
+    assert len(index) == threshold
+    assert index[0] == 0 and index[-1] == N - 1
+    assert np.all(np.diff(index) > 0)
+
+
+@pytest.mark.parametrize("threshold", [0, 2, N, N + 1])
+def test_lttb_keeps_everything_outside_its_range(threshold):
+    assert lttb_indices(X, Y, threshold).tolist() == list(range(N))
+
+
+def test_lttb_keeps_the_spike():
+    y = np.zeros(N)
+    y[437] = 1000
+
+    assert 437 in lttb_indices(X, y, 20)
+
+
+def test_lttb_skips_missing_values():
+    y = Y.copy()
+    y[100:400] = np.nan
+    y[450] = np.nan
+
+    index = lttb_indices(X, y, 50)
+
+    # A bucket wholly inside the gap keeps a missing point, so the line still breaks there
+    assert 450 not in index
+    assert np.isnan(y[index]).any()
+
+
+@pytest.mark.parametrize("threshold", [2, 10, 100, 500])
+def test_minmax_indices(threshold):
+    index = minmax_indices(Y, threshold)
+
+    assert len(index) <= threshold
+    assert np.all(np.diff(index) > 0)
+    assert np.argmin(Y) in index and np.argmax(Y) in index
+
+    # Every bucket's extremes are kept
+    size = -(-N // (threshold // 2))
+
+    for start in range(0, N, size):
+        bucket = Y[start:start + size]
+        assert start + np.argmin(bucket) in index and start + np.argmax(bucket) in index
+
+
+def test_minmax_never_keeps_missing_values_over_real_ones():
+    y = Y.copy()
+    y[::3] = np.nan
+
+    assert not np.isnan(y[minmax_indices(y, 50)]).any()
+
+
+def test_under_budget_is_left_whole():
+    data = Dataset({"x": X, "y0": Y})
+    decimations = decimate_series("line", data, make_config(data, decimate_max_points=N))
+
+    assert decimations["y0"].index is None
+    assert decimations["y0"].kept == N and describe_decimations(decimations) == []
+
+
+@pytest.mark.parametrize("method, expected", [("auto", "lttb"), ("lttb", "lttb"), ("minmax", "minmax")])
+def test_line_methods(method, expected):
+    data = Dataset({"x": X, "y0": Y})
+    decimation = decimate_series("line", data, make_config(data, decimate_max_points=100, decimate_method=method))["y0"]
+
+    assert decimation.method == expected
+    assert decimation.kept <= 100
+    assert describe_decimations({"y0": decimation}) == [f"y0: kept {decimation.kept} of {N} points ({expected}, dropped {N - decimation.kept})"]
+
+
+def test_isc_budget():
+    data = Dataset({"x": X, "y0": Y, "y1": -Y})
+    decimations = decimate_series("line", data, make_config(data, decimate_max_points=100, isc={"y1": {"decimate_max_points": 0}}))
+
+    assert decimations["y0"].kept == 100
+    assert decimations["y1"].index is None
+
+
+def test_stacked_bars_share_the_union_of_their_points():
+    data = Dataset({"x": X, "y0": Y, "y1": np.roll(Y, 300)})
+    decimations = decimate_series("stackedbar", data, make_config(data, "stackedbar", decimate_max_points=100))
+
+    alone = [set(minmax_indices(data[key], 100).tolist()) for key in ("y0", "y1")]
+
+    assert decimations["y0"].method == "minmax"
+    assert decimations["y0"].index is decimations["y1"].index
+    assert set(decimations["y0"].index.tolist()) == alone[0] | alone[1]
+
+
+def test_grouped_bars_keep_their_own_points():
+    data = Dataset({"x": X, "y0": Y, "y1": np.roll(Y, 300)})
+    decimations = decimate_series("bar", data, make_config(data, "bar", decimate_max_points=100))
+
+    assert decimations["y0"].index.tolist() != decimations["y1"].index.tolist()
+
+
+def test_categorical_bars_are_never_decimated():
+    x = np.array([f"Category {i}" for i in range(N)], dtype=object)
+    data = Dataset({"x": x, "y0": Y})
+
+    for chart_type in ("bar", "stackedbar"):
+        decimation = decimate_series(chart_type, data, make_config(data, chart_type, decimate_max_points=10, decimate_method="minmax"))["y0"]
+
+        assert decimation.method == "none" and decimation.index is None
+
+    # Lines over categories are still thinned
+    assert decimate_series("line", data, make_config(data, decimate_max_points=10))["y0"].kept == 10
+
+
+def test_unknown_method():
+    data = Dataset({"x": X, "y0": Y})
+
+    with pytest.raises(ValueError, match="Unknown decimate_method 'every'"):
+        decimate_series("line", data, make_config(data, decimate_method="every"))
@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import pytest
+
+from chasm.library.dataset import Dataset
+from chasm.library.facet import facet_paths, partition
+
+RECORDS = [
+    {"region": "north", "x": 1, "y": 10},
+    {"region": "south", "x": 2, "y": 20},
+    {"region": None, "x": 3, "y": 30},
+    {"region": "north", "x": 4, "y": 40},
+    {"region": "south", "x": 5, "y": 50},
+    {"region": "east", "x": 6, "y": 60},
+]
+
+
+def expected(records, key):
+    groups = {}
+
+    for record in records:
+        groups.setdefault(record[key], []).append(record)
+
+    return list(groups.items())
+
+
+def test_partition():
+    parts = partition(Dataset.from_records(RECORDS), "region")
+
+    assert [(label, part.to_records()) for label, part in parts] == expected(RECORDS, "region")
+
+
+def test_partition_numeric_labels():
+    data = Dataset({"k": np.array([2.0, np.nan, 1.0, 2.0]), "y": np.arange(4)})
+    parts = partition(data, "k")
+
+    assert [label for label, _ in parts][0::2] == [2.0, 1.0] and math.isnan(parts[1][0])
+    assert [part["y"].tolist() for _, part in parts] == [[0, 3], [1], [2]]
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_partition_matches_filtering(size):
+    rng = np.random.default_rng(size)
+    data = Dataset({"k": rng.integers(0, 5, size), "y": np.arange(size)})
+
+    parts = partition(data, "k")
+    labels = [label for label, _ in parts]
+
+    assert labels == list(dict.fromkeys(data["k"].tolist()))
+
+    for label, part in parts:
+        assert part["y"].tolist() == data["y"][data["k"] == label].tolist()
+
+
+def test_partition_empty_data():
+    assert partition(Dataset({"k": np.array([]), "y": np.array([])}), "k") == []
+
+
+def test_partition_missing_key():
+    with pytest.raises(ValueError, match="Can't facet on 'zone'.*keys: region, x, y"):
+        partition(Dataset.from_records(RECORDS), "zone")
+
+
+@pytest.mark.parametrize("output_path, labels, paths", [
+    ("build/chart.svg", ["north", "south"], ["build/chart_north.svg", "build/chart_south.svg"]),
+    ("build/{facet}/chart.png", ["north", 2], ["build/north/chart.png", "build/2/chart.png"]),
+    ("chart-{facet}.svg", ["a/b", "../up", "  ", None], ["chart-a_b.svg", "chart-up.svg", "chart-_.svg", "chart-None.svg"]),
+    ("chart.svg", ["a b", "a/b", "a_b"], ["chart_a_b.svg", "chart_a_b_2.svg", "chart_a_b_3.svg"]),
+    ("chart.svg", [1.5, "1.5"], ["chart_1.5.svg", "chart_1.5_2.svg"]),
+])
+def test_facet_paths(output_path, labels, paths):
+    assert facet_paths(output_path, labels) == paths
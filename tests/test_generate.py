@@ -0,0 +1,32 @@
+import pytest
+
+from chasm.library.data import read_data_input
+from chasm.library.generate import generate_chunks, output_format, write_chunks
+
+
+@pytest.mark.parametrize("name", ["data.ndjson", "data.jsonl", "data.csv", "data.arrow", "columns"])
+def test_write_chunks_round_trips(tmp_path, name):
+    path = str(tmp_path / name)
+
+    assert write_chunks(generate_chunks(10, series=2, seed=1, chunk_size=3), path, 10) == 10
+    assert read_data_input(path).to_records() == [record for chunk in generate_chunks(10, series=2, seed=1) for record in chunk.to_records()]
+
+
+@pytest.mark.parametrize("name", ["data.json", "data.txt", "chart.svg"])
+def test_unknown_extensions_are_rejected(tmp_path, name):
+    path = tmp_path / name
+
+    with pytest.raises(ValueError, match="Can't write"):
+        output_format(str(path))
+
+    with pytest.raises(ValueError, match="Can't write"):
+        write_chunks(generate_chunks(10), str(path), 10)
+
+    assert not path.exists()
+
+
+def test_seeded_output_ignores_chunk_size():
+    def records(chunk_size):
+        return [record for chunk in generate_chunks(10, seed=3, chunk_size=chunk_size) for record in chunk.to_records()]
+
+    assert records(3) == records(100)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from chasm.library.data import load_instructions
+from chasm.library.dataset import Dataset
+from chasm.library.engine import run_instructions
+from chasm.library.mod import ISA, AddInt
+from chasm.library.optimize import explain, fold_constants, optimize
+
+
+def make(*steps):
+    return [ISA[name](dict(args)) for name, args in steps]
+
+
+def make_data():
+    return Dataset({"x": np.arange(20), "y": np.arange(20) * 3, "z": np.arange(20) % 7})
+
+
+def run(instructions):
+    return run_instructions(instructions, make_data()).to_records()
+
+
+PIPELINES = [
+    [("addint", {"adder": 1, "key": "y"}), ("addint", {"adder": 2, "key": "y"}), ("addint", {"adder": -4, "key": "y"})],
+    [("addint", {"adder": 1, "key": "y"}), ("injectrandint", {"low": 0, "high": 9, "ykey": "r", "seed": 3}), ("addint", {"adder": 2, "key": "y"})],
+    [("addint", {"adder": 1, "key": "y"}), ("injectrollingsum", {"wsize": 3, "skey": "y", "tkey": "t"}), ("addint", {"adder": 2, "key": "y"})],
+    [("addint", {"adder": 1, "key": "y"}), ("injectrandint", {"low": 0, "high": 9, "ykey": "y", "seed": 3}), ("addint", {"adder": 2, "key": "y"})],
+    [("addint", {"adder": 1, "key": "y"}), ("groupby", {"key": "z"}), ("addint", {"adder": 2, "key": "y"})],
+    [("addint", {"adder": 1, "key": "y"}), ("addint", {"adder": 1, "key": "z"}), ("addint", {"adder": 2, "key": "x"}), ("addint", {"adder": 5, "key": "z"})],
+    [("addint", {"adder": 1, "key": "y"}), ("injectrandint", {"low": 0, "high": 9, "ykey": "r", "seed": 1}), ("addint", {"adder": 2, "key": "y"}), ("groupby", {"key": "z"})],
+]
+
+
+@pytest.mark.parametrize("steps", PIPELINES)
+def test_optimize_preserves_results(steps):
+    assert run(optimize(make(*steps))) == run(make(*steps))
+
+
+def test_folds_addint_on_the_same_key():
+    plan = fold_constants(make(*PIPELINES[0]))
+
+    assert len(plan) == 1
+    assert plan[0].args == {"adder": -1, "key": "y"}
+
+
+def test_folds_across_other_keys():
+    plan = fold_constants(make(*PIPELINES[1]))
+
+    assert [type(step).__name__ for step in plan] == ["AddInt", "InjectRandInt"]
+    assert plan[0].args["adder"] == 3
+
+
+@pytest.mark.parametrize("steps", [PIPELINES[2], PIPELINES[3], PIPELINES[4]], ids=["reads key", "writes key", "not rowwise"])
+def test_does_not_fold_across(steps):
+    assert len(fold_constants(make(*steps))) == 3
+
+
+def test_folds_interleaved_keys():
+    plan = fold_constants(make(*PIPELINES[5]))
+
+    assert [(step.args["key"], step.args["adder"]) for step in plan] == [("y", 1), ("z", 6), ("x", 2)]
+
+
+def test_explain_shows_each_steps_path():
+    steps = make(*PIPELINES[6])
+    text = explain(steps, optimize(steps))
+
+    assert text.splitlines() == [
+        "Mod plan: 4 instructions -> 3 steps",
+        "  1. addint adder=3, key=y [columns]",
+        "  2. injectrandint low=0, high=9, ykey=r, seed=1 [columns]",
+        "  3. groupby key=z [columns]",
+    ]
+
+
+def test_folds_across_mod_files(tmp_path):
+    first, second = tmp_path / "a.chasm", tmp_path / "b.chasm"
+    first.write_text("addint adder=1, key=y\n")
+    second.write_text("addint adder=2, key=y\n")
+
+    instructions = load_instructions([str(first), str(second)])
+
+    assert len(instructions) == 1
+    assert isinstance(instructions[0], AddInt)
+    assert instructions[0].args["adder"] == 3
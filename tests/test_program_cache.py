@@ -0,0 +1,126 @@
+import os
+
+import numpy as np
+import pytest
+
+from chasm.library import mod
+from chasm.library.dataset import Dataset
+from chasm.library.mod import AddInt, compile_program, get_mods, load_program
+
+SOURCE = "# adds one\naddint adder=1, key=y\n"
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "m.chasm"
+    path.write_text(SOURCE)
+    return str(path)
+
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def compiles(monkeypatch):
+    calls = []
+    compile_source = mod.compile_source
+
+    def counted(path, source):
+        calls.append(path)
+        return compile_source(path, source)
+
+    monkeypatch.setattr(mod, "compile_source", counted)
+    return calls
+
+
+def test_compile_program(path):
+    program = compile_program(path)
+
+    assert program.steps == [("addint", {"adder": 1, "key": "y"})]
+    assert type(program).from_dict(program.to_dict()) == program
+
+
+def test_compile_errors(tmp_path):
+    bad = tmp_path / "bad.chasm"
+
+    bad.write_text("addint adder=1, key=y\nnosuchop a=1\n")
+    with pytest.raises(ValueError, match="line 2"):
+        compile_program(str(bad))
+
+    bad.write_text("addint adder=one, key=y\n")
+    with pytest.raises(Exception):
+        compile_program(str(bad))
+
+
+def test_fresh_cache_is_reused(path, compiles, program_cache):
+    load_program(path)
+    load_program(path)
+
+    assert len(compiles) == 1
+    assert len(os.listdir(program_cache)) == 1
+
+
+def test_changed_content_recompiles(path, compiles):
+    stat = os.stat(path)
+    assert load_program(path).steps[0][1]["adder"] == 1
+
+    # Same size and mtime would be trusted, so a real edit changes at least one of them
+    with open(path, "w") as file:
+        file.write(SOURCE.replace("adder=1", "adder=2"))
+    set_mtime(path, stat.st_mtime_ns + 1_000_000_000)
+
+    assert load_program(path).steps[0][1]["adder"] == 2
+    assert len(compiles) == 2
+
+
+def test_changed_size_recompiles(path, compiles):
+    stat = os.stat(path)
+    load_program(path)
+
+    with open(path, "w") as file:
+        file.write(SOURCE + "addint adder=5, key=z\n")
+    set_mtime(path, stat.st_mtime_ns)
+
+    assert len(load_program(path).steps) == 2
+    assert len(compiles) == 2
+
+
+def test_touched_file_is_rehashed_not_recompiled(path, compiles):
+    stat = os.stat(path)
+    load_program(path)
+
+    set_mtime(path, stat.st_mtime_ns + 1_000_000_000)
+
+    assert load_program(path).steps[0][1]["adder"] == 1
+    assert len(compiles) == 1
+
+    # The refreshed entry records the new mtime, so the next load trusts it again
+    load_program(path)
+    assert len(compiles) == 1
+
+
+def test_other_version_is_ignored(path, compiles, monkeypatch):
+    load_program(path)
+    monkeypatch.setattr(mod, "__version__", "0.0.0-other")
+    load_program(path)
+
+    assert len(compiles) == 2
+
+
+def test_corrupt_cache_recompiles(path, compiles, program_cache):
+    load_program(path)
+
+    for name in os.listdir(program_cache):
+        (program_cache / name).write_text("{not json")
+
+    assert load_program(path).steps[0][0] == "addint"
+    assert len(compiles) == 2
+
+
+def test_get_mods_uses_programs(path):
+    mods = get_mods([path])
+    data = mods[0].process(Dataset({"y": np.arange(3)}))
+
+    assert isinstance(mods[0].instructions[0], AddInt)
+    assert data["y"].tolist() == [1, 2, 3]
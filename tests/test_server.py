@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from chasm.library import server
+from chasm.library.server import HttpError, RenderRequest, RenderServer, confine
+
+BODY = json.dumps({"chart_type": "line", "data": [{"x": 1, "y0": 2}]}).encode()
+
+
+class FakePool(Executor):
+    """Runs renders inline, or fails every one as a pool whose worker died"""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.renders = 0
+        self.shut_down = False
+
+    def submit(self, fn, *args, **kwargs):
+        self.renders += 1
+        future = Future()
+
+        if self.broken:
+            future.set_exception(BrokenProcessPool("A worker died"))
+        else:
+            future.set_result(b"<svg/>")
+
+        return future
+
+    def shutdown(self, wait=True, **kwargs):
+        self.shut_down = True
+
+
+def route(daemon, headers, body=BODY, method="POST", path="/render"):
+    async def run():
+        daemon._queue = asyncio.Queue(maxsize=daemon.max_queue)
+        worker = asyncio.ensure_future(daemon._work())
+
+        try:
+            return await daemon._route(method, path, headers, body)
+        finally:
+            worker.cancel()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = RenderServer(workers=1, root=str(tmp_path))
+    daemon._executor = FakePool()
+    return daemon
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({"content-type": "application/json", "origin": "https://example.com"}, 403),
+    ({"content-type": "application/json", "origin": "null"}, 403),
+    ({"content-type": "text/plain"}, 415),
+    ({"content-type": "application/x-www-form-urlencoded"}, 415),
+    ({}, 415),
+])
+def test_rejects_browser_requests(daemon, headers, status):
+    with pytest.raises(HttpError) as error:
+        route(daemon, headers)
+
+    assert error.value.status == status
+    assert daemon._executor.renders == 0
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "Application/JSON; charset=utf-8"])
+def test_accepts_json(daemon, content_type):
+    assert route(daemon, {"content-type": content_type}) == (200, b"<svg/>", "image/svg+xml")
+
+
+@pytest.mark.parametrize("method, path, status", [("GET", "/render", 405), ("POST", "/stats", 405), ("GET", "/other", 404)])
+def test_routes(daemon, method, path, status):
+    with pytest.raises(HttpError) as error:
+        route(daemon, {"content-type": "application/json"}, method=method, path=path)
+
+    assert error.value.status == status
+
+
+def test_bad_request_body(daemon):
+    with pytest.raises(HttpError) as error:
+        route(daemon, {"content-type": "application/json"}, body=b'{"chart_type": "line"}')
+
+    assert error.value.status == 400
+    assert "missing 'data'" in str(error.value)
+
+
+@pytest.mark.parametrize("path", ["../outside.svg", "/etc/passwd", "a/../../outside.svg", "link/chart.svg"])
+def test_confine_rejects_escapes(tmp_path, path):
+    root = tmp_path / "root"
+    (root / "a").mkdir(parents=True)
+    os.symlink(tmp_path, root / "link")
+
+    with pytest.raises(ValueError, match="outside the server root"):
+        confine(str(root), path, "Output")
+
+
+def test_confine_resolves_inside_root(tmp_path):
+    assert confine(str(tmp_path), "charts/../chart.svg", "Output") == str(tmp_path / "chart.svg")
+
+
+def test_request_paths_are_confined(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "data.json").write_text('[{"x": 1, "y0": 2}]')
+    (tmp_path / "secret.json").write_text("[]")
+
+    request = RenderRequest.from_json({"chart_type": "line", "data": "data.json", "layers": ["chart_title_text: Inline"], "output": "out.svg"}, str(root))
+
+    assert request.data == str(root / "data.json")
+    assert request.layers == ["chart_title_text: Inline"]
+    assert request.output == str(root / "out.svg")
+
+    for obj in [{"data": "../secret.json"}, {"data": "[]", "mods": ["../m.chasm"]}, {"data": "[]", "output": "../out.svg"}]:
+        with pytest.raises(ValueError, match="outside the server root"):
+            RenderRequest.from_json({"chart_type": "line", **obj}, str(root))
+
+
+def test_broken_pool_is_replaced_and_retried(daemon, monkeypatch):
+    broken = FakePool(broken=True)
+    fresh = FakePool()
+    daemon._executor = broken
+    monkeypatch.setattr(daemon, "_start_executor", lambda: fresh)
+
+    assert route(daemon, {"content-type": "application/json"})[1] == b"<svg/>"
+
+    assert broken.shut_down and daemon._executor is fresh
+    assert daemon.stats()["pool_restarts"] == 1
+    assert daemon.completed == 1
+
+
+def test_render_fails_once_retries_run_out(daemon, monkeypatch):
+    pools = []
+
+    def start():
+        pools.append(FakePool(broken=True))
+        return pools[-1]
+
+    daemon._executor = start()
+    monkeypatch.setattr(daemon, "_start_executor", start)
+
+    with pytest.raises(HttpError) as error:
+        route(daemon, {"content-type": "application/json"})
+
+    assert error.value.status == 500
+    assert daemon.stats()["pool_restarts"] == server.RENDER_RETRIES + 1
+    assert daemon.failed == 1
+
+
+def test_only_the_first_failure_replaces_a_pool(daemon, monkeypatch):
+    broken = daemon._executor
+    monkeypatch.setattr(daemon, "_start_executor", FakePool)
+
+    daemon._replace_executor(broken)
+    replacement = daemon._executor
+    daemon._replace_executor(broken)
+
+    assert daemon._executor is replacement
+    assert daemon.restarts == 1
@@ -0,0 +1,71 @@
+"""
+Startup regression check for the chasm CLI.
+
+Runs each subcommand under `python -X importtime` and fails if it imports a
+heavy dependency it has no use for (e.g. `chasm info` pulling in plotly).
+Import times vary by machine, so the forbidden modules are the hard check;
+set CHASM_STARTUP_BUDGET_MS to also fail on total import time.
+"""
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = {"numpy", "pydantic", "yaml", "plotly", "kaleido", "pyarrow"}
+
+BUDGET_MS = float(os.environ["CHASM_STARTUP_BUDGET_MS"]) if os.environ.get("CHASM_STARTUP_BUDGET_MS") else None
+
+# (arguments, heavy modules the subcommand is allowed to import)
+CASES = [
+    (["--help"],                                        set()),
+    (["info"],                                          set()),
+    (["make", "--help"],                                set()),
+    (["batch", "--help"],                               set()),
+    (["bench", "--help"],                               set()),
+    (["generate", "--help"],                            set()),
+    (["watch", "--help"],                               set()),
+    (["serve", "--help"],                               set()),
+    (["data", "-d", "[]"],                              {"numpy"}),
+    (["compile", "examples/e2/m1.chasm"],               {"numpy", "pydantic"}),
+]
+
+
+def measure(args, env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "chasm.cli"] + args,
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, f"chasm {' '.join(args)} failed:\n{result.stderr}"
+
+    total_us = 0
+    modules = set()
+
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        modules.add(name.strip().split(".")[0])
+
+    return total_us / 1000, modules
+
+
+@pytest.mark.parametrize("args, allowed", CASES, ids=[" ".join(args) for args, _ in CASES])
+def test_startup_imports(args, allowed, tmp_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env["CHASM_CACHE_DIR"] = str(tmp_path)
+
+    import_ms, modules = measure(args, env)
+
+    assert not (modules & HEAVY) - allowed, f"chasm {' '.join(args)} imports {', '.join(sorted((modules & HEAVY) - allowed))}"
+
+    if BUDGET_MS is not None:
+        assert import_ms <= BUDGET_MS, f"chasm {' '.join(args)} spent {import_ms:.1f} ms importing"
@@ -0,0 +1,86 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from chasm.library.dataset import Dataset
+from chasm.library.storage import get_binary_format, read_binary, write_binary, write_npy_dir_chunks
+
+RECORDS = [{"z": i * 1.5, "x": f"Value {i}", "y": i, "flag": i % 2 == 0, "gap": None if i == 2 else i} for i in range(5)]
+
+
+def normalize(records):
+    return [{key: None if isinstance(value, float) and math.isnan(value) else value for key, value in record.items()} for record in records]
+
+
+@pytest.mark.parametrize("name", ["columns", "data.arrow", "data.feather"])
+def test_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    write_binary(Dataset.from_records(RECORDS), path)
+
+    data = read_binary(path)
+
+    assert data.keys() == ["z", "x", "y", "flag", "gap"]
+    assert normalize(data.to_records()) == RECORDS
+
+
+def test_npy_columns_are_memory_mapped(tmp_path):
+    path = str(tmp_path / "columns")
+    write_binary(Dataset.from_records(RECORDS), path)
+
+    data = read_binary(path)
+
+    assert all(isinstance(data[key], np.memmap) for key in data.keys())
+    assert data["x"].dtype.kind == "U" and data["flag"].dtype == bool and data["gap"].dtype == np.float64
+
+
+def test_npy_order_without_schema(tmp_path):
+    path = tmp_path / "columns"
+    write_binary(Dataset.from_records(RECORDS), str(path))
+    os.remove(path / "columns.json")
+
+    assert read_binary(str(path)).keys() == ["flag", "gap", "x", "y", "z"]
+
+
+@pytest.mark.parametrize("column, match", [
+    ({"y": np.array([1, "a"], dtype=object)}, "mixes value types"),
+    ({os.path.join("a", "b"): np.arange(2)}, "file name"),
+])
+def test_unstorable_columns(tmp_path, column, match):
+    path = tmp_path / "columns"
+
+    with pytest.raises(ValueError, match=match):
+        write_binary(Dataset(column), str(path))
+
+    assert not path.exists()
+
+
+def test_npy_chunks(tmp_path):
+    path = str(tmp_path / "columns")
+    chunks = [Dataset.from_records(RECORDS[:2]), Dataset.from_records(RECORDS[2:])]
+
+    # Types come from the first chunk, where gap has no gaps yet
+    chunks[0]["gap"] = chunks[0]["gap"].astype(float)
+
+    assert write_npy_dir_chunks(chunks, path, 5) == 5
+    assert normalize(read_binary(path).to_records()) == RECORDS
+
+
+@pytest.mark.parametrize("rows, match", [(3, "more than the 3 rows"), (7, "5 of the 7 rows")])
+def test_npy_chunks_row_count(tmp_path, rows, match):
+    with pytest.raises(ValueError, match=match):
+        write_npy_dir_chunks([Dataset.from_records(RECORDS)], str(tmp_path / "columns"), rows)
+
+
+def test_binary_format(tmp_path):
+    path = tmp_path / "data.arrow"
+
+    assert get_binary_format(str(path)) is None
+
+    write_binary(Dataset.from_records(RECORDS), str(path))
+
+    assert get_binary_format(str(path)) == "arrow"
+    assert get_binary_format(str(tmp_path)) == "npy"
+    assert get_binary_format('[{"x": 1}]') is None
+    assert get_binary_format([{"x": 1}]) is None
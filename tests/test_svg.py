@@ -0,0 +1,140 @@
+import xml.dom.minidom
+
+import numpy as np
+import pytest
+
+from chasm.library.chart import configure_chart_type
+from chasm.library.config import ChartConfig
+from chasm.library.dataset import Dataset
+from chasm.library.svg import render_svg, write_svg
+
+RECORDS = [{"x": "a", "y0": 1, "y1": 4}, {"x": "b", "y0": 3, "y1": -2}, {"x": "c", "y0": 2, "y1": 5}]
+
+
+def render(chart_type, records=RECORDS, **layer):
+    data = Dataset.from_records(records)
+    config = ChartConfig()
+    config.apply_layer(layer)
+    config.compute_keys(data)
+    configure_chart_type(chart_type, config)
+
+    return xml.dom.minidom.parseString(render_svg(chart_type, data, config))
+
+
+def shapes(document, tag, color):
+    return [element for element in document.getElementsByTagName(tag) if element.getAttribute("stroke" if tag == "polyline" else "fill") == color]
+
+
+def box(rect):
+    return {name: float(rect.getAttribute(name)) for name in ("x", "y", "width", "height")}
+
+
+FIRST, SECOND = ChartConfig().chart_colorway[:2]
+
+
+@pytest.mark.parametrize("orientation", ["v", "h"])
+@pytest.mark.parametrize("barmode", ["group", "stack", "relative", "overlay"])
+def test_bars(orientation, barmode):
+    document = render("bar", orientation=orientation, chart_layout_barmode=barmode)
+    first = [box(rect) for rect in shapes(document, "rect", FIRST)]
+    second = [box(rect) for rect in shapes(document, "rect", SECOND)]
+
+    assert len(first) == len(second) == 3
+
+    # Categories run along x when vertical and along y when horizontal
+    position, size = ("x", "width") if orientation == "v" else ("y", "height")
+    length = "height" if orientation == "v" else "width"
+
+    assert len({bar[position] for bar in first}) == 3
+    assert all(bar[size] == first[0][size] for bar in first + second)
+
+    # Bars are drawn to scale: y0's 3 is three times its 1
+    assert first[1][length] == pytest.approx(3 * first[0][length], abs=0.02)
+
+    if barmode == "group":
+        assert all(a[position] != b[position] for a, b in zip(first, second))
+    else:
+        assert all(a[position] == b[position] for a, b in zip(first, second))
+
+
+@pytest.mark.parametrize("barmode", ["stack", "relative"])
+def test_stacked_bars_adjoin(barmode):
+    document = render("bar", chart_layout_barmode=barmode)
+    first = [box(rect) for rect in shapes(document, "rect", FIRST)]
+    second = [box(rect) for rect in shapes(document, "rect", SECOND)]
+
+    # Positive values stack on top of y0; the negative one grows down from zero
+    assert second[0]["y"] + second[0]["height"] == pytest.approx(first[0]["y"], abs=0.02)
+    assert second[1]["y"] == pytest.approx(first[1]["y"] + first[1]["height"], abs=0.02)
+
+
+def test_stackedbar_stacks():
+    assert [box(rect) for rect in shapes(render("stackedbar"), "rect", SECOND)] == [box(rect) for rect in shapes(render("bar", chart_layout_barmode="stack"), "rect", SECOND)]
+
+
+def test_overlay_bars_share_a_base():
+    document = render("bar", chart_layout_barmode="overlay")
+    first = [box(rect) for rect in shapes(document, "rect", FIRST)]
+    second = [box(rect) for rect in shapes(document, "rect", SECOND)]
+
+    assert first[0]["y"] + first[0]["height"] == pytest.approx(second[0]["y"] + second[0]["height"], abs=0.02)
+
+
+@pytest.mark.parametrize("orientation", ["v", "h"])
+def test_line(orientation):
+    records = [{"x": i, "y0": i * i} for i in range(10)]
+    document = render("line", records, orientation=orientation)
+    lines = shapes(document, "polyline", FIRST)
+
+    assert len(lines) == 1
+    assert len(lines[0].getAttribute("points").split()) == 10
+    assert not document.getElementsByTagName("circle")
+
+
+def test_missing_values_break_lines():
+    records = [{"x": i, "y0": None if i == 4 else i} for i in range(10)]
+    lines = shapes(render("line", records), "polyline", FIRST)
+
+    assert [len(line.getAttribute("points").split()) for line in lines] == [4, 5]
+
+
+def test_escaping():
+    title = 'Sales <2024> & "more"'
+    document = render("bar", chart_title_text=title, chart_colorway=['#fff" onload="x'])
+    texts = [element.firstChild.data for element in document.getElementsByTagName("text") if element.firstChild]
+
+    assert title in texts
+    assert len(shapes(document, "rect", '#fff" onload="x')) == 6
+
+
+def test_isc_marker_line_width_on_bars():
+    document = render("bar", isc={"y1": {"marker_line_width": 3}})
+
+    assert not any(rect.getAttribute("stroke-width") for rect in shapes(document, "rect", FIRST))
+    assert [rect.getAttribute("stroke-width") for rect in shapes(document, "rect", SECOND)] == ["3"] * 3
+
+
+def test_isc_scatter_mode():
+    records = [{"x": i, "y0": i, "y1": -i} for i in range(5)]
+    document = render("line", records, isc={"y1": {"scatter_mode": "markers"}})
+
+    assert len(shapes(document, "polyline", FIRST)) == 1
+    assert not shapes(document, "polyline", SECOND)
+    assert len(shapes(document, "circle", SECOND)) == 5
+
+
+@pytest.mark.parametrize("data, match", [(Dataset(), "no data"), (Dataset({"y0": np.arange(3)}), "no x column 'x'")])
+def test_unchartable_data(data, match):
+    config = ChartConfig()
+
+    with pytest.raises(ValueError, match=match):
+        render_svg("bar", data, config)
+
+
+def test_write_svg_only_writes_svg(tmp_path):
+    data = Dataset.from_records(RECORDS)
+    config = ChartConfig()
+    config.compute_keys(data)
+
+    with pytest.raises(ValueError, match="only writes SVG"):
+        write_svg("bar", data, config, str(tmp_path / "chart.png"))
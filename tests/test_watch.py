@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from chasm.library.watch import ChartWatch
+
+RECORDS = [{"x": i, "y0": i * i} for i in range(10)]
+
+
+def edit(path, text):
+    # Bumps the mtime past the last one, however coarse the filesystem's clock
+    mtime = os.stat(path).st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    os.utime(path, ns=(mtime + 1_000_000_000, mtime + 1_000_000_000))
+
+
+@pytest.fixture
+def files(tmp_path):
+    files = {"data": tmp_path / "data.json", "mod": tmp_path / "mod.chasm", "layer": tmp_path / "layer.yaml", "output": tmp_path / "chart.svg"}
+
+    edit(files["data"], json.dumps(RECORDS))
+    edit(files["mod"], "addint adder=1, key=y0\n")
+    edit(files["layer"], "chart_title_text: First\n")
+
+    return files
+
+
+@pytest.fixture
+def watch(files):
+    return ChartWatch("line", str(files["data"]), [str(files["layer"])], [str(files["mod"])], [str(files["output"])], renderer="native")
+
+
+def test_first_render_runs_every_stage(watch, files):
+    assert watch.render() == ["parse", "mods", "config", "figure"]
+    assert "First" in files["output"].read_text()
+    assert watch.changed() == []
+
+
+def test_unchanged_inputs_only_redraw(watch):
+    watch.render()
+    parsed, data, config = watch.parsed, watch.data, watch.config
+
+    assert watch.render() == ["figure"]
+    assert watch.parsed is parsed and watch.data is data and watch.config is config
+
+
+def test_layer_edit(watch, files):
+    watch.render()
+    parsed, data = watch.parsed, watch.data
+
+    edit(files["layer"], "chart_title_text: Second\n")
+
+    assert watch.changed() == ["config"]
+    assert watch.render() == ["config", "figure"]
+    assert watch.parsed is parsed and watch.data is data
+    assert "Second" in files["output"].read_text()
+
+
+def test_mod_edit(watch, files):
+    watch.render()
+    parsed = watch.parsed
+
+    edit(files["mod"], "addint adder=100, key=y0\n")
+
+    assert watch.changed() == ["mods"]
+    assert watch.render() == ["mods", "config", "figure"]
+    assert watch.parsed is parsed
+    assert watch.data["y0"].tolist() == [record["y0"] + 100 for record in RECORDS]
+
+    # The mod ran on a copy, so the parsed data is still as read
+    assert watch.parsed["y0"].tolist() == [record["y0"] for record in RECORDS]
+
+
+def test_data_edit(watch, files):
+    watch.render()
+
+    edit(files["data"], json.dumps(RECORDS[:5]))
+
+    assert watch.changed() == ["parse"]
+    assert watch.render() == ["parse", "mods", "config", "figure"]
+    assert len(watch.data) == 5
+
+
+def test_failed_stage_is_rerun(watch, files):
+    watch.render()
+
+    edit(files["mod"], "nosuchop a=1\n")
+
+    with pytest.raises(ValueError):
+        watch.render()
+
+    # The bad mod's inputs were recorded, but its stage was cleared, so it still reruns once fixed
+    assert watch.changed() == []
+
+    edit(files["mod"], "addint adder=2, key=y0\n")
+
+    assert watch.render() == ["mods", "config", "figure"]
+    assert watch.data["y0"].tolist() == [record["y0"] + 2 for record in RECORDS]
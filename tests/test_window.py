@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+from chasm.library.dataset import Dataset
+from chasm.library.mod import ISA
+from chasm.library.window import RollingWindow, window_sums
+
+VALUES = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8]
+
+
+def windows(values, wsize):
+    return [values[max(0, i - wsize + 1):i + 1] for i in range(len(values))]
+
+
+def roll(values, wsize, stat):
+    window = RollingWindow(wsize, stats=(stat,))
+    results = []
+
+    for value in values:
+        window.push(value)
+        results.append(getattr(window, stat)())
+
+    return results
+
+
+@pytest.mark.parametrize("wsize", [1, 2, 3, 5, 12])
+def test_rolling_values(wsize):
+    expected = windows(VALUES, wsize)
+
+    assert roll(VALUES, wsize, "sum") == [sum(w) for w in expected]
+    assert roll(VALUES, wsize, "mean") == pytest.approx([sum(w) / len(w) for w in expected])
+    assert roll(VALUES, wsize, "min") == [min(w) for w in expected]
+    assert roll(VALUES, wsize, "max") == [max(w) for w in expected]
+    assert roll(VALUES, wsize, "std") == pytest.approx([float(np.std(w)) for w in expected], abs=1e-12)
+
+
+def test_ema():
+    alpha = 2 / (4 + 1)
+    expected = [VALUES[0]]
+
+    for value in VALUES[1:]:
+        expected.append(expected[-1] + alpha * (value - expected[-1]))
+
+    assert roll(VALUES, 4, "ema") == pytest.approx(expected)
+
+
+def test_unknown_statistic():
+    with pytest.raises(ValueError):
+        RollingWindow(3, stats=("median",))
+
+
+@pytest.mark.parametrize("wsize", [1, 7, 100, 1000])
+def test_float_sums_stay_precise(wsize):
+    # Differences of running totals drift by ~1e-1 here; each window must stay close to its exact sum
+    values = 1e9 + np.random.default_rng(0).random(200_000)
+    sums = window_sums(values, wsize)
+
+    for i in range(0, len(values), 997):
+        exact = math.fsum(values[max(0, i - wsize + 1):i + 1])
+        assert abs(sums[i] - exact) <= 1e-14 * exact
+
+
+def test_integer_sums_are_exact():
+    values = np.arange(10, dtype=np.int64)
+
+    assert window_sums(values, 3).tolist() == [0, 1, 3, 6, 9, 12, 15, 18, 21, 24]
+
+
+def test_gap_only_affects_its_windows():
+    sums = window_sums(np.array([1.0, np.nan, 2, 3, 4, 5, 6]), 2)
+
+    assert np.isnan(sums[1:3]).all()
+    assert sums[3:].tolist() == [5, 7, 9, 11]
+
+
+@pytest.mark.parametrize("name", ["injectrollingsum", "injectmovingaverage", "injectrollingstd"])
+def test_columns_match_window(name):
+    values = (1e9 + np.random.default_rng(1).random(5_000)).tolist()
+    args = {"wsize": 64, "skey": "y", "tkey": "t"}
+
+    rows = ISA[name](dict(args)).process([{"y": value} for value in values])
+    columns = ISA[name](dict(args)).process_columns(Dataset({"y": np.array(values)}))
+
+    assert columns["t"].tolist() == [datum["t"] for datum in rows]
+
+
+def test_window_larger_than_data():
+    with pytest.raises(ValueError):
+        ISA["injectrollingsum"]({"wsize": 5, "skey": "y", "tkey": "t"}).process_columns(Dataset({"y": np.arange(3)}))